@@ -3,8 +3,8 @@ Health check URLs for Modern edX CMS.
 """
 from django.urls import path
 from django.http import JsonResponse
-from django.db import connection
-from django.core.cache import cache
+
+from shared.monitoring.health import get_health_monitor
 
 def health_check(request):
     """Basic health check endpoint."""
@@ -14,31 +14,31 @@ def health_check(request):
         'version': '1.0.0'
     })
 
+def health_live(request):
+    """Liveness probe: the process is serving requests; dependencies are not checked."""
+    return JsonResponse({'status': 'alive', 'service': 'cms'})
+
+def health_ready(request):
+    """Readiness probe: last background check results with their age (503 when not ready)."""
+    snapshot = get_health_monitor().snapshot()
+    snapshot['status'] = 'ready' if snapshot['ready'] else 'unavailable'
+    snapshot['service'] = 'cms'
+    return JsonResponse(snapshot, status=200 if snapshot['ready'] else 503)
+
 def health_detailed(request):
     """Detailed health check with database and cache status."""
-    status = {'status': 'healthy', 'checks': {}}
-    
-    # Database check
-    try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT 1")
-        status['checks']['database'] = 'healthy'
-    except Exception as e:
-        status['checks']['database'] = f'unhealthy: {str(e)}'
-        status['status'] = 'unhealthy'
-    
-    # Cache check
-    try:
-        cache.set('health_check', 'test', 1)
-        cache.get('health_check')
-        status['checks']['cache'] = 'healthy'
-    except Exception as e:
-        status['checks']['cache'] = f'unhealthy: {str(e)}'
-        status['status'] = 'unhealthy'
-    
+    snapshot = get_health_monitor().snapshot()
+    status = {'status': 'healthy' if snapshot['ready'] else 'unhealthy', 'checks': {}}
+    for name, result in snapshot['checks'].items():
+        if result['status'] == 'ok':
+            status['checks'][name] = 'healthy'
+        else:
+            status['checks'][name] = f"unhealthy: {result.get('detail') or result['status']}"
     return JsonResponse(status)
 
 urlpatterns = [
     path('', health_check, name='health_check'),
+    path('live/', health_live, name='health_live'),
+    path('ready/', health_ready, name='health_ready'),
     path('detailed/', health_detailed, name='health_detailed'),
 ]
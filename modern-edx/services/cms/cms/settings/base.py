@@ -40,7 +40,12 @@ LOCAL_APPS = [
     'apps.publishing',
 ]
 
-INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
+# Apps from services/shared, copied next to each service in its image (a required dependency)
+SHARED_APPS = [
+    'shared.authlog',
+]
+
+INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + SHARED_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
@@ -98,6 +103,52 @@ CACHES = {
     }
 }
 
+# Prometheus metrics at /metrics (shared.monitoring, bundled into the service image).
+# METRICS_MULTIPROC_DIR must be shared by all gunicorn workers to aggregate them.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_SERVICE = 'cms'
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+METRICS_CELERY_QUEUES = config('METRICS_CELERY_QUEUES', default='celery', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+# /metrics is served to these networks (checked against get_client_ip) or to a matching bearer token
+METRICS_ALLOWED_NETWORKS = config('METRICS_ALLOWED_NETWORKS', default='127.0.0.1/32,::1/128', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+METRICS_BEARER_TOKEN = config('METRICS_BEARER_TOKEN', default='')
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'shared.monitoring.middleware.MetricsMiddleware')
+
+# Health probes (/health/live/, /health/ready/) serve results refreshed in the background
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=10.0, cast=float)
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=2.0, cast=float)
+HEALTH_STALE_AFTER = config('HEALTH_STALE_AFTER', default=30.0, cast=float)
+HEALTH_DEEP_CHECKS = config('HEALTH_DEEP_CHECKS', default=False, cast=bool)
+HEALTH_DEEP_CHECK_INTERVAL = config('HEALTH_DEEP_CHECK_INTERVAL', default=60.0, cast=float)
+
+# Authentication log (shared.authlog): events are buffered ('redis', 'memory' or 'sync')
+# and written in batches; archive_auth_logs applies retention
+AUTH_LOG_BUFFER = config('AUTH_LOG_BUFFER', default='redis')
+AUTH_LOG_REDIS_URL = config('AUTH_LOG_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0'))
+AUTH_LOG_FLUSH_INTERVAL = config('AUTH_LOG_FLUSH_INTERVAL', default=0.25, cast=float)
+AUTH_LOG_BATCH_SIZE = config('AUTH_LOG_BATCH_SIZE', default=500, cast=int)
+AUTH_LOG_MAX_BATCHES_PER_FLUSH = config('AUTH_LOG_MAX_BATCHES_PER_FLUSH', default=20, cast=int)
+AUTH_LOG_RETENTION_DAYS = config('AUTH_LOG_RETENTION_DAYS', default=365, cast=int)
+AUTH_LOG_ARCHIVE_DIR = config('AUTH_LOG_ARCHIVE_DIR', default='')
+
+# Login throttling (shared.authentication.backends.ThrottledModelBackend): sliding
+# windows per client IP, account and (IP, account), as scope -> (attempts, seconds)
+AUTHENTICATION_BACKENDS = ['shared.authentication.backends.ThrottledModelBackend']
+LOGIN_THROTTLE_ENABLED = config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool)
+LOGIN_THROTTLE_BACKEND = config('LOGIN_THROTTLE_BACKEND', default='redis')
+LOGIN_THROTTLE_REDIS_URL = config('LOGIN_THROTTLE_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0'))
+LOGIN_THROTTLE_MEMORY_MAX_KEYS = config('LOGIN_THROTTLE_MEMORY_MAX_KEYS', default=100000, cast=int)
+LOGIN_THROTTLE_RULES = {
+    'ip': (config('LOGIN_THROTTLE_IP_LIMIT', default=50, cast=int), 300),
+    'account': (config('LOGIN_THROTTLE_ACCOUNT_LIMIT', default=10, cast=int), 900),
+    'ip_account': (config('LOGIN_THROTTLE_IP_ACCOUNT_LIMIT', default=5, cast=int), 300),
+}
+
+# Reverse proxies in front of the service; X-Forwarded-For entries beyond them are ignored
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
 # Session storage
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -25,6 +25,10 @@ urlpatterns = [
     path('health/', include('cms.health_urls')),
 ]
 
+if settings.METRICS_ENABLED:
+    from shared.monitoring.middleware import metrics_view
+    urlpatterns.append(path('metrics', metrics_view, name='metrics'))
+
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
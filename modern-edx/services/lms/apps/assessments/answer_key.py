@@ -0,0 +1,198 @@
+"""
+Precompiled answer keys for auto-grading choice questions.
+
+An ``AnswerKey`` maps each choice-based question of an assessment to the
+frozen set of its correct choice ids, its points and its partial-credit
+flag. Keys are built when an assessment is published and cached per
+process and in the shared cache under a version token that is bumped
+once a Question/AnswerChoice edit commits, so grading a submission is a
+set comparison with no database reads.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AnswerChoice, Question, StudentAnswer
+
+CHOICE_QUESTION_TYPES = ('multiple_choice', 'true_false')
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class QuestionKey:
+    question_id: int
+    question_type: str
+    correct_choice_ids: FrozenSet[int]
+    points: Decimal
+    partial_credit: bool
+
+    def grade(self, selected_choice_ids: Iterable[int]) -> Tuple[bool, Decimal]:
+        """Return ``(is_correct, points_earned)`` for a set of selected choices."""
+        selected = frozenset(selected_choice_ids)
+        if not self.correct_choice_ids:
+            # No choice is marked correct yet: nothing earns points, not
+            # even an empty selection, until the key is fixed and regraded.
+            return False, Decimal('0.00')
+        if selected == self.correct_choice_ids:
+            return True, self.points
+        if not self.partial_credit:
+            return False, Decimal('0.00')
+        # Each correct pick earns a share, each wrong pick cancels one.
+        hits = len(selected & self.correct_choice_ids)
+        misses = len(selected - self.correct_choice_ids)
+        share = max(hits - misses, 0) / len(self.correct_choice_ids)
+        return False, (self.points * Decimal(share)).quantize(Decimal('0.01'))
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    assessment_id: int
+    version: Optional[int]
+    questions: Tuple[QuestionKey, ...]
+    _index: Dict[int, QuestionKey] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_index', {q.question_id: q for q in self.questions})
+
+    def __contains__(self, question_id):
+        return question_id in self._index
+
+    def get(self, question_id) -> Optional[QuestionKey]:
+        return self._index.get(question_id)
+
+    def grade(self, question_id, selected_choice_ids):
+        return self._index[question_id].grade(selected_choice_ids)
+
+    def grade_submission(self, selections):
+        """Grade ``{question_id: selected_choice_ids}``; unknown questions are skipped."""
+        return {
+            question_id: self._index[question_id].grade(selected)
+            for question_id, selected in selections.items()
+            if question_id in self._index
+        }
+
+
+_local_keys = {}
+_local_lock = threading.Lock()
+
+
+def _version_key(assessment_id):
+    return f'answer_key_version:{assessment_id}'
+
+
+def _key_cache_key(assessment_id, version):
+    return f'answer_key:{assessment_id}:{version}'
+
+
+def _current_version(assessment_id):
+    version = cache.get(_version_key(assessment_id))
+    if version is None:
+        cache.add(_version_key(assessment_id), time.time_ns(), None)
+        version = cache.get(_version_key(assessment_id))
+    return version
+
+
+def bump_answer_key_version(assessment_id):
+    """Invalidate every cached copy of an assessment's answer key."""
+    cache.set(_version_key(assessment_id), time.time_ns(), None)
+    with _local_lock:
+        _local_keys.pop(assessment_id, None)
+
+
+def build_answer_key(assessment_id, version=None):
+    """Compile the answer key from the database (two queries)."""
+    questions = list(
+        Question.objects.filter(
+            assessment_id=assessment_id, question_type__in=CHOICE_QUESTION_TYPES
+        ).values_list('id', 'question_type', 'points', 'partial_credit')
+    )
+    correct = {}
+    for question_id, choice_id in AnswerChoice.objects.filter(
+        question__assessment_id=assessment_id,
+        question__question_type__in=CHOICE_QUESTION_TYPES,
+        is_correct=True,
+    ).values_list('question_id', 'id'):
+        correct.setdefault(question_id, set()).add(choice_id)
+
+    return AnswerKey(
+        assessment_id=assessment_id,
+        version=version,
+        questions=tuple(
+            QuestionKey(
+                question_id=question_id,
+                question_type=question_type,
+                correct_choice_ids=frozenset(correct.get(question_id, ())),
+                points=points,
+                partial_credit=partial_credit,
+            )
+            for question_id, question_type, points, partial_credit in questions
+        ),
+    )
+
+
+def get_answer_key(assessment_id):
+    """Return the current answer key, building and caching it if needed."""
+    version = _current_version(assessment_id)
+    if version is None:
+        # No shared cache to coordinate versions; always read fresh.
+        return build_answer_key(assessment_id)
+
+    with _local_lock:
+        key = _local_keys.get(assessment_id)
+    if key is not None and key.version == version:
+        return key
+
+    key = cache.get(_key_cache_key(assessment_id, version))
+    if key is None:
+        key = build_answer_key(assessment_id, version)
+        cache.set(_key_cache_key(assessment_id, version), key, CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local_keys[assessment_id] = key
+    return key
+
+
+def auto_grade_answers(answers):
+    """
+    Grade choice answers against their assessments' answer keys.
+
+    ``answers`` is a StudentAnswer queryset. Selected choices are read in a
+    single query and results are written back with ``bulk_update``.
+    Returns the number of graded answers.
+    """
+    answers = list(answers.select_related('attempt').only(
+        'id', 'question_id', 'is_correct', 'points_earned', 'attempt__assessment_id'
+    ))
+    if not answers:
+        return 0
+
+    selections = {}
+    through = StudentAnswer.selected_choices.through
+    for answer_id, choice_id in through.objects.filter(
+        studentanswer_id__in=[answer.pk for answer in answers]
+    ).values_list('studentanswer_id', 'answerchoice_id'):
+        selections.setdefault(answer_id, set()).add(choice_id)
+
+    now = timezone.now()
+    keys = {}
+    graded = []
+    for answer in answers:
+        assessment_id = answer.attempt.assessment_id
+        if assessment_id not in keys:
+            keys[assessment_id] = get_answer_key(assessment_id)
+        question_key = keys[assessment_id].get(answer.question_id)
+        if question_key is None:
+            continue
+        answer.is_correct, answer.points_earned = question_key.grade(selections.get(answer.pk, ()))
+        answer.updated_at = now
+        graded.append(answer)
+
+    with transaction.atomic():
+        StudentAnswer.objects.bulk_update(graded, ['is_correct', 'points_earned', 'updated_at'])
+    return len(graded)
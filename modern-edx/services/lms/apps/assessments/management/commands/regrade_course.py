@@ -0,0 +1,29 @@
+"""
+Recalculate all GradeBook rows for a course in bulk.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.assessments.grading import regrade_course
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Regrade every learner of a course with the vectorised grading engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='+', help='Course identifiers to regrade.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for course_id in options['course_ids']:
+            try:
+                course = Course.objects.get(course_id=course_id)
+            except Course.DoesNotExist:
+                raise CommandError(f'Course "{course_id}" does not exist.')
+
+            result = regrade_course(course, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{course_id}: regraded {result.learners} learners '
+                f'({result.updated} updated, {result.created} created) in '
+                f'{result.elapsed_seconds:.2f}s - {result.learners_per_second:.0f} learners/s'
+            ))
@@ -0,0 +1,33 @@
+"""
+Score all submitted attempts of an assessment in bulk.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.assessments.models import Assessment
+from apps.assessments.scoring import SCORABLE_STATUSES, score_assessment
+
+
+class Command(BaseCommand):
+    help = 'Score every submitted attempt of the given assessments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assessment_ids', nargs='+', type=int)
+        parser.add_argument(
+            '--status', action='append', dest='statuses',
+            help=f'Attempt statuses to score (default: {", ".join(SCORABLE_STATUSES)}).',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        statuses = options['statuses'] or SCORABLE_STATUSES
+        for assessment_id in options['assessment_ids']:
+            try:
+                assessment = Assessment.objects.get(pk=assessment_id)
+            except Assessment.DoesNotExist:
+                raise CommandError(f'Assessment {assessment_id} does not exist.')
+
+            result = score_assessment(assessment, statuses=statuses, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{assessment.title}: scored {result.attempts} attempts in '
+                f'{result.elapsed_seconds:.2f}s - {result.attempts_per_second:.0f} attempts/s'
+            ))
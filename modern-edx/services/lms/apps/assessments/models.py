@@ -1,12 +1,43 @@
 """
 Assessment models for Modern edX LMS.
 """
+from decimal import Decimal
 from django.db import models
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
+# Lowest percentage for each letter grade, highest first.
+LETTER_GRADE_CUTOFFS = [
+    (97, 'A+'), (93, 'A'), (90, 'A-'),
+    (87, 'B+'), (83, 'B'), (80, 'B-'),
+    (77, 'C+'), (73, 'C'), (70, 'C-'),
+    (67, 'D+'), (63, 'D'), (60, 'D-'),
+]
+
+def attempt_points_expressions(prefix=''):
+    """
+    Aggregate expressions for the total and earned question points of
+    student answers. ``prefix`` is the lookup path to StudentAnswer, e.g.
+    ``'answers__'`` when annotating StudentAttempt querysets.
+    """
+    points = f'{prefix}question__points'
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    return {
+        'total_points': Coalesce(Sum(points), zero),
+        'earned_points': Coalesce(Sum(points, filter=Q(**{f'{prefix}is_correct': True})), zero),
+    }
+
+def letter_grade_for(percentage):
+    """Convert a percentage to a letter grade."""
+    for cutoff, letter in LETTER_GRADE_CUTOFFS:
+        if percentage >= cutoff:
+            return letter
+    return 'F'
+
 class Assessment(models.Model):
     """Base assessment model for quizzes, assignments, and exams."""
     
@@ -196,23 +227,21 @@ class StudentAttempt(models.Model):
     
     def calculate_score(self):
         """Calculate the score based on student answers."""
-        total_points = 0
-        earned_points = 0
-        
-        for answer in self.answers.all():
-            total_points += answer.question.points
-            if answer.is_correct:
-                earned_points += answer.question.points
-        
+        totals = self.answers.aggregate(**attempt_points_expressions())
+        self.apply_points(totals['earned_points'], totals['total_points'])
+        # Counted by the post_save receiver in signals.py.
+        self._scored = True
+        self.save()
+        return self.score
+    
+    def apply_points(self, earned_points, total_points):
+        """Set score and percentage from earned/total question points."""
         if total_points > 0:
             self.score = earned_points
-            self.percentage = (earned_points / total_points) * 100
+            self.percentage = (earned_points / total_points * 100).quantize(Decimal('0.01'))
         else:
             self.score = 0
             self.percentage = 0
-        
-        self.save()
-        return self.score
 
 class StudentAnswer(models.Model):
     """Student answer to a question."""
@@ -295,7 +324,7 @@ class GradeBook(models.Model):
             assessment__course=self.course,
             student=self.student,
             status='graded'
-        )
+        ).select_related('assessment')
         
         total_weight = 0
         weighted_score = 0
@@ -319,17 +348,4 @@ class GradeBook(models.Model):
     
     def _calculate_letter_grade(self):
         """Convert percentage to letter grade."""
-        grade = self.current_grade
-        if grade >= 97: return 'A+'
-        elif grade >= 93: return 'A'
-        elif grade >= 90: return 'A-'
-        elif grade >= 87: return 'B+'
-        elif grade >= 83: return 'B'
-        elif grade >= 80: return 'B-'
-        elif grade >= 77: return 'C+'
-        elif grade >= 73: return 'C'
-        elif grade >= 70: return 'C-'
-        elif grade >= 67: return 'D+'
-        elif grade >= 63: return 'D'
-        elif grade >= 60: return 'D-'
-        else: return 'F'
+        return letter_grade_for(self.current_grade)
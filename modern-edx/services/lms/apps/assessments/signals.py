@@ -0,0 +1,64 @@
+"""
+Signal handlers for the assessments app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from lms.metrics import ATTEMPTS_GRADED, inc_on_commit
+
+from .answer_key import bump_answer_key_version, get_answer_key
+from .models import AnswerChoice, Assessment, Question, StudentAttempt
+
+# Sent after a course regrade writes GradeBook rows in bulk, without save().
+# ``course_pk`` is the course, ``student_ids`` the learners regraded.
+gradebooks_bulk_updated = Signal()
+
+
+def _bump_on_commit(assessment_id):
+    # A key compiled before the edit commits would be cached under the new
+    # version with the old (or rolled back) questions, so bump afterwards.
+    transaction.on_commit(lambda: bump_answer_key_version(assessment_id))
+
+
+@receiver(post_save, sender=Assessment)
+def assessment_saved(sender, instance, raw=False, **kwargs):
+    """Compile the answer key as soon as a published assessment commits."""
+    if raw or not instance.is_published:
+        return
+    assessment_id = instance.pk
+
+    def compile_key():
+        bump_answer_key_version(assessment_id)
+        get_answer_key(assessment_id)
+
+    transaction.on_commit(compile_key)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _bump_on_commit(instance.assessment_id)
+
+
+@receiver(post_save, sender=AnswerChoice)
+@receiver(post_delete, sender=AnswerChoice)
+def answer_choice_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    assessment_id = Question.objects.filter(pk=instance.question_id).values_list(
+        'assessment_id', flat=True
+    ).first()
+    if assessment_id is not None:
+        _bump_on_commit(assessment_id)
+
+
+@receiver(post_save, sender=StudentAttempt)
+def attempt_saved(sender, instance, raw=False, **kwargs):
+    """Count attempts scored by ``calculate_score`` once they commit."""
+    if raw or not getattr(instance, '_scored', False):
+        return
+    instance._scored = False
+    inc_on_commit(ATTEMPTS_GRADED)
@@ -0,0 +1,299 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.courses.models import Course, CourseEnrollment, CourseMode
+from apps.students.dashboard import get_student_dashboard
+from lms.metrics import ATTEMPTS_GRADED
+from . import answer_key
+from .answer_key import QuestionKey, auto_grade_answers, get_answer_key
+from .grading import compute_course_grades, regrade_course
+from .models import AnswerChoice, Assessment, GradeBook, Question, StudentAnswer, StudentAttempt
+from .scoring import score_assessment, score_attempts
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_course(course_id='course-v1:Test+AS101+2024', **kwargs):
+    org, number, run = course_id.split(':', 1)[1].split('+')
+    kwargs.setdefault('display_name', 'Assessments 101')
+    return Course.objects.create(course_id=course_id, org=org, course=number, run=run, **kwargs)
+
+
+def make_assessment(course, title='Quiz', weight=Decimal('50.00'), **kwargs):
+    now = timezone.now()
+    kwargs.setdefault('assessment_type', 'quiz')
+    kwargs.setdefault('difficulty', 'beginner')
+    return Assessment.objects.create(
+        course=course, title=title, weight_percentage=weight,
+        start_date=now - timedelta(days=1), due_date=now + timedelta(days=1), **kwargs
+    )
+
+
+class CourseGradeComputationTest(TestCase):
+    def test_weighted_average_per_student(self):
+        students, grades, letters = compute_course_grades(
+            [7, 3, 7, 3],
+            [100.0, 80.0, 50.0, 90.0],
+            [75.0, 25.0, 25.0, 75.0],
+        )
+        self.assertEqual(list(students), [3, 7])
+        self.assertAlmostEqual(grades[0], 87.5)
+        self.assertAlmostEqual(grades[1], 87.5)
+        self.assertEqual(list(letters), ['B+', 'B+'])
+
+    def test_letters_match_cutoffs(self):
+        percentages = [97.0, 96.99, 60.0, 59.99, 0.0]
+        _, _, letters = compute_course_grades(range(len(percentages)), percentages, [1.0] * len(percentages))
+        self.assertEqual(list(letters), ['A+', 'A', 'D-', 'F', 'F'])
+
+    def test_zero_weight_grades_zero(self):
+        _, grades, letters = compute_course_grades([1], [95.0], [0.0])
+        self.assertEqual(grades[0], 0.0)
+        self.assertEqual(letters[0], 'F')
+
+
+class RegradeCourseTest(TestCase):
+    def setUp(self):
+        self.course = make_course()
+        self.quiz = make_assessment(self.course, 'Quiz', Decimal('25.00'))
+        self.exam = make_assessment(self.course, 'Exam', Decimal('75.00'), assessment_type='exam')
+        self.alice = User.objects.create_user(username='alice', password='test')
+        self.bob = User.objects.create_user(username='bob', password='test')
+
+    def attempt(self, assessment, student, percentage, status='graded'):
+        return StudentAttempt.objects.create(
+            assessment=assessment, student=student, status=status, percentage=percentage
+        )
+
+    def test_matches_calculate_grade(self):
+        self.attempt(self.quiz, self.alice, Decimal('80.00'))
+        self.attempt(self.exam, self.alice, Decimal('93.33'))
+        self.attempt(self.exam, self.bob, Decimal('58.00'))
+        # Ungraded attempts don't count.
+        self.attempt(self.quiz, self.bob, Decimal('100.00'), status='submitted')
+
+        result = regrade_course(self.course)
+
+        self.assertEqual((result.learners, result.created, result.updated), (2, 2, 0))
+        for student in (self.alice, self.bob):
+            gradebook = GradeBook.objects.get(course=self.course, student=student)
+            regraded = (gradebook.current_grade, gradebook.letter_grade)
+            gradebook.calculate_grade()
+            gradebook.refresh_from_db()
+            self.assertEqual(regraded, (gradebook.current_grade, gradebook.letter_grade))
+
+    def test_existing_rows_without_graded_attempts_drop_to_zero(self):
+        GradeBook.objects.create(course=self.course, student=self.bob, current_grade=Decimal('88.00'), letter_grade='B+')
+        self.attempt(self.quiz, self.alice, Decimal('70.00'))
+
+        result = regrade_course(self.course)
+
+        self.assertEqual((result.created, result.updated), (1, 1))
+        bob = GradeBook.objects.get(course=self.course, student=self.bob)
+        self.assertEqual((bob.current_grade, bob.letter_grade), (Decimal('0.00'), 'F'))
+        alice = GradeBook.objects.get(course=self.course, student=self.alice)
+        self.assertEqual((alice.current_grade, alice.letter_grade), (Decimal('70.00'), 'C-'))
+
+    def test_other_courses_untouched(self):
+        other = make_course('course-v1:Test+AS102+2024')
+        GradeBook.objects.create(course=other, student=self.alice, current_grade=Decimal('91.00'), letter_grade='A-')
+
+        regrade_course(self.course)
+
+        self.assertEqual(GradeBook.objects.get(course=other).current_grade, Decimal('91.00'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_invalidates_regraded_dashboards(self):
+        cache.clear()
+        mode = CourseMode.objects.create(course_id=self.course.course_id, mode_slug='audit', mode_display_name='Audit')
+        CourseEnrollment.objects.create(user=self.alice, course=self.course, mode=mode)
+        self.attempt(self.quiz, self.alice, Decimal('100.00'))
+        grade = lambda: get_student_dashboard(self.alice.pk).course_progress[0].current_grade
+        self.assertIsNone(grade())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            regrade_course(self.course)
+
+        self.assertEqual(grade(), Decimal('100.00'))
+
+    def test_command(self):
+        self.attempt(self.quiz, self.alice, Decimal('100.00'))
+        out = StringIO()
+        call_command('regrade_course', self.course.course_id, stdout=out)
+        self.assertIn('regraded 1 learners', out.getvalue())
+        self.assertEqual(GradeBook.objects.get(student=self.alice).letter_grade, 'A+')
+
+
+class ScoreAttemptsTest(TestCase):
+    def setUp(self):
+        self.assessment = make_assessment(make_course())
+        self.questions = [
+            Question.objects.create(
+                assessment=self.assessment, question_text=f'Q{i}', question_type='short_answer',
+                points=points, order=i,
+            )
+            for i, points in enumerate([Decimal('1.00'), Decimal('2.00'), Decimal('3.00')])
+        ]
+
+    def make_attempts(self, count, status='submitted', correct=(True, False, True)):
+        attempts = []
+        for i in range(count):
+            student = User.objects.create_user(username=f'{status}-{i}-{User.objects.count()}', password='test')
+            attempt = StudentAttempt.objects.create(assessment=self.assessment, student=student, status=status)
+            for question, is_correct in zip(self.questions, correct):
+                StudentAnswer.objects.create(attempt=attempt, question=question, is_correct=is_correct)
+            attempts.append(attempt)
+        return attempts
+
+    def test_matches_calculate_score(self):
+        bulk, single = self.make_attempts(2, correct=(True, True, False))
+
+        score_attempts(StudentAttempt.objects.filter(pk=bulk.pk))
+        single.calculate_score()
+
+        bulk.refresh_from_db()
+        single.refresh_from_db()
+        self.assertEqual((bulk.score, bulk.percentage), (Decimal('3.00'), Decimal('50.00')))
+        self.assertEqual((bulk.score, bulk.percentage), (single.score, single.percentage))
+
+    def test_attempt_without_answers_scores_zero(self):
+        student = User.objects.create_user(username='blank', password='test')
+        attempt = StudentAttempt.objects.create(assessment=self.assessment, student=student, status='submitted')
+
+        score_assessment(self.assessment)
+
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.score, attempt.percentage), (Decimal('0.00'), Decimal('0.00')))
+
+    def test_only_scorable_statuses(self):
+        self.make_attempts(2)
+        in_progress, = self.make_attempts(1, status='in_progress')
+
+        result = score_assessment(self.assessment)
+
+        self.assertEqual(result.attempts, 2)
+        in_progress.refresh_from_db()
+        self.assertIsNone(in_progress.score)
+        self.assertEqual(
+            set(StudentAttempt.objects.filter(status='submitted').values_list('percentage', flat=True)),
+            {Decimal('66.67')},
+        )
+
+    def test_query_count_independent_of_batch(self):
+        self.make_attempts(2)
+        with CaptureQueriesContext(connection) as small:
+            score_assessment(self.assessment)
+        self.make_attempts(8)
+        with CaptureQueriesContext(connection) as large:
+            score_assessment(self.assessment)
+        self.assertEqual(len(small), len(large))
+
+    def test_graded_metric_counts_committed_scores(self):
+        counted = lambda: sum(ATTEMPTS_GRADED.samples().values())
+        single, = self.make_attempts(1)
+        self.make_attempts(2)
+        before = counted()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            single.calculate_score()
+            score_assessment(self.assessment)
+        self.assertEqual(counted(), before + 4)
+
+        with self.assertRaises(DatabaseError), self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                single.calculate_score()
+                raise DatabaseError('rolled back')
+        self.assertEqual(counted(), before + 4)
+
+    def test_command(self):
+        self.make_attempts(3)
+        out = StringIO()
+        call_command('score_assessment', str(self.assessment.pk), stdout=out)
+        self.assertIn('scored 3 attempts', out.getvalue())
+
+
+class QuestionKeyTest(TestCase):
+    def key(self, correct, partial_credit=False):
+        return QuestionKey(1, 'multiple_choice', frozenset(correct), Decimal('4.00'), partial_credit)
+
+    def test_exact_match(self):
+        self.assertEqual(self.key({1, 2}).grade([2, 1]), (True, Decimal('4.00')))
+        self.assertEqual(self.key({1, 2}).grade([1]), (False, Decimal('0.00')))
+
+    def test_partial_credit(self):
+        key = self.key({1, 2, 3, 4}, partial_credit=True)
+        self.assertEqual(key.grade([1, 2, 3]), (False, Decimal('3.00')))
+        self.assertEqual(key.grade([1, 2, 5]), (False, Decimal('1.00')))
+        self.assertEqual(key.grade([5, 6]), (False, Decimal('0.00')))
+
+    def test_no_correct_choices_earns_nothing(self):
+        for partial_credit in (False, True):
+            key = self.key(set(), partial_credit)
+            self.assertEqual(key.grade([]), (False, Decimal('0.00')))
+            self.assertEqual(key.grade([7]), (False, Decimal('0.00')))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AnswerKeyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key._local_keys.clear()
+        self.assessment = make_assessment(make_course())
+        self.question = Question.objects.create(
+            assessment=self.assessment, question_text='2 + 2?', question_type='multiple_choice', points=2,
+        )
+        self.right = AnswerChoice.objects.create(question=self.question, choice_text='4', is_correct=True)
+        self.wrong = AnswerChoice.objects.create(question=self.question, choice_text='5')
+        Question.objects.create(assessment=self.assessment, question_text='Why?', question_type='essay')
+
+    def tearDown(self):
+        answer_key._local_keys.clear()
+
+    def test_only_choice_questions_and_cached(self):
+        key = get_answer_key(self.assessment.pk)
+        self.assertEqual([q.question_id for q in key.questions], [self.question.pk])
+        self.assertEqual(key.get(self.question.pk).correct_choice_ids, {self.right.pk})
+        with self.assertNumQueries(0):
+            self.assertIs(get_answer_key(self.assessment.pk), key)
+
+    def test_edit_invalidates_on_commit(self):
+        get_answer_key(self.assessment.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.wrong.is_correct = True
+            self.wrong.save()
+        # Until the edit commits, other workers keep grading with the old key.
+        self.assertEqual(get_answer_key(self.assessment.pk).get(self.question.pk).correct_choice_ids, {self.right.pk})
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            get_answer_key(self.assessment.pk).get(self.question.pk).correct_choice_ids,
+            {self.right.pk, self.wrong.pk},
+        )
+
+    def test_publish_compiles_key_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assessment.is_published = True
+            self.assessment.save()
+        with self.assertNumQueries(0):
+            self.assertIn(self.question.pk, get_answer_key(self.assessment.pk))
+
+    def test_auto_grade_answers(self):
+        student = User.objects.create_user(username='learner', password='test')
+        attempt = StudentAttempt.objects.create(assessment=self.assessment, student=student, status='submitted')
+        answer = StudentAnswer.objects.create(attempt=attempt, question=self.question)
+        answer.selected_choices.set([self.right])
+
+        self.assertEqual(auto_grade_answers(StudentAnswer.objects.filter(attempt=attempt)), 1)
+
+        answer.refresh_from_db()
+        self.assertEqual((answer.is_correct, answer.points_earned), (True, Decimal('2.00')))
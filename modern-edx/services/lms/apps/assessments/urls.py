@@ -3,6 +3,7 @@ URL configuration for assessments app.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import views
 
 app_name = 'assessments'
 
@@ -11,5 +12,6 @@ router = DefaultRouter()
 
 urlpatterns = [
     # API views
+    path('api/courses/<str:course_id>/regrade/', views.course_regrade, name='course_regrade'),
     path('api/', include(router.urls)),
 ]
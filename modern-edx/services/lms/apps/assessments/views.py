@@ -0,0 +1,26 @@
+"""
+Assessment views for Modern edX LMS.
+"""
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from apps.courses.models import Course
+from .grading import regrade_course
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def course_regrade(request, course_id):
+    """Regrade every learner of a course and report throughput."""
+    course = get_object_or_404(Course, course_id=course_id)
+    result = regrade_course(course)
+    return Response({
+        'course_id': result.course_id,
+        'learners': result.learners,
+        'created': result.created,
+        'updated': result.updated,
+        'elapsed_seconds': round(result.elapsed_seconds, 3),
+        'learners_per_second': round(result.learners_per_second, 1),
+    })
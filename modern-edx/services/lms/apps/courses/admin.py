@@ -4,6 +4,7 @@ from .models import (
     CourseEnrollment, StudentModule, PersistentSubsectionGrade,
     GeneratedCertificate
 )
+from .search import get_search_backend
 
 @admin.register(CourseMode)
 class CourseModeAdmin(admin.ModelAdmin):
@@ -16,9 +17,16 @@ class CourseModeAdmin(admin.ModelAdmin):
 class CourseAdmin(admin.ModelAdmin):
     list_display = ['display_name', 'course_id', 'org', 'start', 'end', 'pacing']
     list_filter = ['org', 'pacing', 'catalog_visibility', 'level_type']
-    search_fields = ['display_name', 'course_id', 'org']
+    search_fields = ['=course_id', '^org']
     readonly_fields = ['created', 'modified', 'version']
     date_hierarchy = 'start'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Exact/prefix id matches plus full-text matches on the course text."""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= get_search_backend().filter_queryset(queryset, search_term)
+        return results, may_have_duplicates
     
     fieldsets = (
         ('Course Identity', {
@@ -43,6 +51,7 @@ class CourseAdmin(admin.ModelAdmin):
 class ChapterAdmin(admin.ModelAdmin):
     list_display = ['display_name', 'course', 'order', 'graded', 'visible_to_staff_only']
     list_filter = ['graded', 'visible_to_staff_only', 'course']
+    list_select_related = ['course']
     search_fields = ['display_name', 'course__display_name']
     readonly_fields = ['location']
 
@@ -50,6 +59,7 @@ class ChapterAdmin(admin.ModelAdmin):
 class SequentialAdmin(admin.ModelAdmin):
     list_display = ['display_name', 'chapter', 'order', 'graded', 'visible_to_staff_only']
     list_filter = ['graded', 'visible_to_staff_only', 'chapter__course']
+    list_select_related = ['chapter__course']
     search_fields = ['display_name', 'chapter__display_name']
     readonly_fields = ['location']
 
@@ -57,6 +67,7 @@ class SequentialAdmin(admin.ModelAdmin):
 class VerticalAdmin(admin.ModelAdmin):
     list_display = ['display_name', 'sequential', 'order', 'visible_to_staff_only']
     list_filter = ['visible_to_staff_only', 'sequential__chapter__course']
+    list_select_related = ['sequential__chapter']
     search_fields = ['display_name', 'sequential__display_name']
     readonly_fields = ['location']
 
@@ -64,6 +75,7 @@ class VerticalAdmin(admin.ModelAdmin):
 class XBlockAdmin(admin.ModelAdmin):
     list_display = ['display_name', 'category', 'vertical', 'order', 'visible_to_staff_only']
     list_filter = ['category', 'visible_to_staff_only', 'vertical__sequential__chapter__course']
+    list_select_related = ['vertical__sequential']
     search_fields = ['display_name', 'vertical__display_name']
     readonly_fields = ['location']
 
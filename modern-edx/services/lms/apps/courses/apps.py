@@ -4,3 +4,6 @@ class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.courses'
     verbose_name = 'Courses'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,342 @@
+"""
+Bulk enrollment of cohorts into a course.
+
+Identifiers (usernames, emails or ``id:<pk>``, optionally with a mode slug
+per row) are processed in batches: users, modes and existing enrollments
+are each resolved with one query per batch, new enrollments are inserted
+with one ``bulk_create`` and inactive ones are reactivated with a single
+``UPDATE``. Neither fires ``post_save``, so each batch sends
+``enrollments_bulk_changed`` for the learners it touched.
+``bulk_enroll`` yields one progress event per batch so callers can
+stream results while the import runs.
+"""
+import csv
+import io
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from lms.metrics import ENROLLMENTS, inc_on_commit
+
+from .models import CourseEnrollment, CourseEnrollmentCount, CourseMode
+from .signals import enrollments_bulk_changed
+
+User = get_user_model()
+
+IDENTIFIER_COLUMNS = ('user', 'user_id', 'username', 'email', 'identifier')
+# Values of these columns are primary keys rather than usernames.
+ID_COLUMNS = ('user_id',)
+ID_PREFIX = 'id:'
+
+ENROLLED = 'enrolled'
+REACTIVATED = 'reactivated'
+ALREADY_ENROLLED = 'already_enrolled'
+USER_NOT_FOUND = 'user_not_found'
+INVALID_MODE = 'invalid_mode'
+DUPLICATE = 'duplicate'
+
+
+class BulkEnrollmentError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class EnrollmentRequest:
+    identifier: str
+    mode: Optional[str] = None
+
+
+@dataclass
+class RowResult:
+    row: int
+    identifier: str
+    status: str
+    user_id: Optional[int] = None
+    mode: Optional[str] = None
+
+
+@dataclass
+class BatchProgress:
+    processed: int
+    total: int
+    results: List[RowResult]
+
+    def to_dict(self):
+        return {
+            'type': 'progress',
+            'processed': self.processed,
+            'total': self.total,
+            'results': [asdict(result) for result in self.results],
+        }
+
+
+def parse_csv(text) -> List[EnrollmentRequest]:
+    """
+    Rows of a CSV upload. A header naming one of ``IDENTIFIER_COLUMNS`` (and
+    optionally ``mode``) is honoured; otherwise the first column is used.
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    name = next((name for name in IDENTIFIER_COLUMNS if name in header), None)
+    mode_column = header.index('mode') if 'mode' in header else None
+    if name is None:
+        column = 0
+    else:
+        column = header.index(name)
+        rows = rows[1:]
+
+    requests = []
+    for row in rows:
+        mode = None
+        if mode_column is not None and mode_column < len(row):
+            mode = row[mode_column].strip() or None
+        identifier = row[column].strip() if column < len(row) else ''
+        requests.append(EnrollmentRequest(_qualify(name, identifier), mode))
+    return requests
+
+
+def _qualify(column, identifier):
+    if column in ID_COLUMNS and identifier and not identifier.startswith(ID_PREFIX):
+        return f'{ID_PREFIX}{identifier}'
+    return identifier
+
+
+def parse_json(data) -> List[EnrollmentRequest]:
+    """
+    Accept ``[id-or-name, ...]``, ``[{"user": ..., "mode": ...}, ...]`` or an
+    object with a ``users`` list in either form.
+    """
+    if isinstance(data, (str, bytes)):
+        try:
+            data = json.loads(data)
+        except ValueError as exc:
+            raise BulkEnrollmentError(f'Invalid JSON: {exc}')
+    if isinstance(data, dict):
+        data = data.get('users')
+    if not isinstance(data, list):
+        raise BulkEnrollmentError('Expected a list of users.')
+
+    requests = []
+    for entry in data:
+        if isinstance(entry, dict):
+            name = next((name for name in IDENTIFIER_COLUMNS if name in entry), None)
+            identifier = str(entry[name]).strip() if name else ''
+            requests.append(EnrollmentRequest(_qualify(name, identifier), entry.get('mode') or None))
+        elif isinstance(entry, int) and not isinstance(entry, bool):
+            requests.append(EnrollmentRequest(f'{ID_PREFIX}{entry}'))
+        else:
+            requests.append(EnrollmentRequest(str(entry).strip()))
+    return requests
+
+
+def _resolve_users(identifiers):
+    """
+    Map each identifier to a user id with at most three queries.
+
+    ``id:<pk>`` is always a primary key. A bare number is a username first
+    (numeric usernames are valid) and only falls back to a primary key when
+    no such username exists.
+    """
+    ids, emails, usernames = set(), set(), set()
+    for identifier in identifiers:
+        if identifier.startswith(ID_PREFIX):
+            if identifier[len(ID_PREFIX):].isdigit():
+                ids.add(int(identifier[len(ID_PREFIX):]))
+        elif '@' in identifier:
+            emails.add(identifier.lower())
+        elif identifier:
+            usernames.add(identifier)
+
+    resolved = {}
+    if usernames:
+        for pk, username in User.objects.filter(username__in=usernames).values_list('pk', 'username'):
+            resolved[username] = pk
+    # Numbers that aren't usernames are looked up as pks along with the id: rows.
+    numeric = {int(name) for name in usernames if name.isdigit() and name not in resolved}
+    if ids or numeric:
+        for pk in User.objects.filter(pk__in=ids | numeric).values_list('pk', flat=True):
+            if pk in ids:
+                resolved[f'{ID_PREFIX}{pk}'] = pk
+            if pk in numeric:
+                resolved[str(pk)] = pk
+    if emails:
+        # Emails are matched case-insensitively; the first account wins.
+        for pk, email in (
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=emails).order_by('pk').values_list('pk', 'email_lower')
+        ):
+            resolved.setdefault(email, pk)
+    return resolved
+
+
+def _resolve_modes(course, slugs):
+    modes = {}
+    for mode in CourseMode.objects.filter(
+        course_id=course.course_id, mode_slug__in=slugs
+    ).order_by('pk'):
+        modes.setdefault(mode.mode_slug, mode)
+    return modes
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def bulk_enroll(course, requests: Iterable[EnrollmentRequest], mode='audit',
+                batch_size=1000) -> Iterator[BatchProgress]:
+    """
+    Enroll ``requests`` into ``course``; iterate the result to run the
+    batches, one ``BatchProgress`` each.
+
+    Rows without a mode use ``mode``. Raises ``BulkEnrollmentError``
+    immediately (before any batch runs) if that mode does not exist for
+    the course.
+    """
+    requests = list(requests)
+    slugs = {request.mode or mode for request in requests} | {mode}
+    modes = _resolve_modes(course, slugs)
+    if mode not in modes:
+        raise BulkEnrollmentError(f'Mode "{mode}" is not available for {course.course_id}.')
+    return _run_batches(course, requests, mode, modes, batch_size)
+
+
+def _run_batches(course, requests, mode, modes, batch_size):
+    seen = set()
+    processed = 0
+    for offset, batch in _batches(requests, batch_size):
+        results = _enroll_batch(course, batch, offset, mode, modes, seen)
+        processed += len(batch)
+        yield BatchProgress(processed=processed, total=len(requests), results=results)
+
+
+def _enroll_batch(course, batch, offset, default_mode, modes, seen):
+    users = _resolve_users(request.identifier for request in batch)
+    results, wanted = [], {}
+    for index, request in enumerate(batch, start=offset + 1):
+        identifier = request.identifier
+        key = identifier.lower() if '@' in identifier else identifier
+        slug = request.mode or default_mode
+        user_id = users.get(key)
+        if user_id is None:
+            results.append(RowResult(index, identifier, USER_NOT_FOUND))
+        elif slug not in modes:
+            results.append(RowResult(index, identifier, INVALID_MODE, user_id, slug))
+        elif user_id in seen:
+            results.append(RowResult(index, identifier, DUPLICATE, user_id, slug))
+        else:
+            seen.add(user_id)
+            result = RowResult(index, identifier, ENROLLED, user_id, slug)
+            wanted[user_id] = (modes[slug], result)
+            results.append(result)
+
+    if not wanted:
+        return results
+
+    with transaction.atomic():
+        existing = dict(
+            CourseEnrollment.objects.select_for_update()
+            .filter(course=course, user_id__in=list(wanted))
+            .values_list('user_id', 'is_active')
+        )
+        reactivate = [user_id for user_id, is_active in existing.items() if not is_active]
+        new = []
+        for user_id, (course_mode, result) in wanted.items():
+            if user_id not in existing:
+                new.append(CourseEnrollment(user_id=user_id, course=course, mode=course_mode))
+            elif user_id in reactivate:
+                result.status = REACTIVATED
+            else:
+                result.status = ALREADY_ENROLLED
+
+        # Reactivated rows keep their current mode; move them between counters.
+        moved = {}
+        if reactivate:
+            for mode_id in CourseEnrollment.objects.filter(
+                course=course, user_id__in=reactivate
+            ).values_list('mode_id', flat=True):
+                moved[mode_id] = moved.get(mode_id, 0) + 1
+            CourseEnrollment.objects.filter(course=course, user_id__in=reactivate).update(
+                is_active=True, modified=timezone.now()
+            )
+
+        new = _insert_enrollments(new, wanted)
+
+        created = {}
+        for enrollment in new:
+            created[enrollment.mode_id] = created.get(enrollment.mode_id, 0) + 1
+        for mode_id, count in created.items():
+            CourseEnrollmentCount.adjust(course.pk, mode_id, True, count)
+        for mode_id, count in moved.items():
+            CourseEnrollmentCount.adjust(course.pk, mode_id, False, -count)
+            CourseEnrollmentCount.adjust(course.pk, mode_id, True, count)
+    inc_on_commit(ENROLLMENTS, len(new) + len(reactivate))
+    changed = [enrollment.user_id for enrollment in new] + reactivate
+    if changed:
+        enrollments_bulk_changed.send(sender=CourseEnrollment, course_pk=course.pk, user_ids=changed)
+    return results
+
+
+def _insert_enrollments(enrollments, wanted):
+    """
+    Insert ``enrollments`` and return those actually created. If a
+    concurrent request enrolled one of the users since the batch was read,
+    the rows are retried one by one and the losers are reported as already
+    enrolled, so neither the results nor the counters count them twice.
+    """
+    try:
+        with transaction.atomic():
+            CourseEnrollment.objects.bulk_create(enrollments)
+        return enrollments
+    except IntegrityError:
+        pass
+    created = []
+    for enrollment in enrollments:
+        try:
+            with transaction.atomic():
+                enrollment.pk = None
+                CourseEnrollment.objects.bulk_create([enrollment])
+            created.append(enrollment)
+        except IntegrityError:
+            wanted[enrollment.user_id][1].status = ALREADY_ENROLLED
+    return created
+
+
+def summarize(results: Iterable[RowResult], elapsed_seconds):
+    counts = {}
+    total = 0
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+        total += 1
+    return {
+        'type': 'summary',
+        'total': total,
+        'counts': counts,
+        'elapsed_seconds': round(elapsed_seconds, 3),
+        'rows_per_second': round(total / elapsed_seconds, 1) if elapsed_seconds else float(total),
+    }
+
+
+def stream_bulk_enroll(course, requests, mode='audit', batch_size=1000):
+    """
+    NDJSON lines: one ``progress`` object per batch, then a ``summary``.
+    Validation errors are raised here, before the first line is produced.
+    """
+    return _stream(bulk_enroll(course, requests, mode=mode, batch_size=batch_size))
+
+
+def _stream(events):
+    started = time.monotonic()
+    results = []
+    for progress in events:
+        results.extend(progress.results)
+        yield json.dumps(progress.to_dict()) + '\n'
+    yield json.dumps(summarize(results, time.monotonic() - started)) + '\n'
@@ -0,0 +1,161 @@
+"""
+Course catalog queries for Modern edX LMS.
+
+Catalog pages are keyset-paginated over ``(-created, id)``: the cursor
+carries the last row's ``created``/``id`` pair, so fetching any page is a
+single index range scan no matter how deep the learner has scrolled.
+Rendered pages are cached per filter combination under a catalog
+generation token that is bumped whenever a course changes, and totals come
+from the ``CatalogCount`` buckets maintained in ``apps.courses.signals``
+rather than ``COUNT(*)``.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils.dateparse import parse_datetime
+
+from .enrollment_counts import enrollment_counts
+from .models import CatalogCount, Course
+
+CATALOG_FILTERS = ('org', 'pacing', 'level_type', 'catalog_visibility')
+CATALOG_FIELDS = (
+    'id', 'course_id', 'display_name', 'short_description', 'course_image_url',
+    'org', 'start', 'end', 'pacing', 'level_type', 'created',
+)
+GENERATION_KEY = 'course_catalog_generation'
+# Courses listed in the catalog and search; 'none' ones are only reachable by URL.
+DISCOVERABLE_VISIBILITIES = ('both', 'about')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_filters(params):
+    """Pick the supported, non-empty catalog filters out of query params."""
+    return {name: params[name] for name in CATALOG_FILTERS if params.get(name)}
+
+
+def discoverable(filters):
+    """``filters`` limited to discoverable courses unless they pick a visibility."""
+    if 'catalog_visibility' in filters:
+        return dict(filters)
+    return dict(filters, catalog_visibility__in=DISCOVERABLE_VISIBILITIES)
+
+
+def encode_cursor(created, pk):
+    payload = json.dumps([created.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if created is None:
+        raise InvalidCursor(cursor)
+    return created, pk
+
+
+def catalog_queryset(filters):
+    return Course.objects.filter(**filters).order_by('-created', 'id')
+
+
+def catalog_generation():
+    """Token that changes whenever any course changes (None without a shared cache)."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_catalog_generation():
+    """Invalidate every cached catalog page and count."""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _cache_key(kind, generation, *parts):
+    digest = hashlib.md5(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return f"course_catalog:{kind}:{generation}:{digest}"
+
+
+def catalog_count(filters):
+    """Total number of courses matching ``filters``, read from ``CatalogCount``."""
+    generation = catalog_generation()
+    key = _cache_key('count', generation, filters)
+    total = cache.get(key) if generation is not None else None
+    if total is None:
+        total = CatalogCount.objects.filter(**filters).aggregate(total=Sum('count'))['total'] or 0
+        if generation is not None:
+            cache.set(key, total, getattr(settings, 'COURSE_CATALOG_CACHE_TIMEOUT', 300))
+    return total
+
+
+def get_catalog_page(filters, cursor=None, page_size=20):
+    """
+    Return ``{'count', 'next_cursor', 'results'}`` for one catalog page.
+
+    Only discoverable courses are listed (and counted) unless ``filters``
+    pick a visibility. ``results`` are plain ``CATALOG_FIELDS`` dicts plus
+    ``enrollment_count`` (which may lag by up to the cache timeout).
+    Raises ``InvalidCursor`` for cursors that cannot be decoded.
+    """
+    filters = discoverable(filters)
+    generation = catalog_generation()
+    key = _cache_key('page', generation, filters, cursor, page_size)
+    if generation is not None:
+        page = cache.get(key)
+        if page is not None:
+            return page
+
+    queryset = catalog_queryset(filters)
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created__lt=created) | Q(created=created, id__gt=pk))
+    rows = list(queryset.values(*CATALOG_FIELDS)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]['created'], rows[-1]['id'])
+    if rows:
+        counts = enrollment_counts([row['id'] for row in rows])
+        for row in rows:
+            row['enrollment_count'] = counts[row['id']]
+
+    page = {'count': catalog_count(filters), 'next_cursor': next_cursor, 'results': rows}
+    if generation is not None:
+        cache.set(key, page, getattr(settings, 'COURSE_CATALOG_CACHE_TIMEOUT', 300))
+    return page
+
+
+def catalog_bucket(course):
+    return {name: getattr(course, name) for name in CATALOG_FILTERS}
+
+
+def adjust_catalog_count(bucket, delta):
+    """Add ``delta`` to the counter of one filter bucket."""
+    with transaction.atomic():
+        counter, _ = CatalogCount.objects.get_or_create(**bucket)
+        CatalogCount.objects.filter(pk=counter.pk).update(count=F('count') + delta)
+
+
+def rebuild_catalog_counts():
+    """Recount every bucket from ``Course``; returns the number of buckets."""
+    rows = list(Course.objects.values(*CATALOG_FILTERS).annotate(count=Count('id')).order_by())
+    with transaction.atomic():
+        CatalogCount.objects.all().delete()
+        CatalogCount.objects.bulk_create([CatalogCount(**row) for row in rows])
+    bump_catalog_generation()
+    return len(rows)
@@ -0,0 +1,43 @@
+"""
+Certificate artifact rendering.
+
+Renderers are plain functions of a payload dict with no Django or
+database access, so ``apps.courses.certificates`` can fan them out to a
+``ProcessPoolExecutor`` and store the returned bytes itself.
+"""
+from xml.sax.saxutils import escape
+
+CONTENT_TYPE = 'image/svg+xml'
+EXTENSION = 'svg'
+
+_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="1100" height="850" viewBox="0 0 1100 850">
+  <rect x="0" y="0" width="1100" height="850" fill="#ffffff"/>
+  <rect x="30" y="30" width="1040" height="790" fill="none" stroke="#1f4e79" stroke-width="6"/>
+  <text x="550" y="170" text-anchor="middle" font-family="Georgia, serif" font-size="54" fill="#1f4e79">Certificate of Achievement</text>
+  <text x="550" y="260" text-anchor="middle" font-family="Georgia, serif" font-size="24" fill="#333333">This certifies that</text>
+  <text x="550" y="345" text-anchor="middle" font-family="Georgia, serif" font-size="48" fill="#000000">{name}</text>
+  <text x="550" y="420" text-anchor="middle" font-family="Georgia, serif" font-size="24" fill="#333333">has successfully completed</text>
+  <text x="550" y="490" text-anchor="middle" font-family="Georgia, serif" font-size="36" fill="#000000">{course_name}</text>
+  <text x="550" y="545" text-anchor="middle" font-family="Georgia, serif" font-size="20" fill="#555555">{org} &#183; {mode_display}</text>
+  <text x="550" y="640" text-anchor="middle" font-family="Georgia, serif" font-size="20" fill="#333333">Issued {issued}</text>
+  <text x="550" y="770" text-anchor="middle" font-family="monospace" font-size="14" fill="#777777">Verify at {verify_url}</text>
+</svg>
+"""
+
+
+def render_certificate(payload):
+    """
+    Render one certificate. Returns ``(certificate_id, content, error)``;
+    ``content`` is ``None`` and ``error`` set when rendering failed, so one
+    bad row never fails the batch it travels in.
+    """
+    try:
+        fields = {
+            name: escape(str(payload[name]))
+            for name in ('name', 'course_name', 'org', 'issued', 'verify_url')
+        }
+        fields['mode_display'] = escape(str(payload['mode']).replace('-', ' ').title())
+        return payload['id'], _TEMPLATE.format(**fields).encode('utf-8'), ''
+    except Exception as exc:
+        return payload.get('id'), None, f'{type(exc).__name__}: {exc}'[:512]
@@ -0,0 +1,299 @@
+"""
+Batch certificate generation for Modern edX LMS.
+
+A run has two stages:
+
+1. Selection: every active enrollment of the course is graded in bulk
+   (``GradeBook.current_grade``, falling back to the learner's
+   ``PersistentSubsectionGrade`` totals) and certificate rows are created
+   or updated in batches. Passing learners in certificate-bearing modes
+   go to ``generating`` (``regenerating`` when an issued certificate's
+   grade changed); the rest to ``notpassing`` or ``auditing``.
+2. Rendering: rows in ``generating``/``regenerating`` are rendered across
+   a process pool (see ``apps.courses.certificate_render``), stored, and
+   marked ``downloadable`` (or ``error``).
+
+Both stages are driven by certificate status, so an interrupted run is
+resumed by running it again; ``render_only`` skips straight to stage 2.
+"""
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.assessments.models import GradeBook
+
+from .certificate_render import EXTENSION, render_certificate
+from .models import CourseEnrollment, GeneratedCertificate, PersistentSubsectionGrade
+from .verification import invalidate_certificate_verification
+
+GENERATING = 'generating'
+REGENERATING = 'regenerating'
+DOWNLOADABLE = 'downloadable'
+NOT_PASSING = 'notpassing'
+AUDITING = 'auditing'
+ERROR = 'error'
+
+PENDING_STATUSES = (GENERATING, REGENERATING)
+# Set by staff; a run never changes these.
+LOCKED_STATUSES = ('deleted', 'restricted', 'unavailable')
+NON_CERTIFICATE_MODES = ('audit',)
+UPDATE_FIELDS = ('status', 'grade', 'mode', 'name', 'download_uuid', 'error_reason', 'modified_date')
+
+
+@dataclass
+class CertificateRunResult:
+    course_id: str
+    selected: int = 0
+    created: int = 0
+    updated: int = 0
+    rendered: int = 0
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def certificates_per_second(self):
+        processed = self.selected or self.rendered
+        if not self.elapsed_seconds:
+            return float(processed)
+        return processed / self.elapsed_seconds
+
+
+def format_grade(percent):
+    """Certificate grades are stored as a fraction, e.g. ``'0.87'``."""
+    return f'{min(max(percent, 0.0), 100.0) / 100.0:.2f}'
+
+
+def course_percentages(course):
+    """
+    Percentage grade of every learner with grades in ``course``:
+    ``GradeBook`` where present, otherwise graded subsection totals.
+    """
+    percentages = {
+        user_id: float(earned / possible * 100)
+        for user_id, earned, possible in PersistentSubsectionGrade.objects.filter(course=course)
+        .values('user_id')
+        .annotate(earned=Sum('earned_graded'), possible=Sum('possible_graded'))
+        .order_by()
+        .values_list('user_id', 'earned', 'possible')
+        if possible
+    }
+    percentages.update(
+        (user_id, float(grade))
+        for user_id, grade in GradeBook.objects.filter(course=course).values_list('student_id', 'current_grade')
+    )
+    return percentages
+
+
+def _target_status(percent, mode_slug):
+    if mode_slug in NON_CERTIFICATE_MODES:
+        return AUDITING
+    passing = Decimal(str(getattr(settings, 'CERTIFICATE_PASSING_GRADE', 60)))
+    return GENERATING if Decimal(str(percent)) >= passing else NOT_PASSING
+
+
+def _display_name(row):
+    full_name = f"{row['user__first_name']} {row['user__last_name']}".strip()
+    return (full_name or row['user__username'])[:255]
+
+
+def _insert_certificates(certificates):
+    """
+    Insert ``certificates``, skipping learners that got a row from a
+    concurrent run meanwhile. Returns the certificates actually inserted.
+    """
+    if not certificates:
+        return []
+    GeneratedCertificate.objects.bulk_create(certificates, ignore_conflicts=True)
+    inserted = set(GeneratedCertificate.objects.filter(
+        verify_uuid__in=[certificate.verify_uuid for certificate in certificates]
+    ).values_list('verify_uuid', flat=True))
+    return [certificate for certificate in certificates if certificate.verify_uuid in inserted]
+
+
+def _select_batch(course, rows, percentages, now, result):
+    existing = {
+        certificate.user_id: certificate
+        for certificate in GeneratedCertificate.objects.filter(
+            course=course, user_id__in=[row['user_id'] for row in rows]
+        )
+    }
+    to_create, to_update = [], []
+    for row in rows:
+        percent = percentages.get(row['user_id'], 0.0)
+        grade = format_grade(percent)
+        mode = row['mode__mode_slug']
+        status = _target_status(percent, mode)
+        certificate = existing.get(row['user_id'])
+
+        if certificate is None:
+            to_create.append(GeneratedCertificate(
+                user_id=row['user_id'], course=course, status=status, grade=grade,
+                mode=mode, name=_display_name(row),
+            ))
+            continue
+        if certificate.status in LOCKED_STATUSES:
+            continue
+        if certificate.status == DOWNLOADABLE:
+            # Issued certificates are never revoked here; only re-issued on regrade.
+            if status != GENERATING or certificate.grade == grade:
+                continue
+            status = REGENERATING
+            certificate.download_uuid = uuid.uuid4()
+        elif certificate.status == REGENERATING and status == GENERATING:
+            status = REGENERATING
+        if (certificate.status, certificate.grade, certificate.mode) == (status, grade, mode):
+            continue
+        certificate.status = status
+        certificate.grade = grade
+        certificate.mode = mode
+        certificate.name = certificate.name or _display_name(row)
+        certificate.error_reason = ''
+        certificate.modified_date = now
+        to_update.append(certificate)
+
+    with transaction.atomic():
+        to_create = _insert_certificates(to_create)
+        GeneratedCertificate.objects.bulk_update(to_update, UPDATE_FIELDS)
+    invalidate_certificate_verification(*(certificate.verify_uuid for certificate in (*to_create, *to_update)))
+    result.created += len(to_create)
+    result.updated += len(to_update)
+    for certificate in (*to_create, *to_update):
+        result.statuses[certificate.status] = result.statuses.get(certificate.status, 0) + 1
+
+
+def select_certificates(course, result, batch_size=1000):
+    """Stage 1: create or update certificate rows for every active enrollment."""
+    percentages = course_percentages(course)
+    enrollments = (
+        CourseEnrollment.objects.filter(course=course, is_active=True)
+        .order_by('user_id')
+        .values('user_id', 'mode__mode_slug', 'user__username', 'user__first_name', 'user__last_name')
+    )
+    now = timezone.now()
+    batch = []
+    for row in enrollments.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _select_batch(course, batch, percentages, now, result)
+            result.selected += len(batch)
+            batch = []
+    if batch:
+        _select_batch(course, batch, percentages, now, result)
+        result.selected += len(batch)
+
+
+def _payload(certificate, course, issued):
+    verify_format = getattr(settings, 'CERTIFICATE_VERIFY_URL_FORMAT', '/courses/certificates/verify/{uuid}/')
+    return {
+        'id': certificate.pk,
+        'name': certificate.name,
+        'course_name': course.display_name,
+        'org': course.org,
+        'mode': certificate.mode,
+        'issued': issued,
+        'verify_url': verify_format.format(uuid=certificate.verify_uuid),
+    }
+
+
+def _pending_batches(course, batch_size):
+    last_pk = 0
+    while True:
+        batch = list(
+            GeneratedCertificate.objects.filter(course=course, status__in=PENDING_STATUSES, pk__gt=last_pk)
+            .order_by('pk')[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def render_certificates(course, result, batch_size=1000, workers=None, retry_errors=False):
+    """
+    Stage 2: render every pending certificate of ``course``.
+
+    ``workers=0`` renders in this process; otherwise a pool of ``workers``
+    processes (``CERTIFICATE_RENDER_WORKERS`` by default) is used.
+    """
+    if retry_errors:
+        failed = GeneratedCertificate.objects.filter(course=course, status=ERROR)
+        verify_uuids = list(failed.values_list('verify_uuid', flat=True))
+        failed.update(status=GENERATING, error_reason='', modified_date=timezone.now())
+        invalidate_certificate_verification(*verify_uuids)
+    if workers is None:
+        workers = getattr(settings, 'CERTIFICATE_RENDER_WORKERS', 4)
+
+    pool = None
+    if workers:
+        # Forked workers must not inherit open database connections.
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+        pool = ProcessPoolExecutor(max_workers=workers)
+    issued = timezone.now().strftime('%B %d, %Y')
+    try:
+        for batch in _pending_batches(course, batch_size):
+            payloads = [_payload(certificate, course, issued) for certificate in batch]
+            if pool is None:
+                rendered = map(render_certificate, payloads)
+            else:
+                rendered = pool.map(render_certificate, payloads, chunksize=max(1, len(payloads) // (workers * 4)))
+            _store_batch(batch, rendered, result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _store_batch(batch, rendered, result):
+    by_pk = {certificate.pk: certificate for certificate in batch}
+    max_url_length = GeneratedCertificate._meta.get_field('download_url').max_length
+    now = timezone.now()
+    for pk, content, error in rendered:
+        certificate = by_pk[pk]
+        certificate.modified_date = now
+        if content is not None:
+            path = default_storage.save(
+                f'certificates/{certificate.download_uuid}.{EXTENSION}', ContentFile(content)
+            )
+            url = default_storage.url(path)
+            if len(url) > max_url_length:
+                # A truncated URL would be a broken link; fail the row instead.
+                default_storage.delete(path)
+                content, error = None, f'Download URL longer than {max_url_length} characters: {url[:256]}'
+        if content is None:
+            certificate.status = ERROR
+            certificate.error_reason = error
+            result.errors += 1
+            continue
+        certificate.download_url = url
+        certificate.status = DOWNLOADABLE
+        certificate.error_reason = ''
+        result.rendered += 1
+    GeneratedCertificate.objects.bulk_update(
+        batch, ['status', 'download_url', 'error_reason', 'modified_date']
+    )
+    invalidate_certificate_verification(*(certificate.verify_uuid for certificate in batch))
+
+
+def generate_certificates(course, batch_size=None, workers=None, render_only=False,
+                          retry_errors=False) -> CertificateRunResult:
+    """Run (or resume) certificate generation for ``course``."""
+    started = time.monotonic()
+    batch_size = batch_size or getattr(settings, 'CERTIFICATE_BATCH_SIZE', 1000)
+    result = CertificateRunResult(course_id=course.course_id)
+    if not render_only:
+        select_certificates(course, result, batch_size=batch_size)
+    render_certificates(course, result, batch_size=batch_size, workers=workers, retry_errors=retry_errors)
+    result.elapsed_seconds = time.monotonic() - started
+    return result
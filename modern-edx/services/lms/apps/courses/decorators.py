@@ -0,0 +1,22 @@
+"""
+View decorators for Modern edX LMS.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def async_login_required(view):
+    """
+    ``login_required`` for ``async def`` views; Django 4.2's decorator only
+    wraps sync views. The lazy ``request.user`` is resolved off the event
+    loop, so the view can read it afterwards.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
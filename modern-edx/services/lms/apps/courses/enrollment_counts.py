@@ -0,0 +1,105 @@
+"""
+Enrollment totals read from ``CourseEnrollmentCount`` shards.
+
+Every read is a sum over at most ``modes x 2 x ENROLLMENT_COUNTER_SHARDS``
+rows of the counter table instead of a ``COUNT(*)`` over enrollments.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import CourseEnrollment, CourseEnrollmentCount
+
+
+@dataclass
+class ReconcileResult:
+    courses: int
+    repaired: int
+
+
+def enrollment_count(course_id, mode_id=None, is_active=True):
+    """Number of enrollments in a course (``course_id`` is the pk)."""
+    counters = CourseEnrollmentCount.objects.filter(course_id=course_id)
+    if mode_id is not None:
+        counters = counters.filter(mode_id=mode_id)
+    if is_active is not None:
+        counters = counters.filter(is_active=is_active)
+    return counters.aggregate(total=Sum('count'))['total'] or 0
+
+
+def enrollment_counts(course_ids, is_active=True):
+    """``{course_pk: count}`` for many courses in one query."""
+    counters = CourseEnrollmentCount.objects.filter(course_id__in=list(course_ids))
+    if is_active is not None:
+        counters = counters.filter(is_active=is_active)
+    totals = dict.fromkeys(course_ids, 0)
+    totals.update(
+        counters.values('course_id').annotate(total=Sum('count')).values_list('course_id', 'total')
+    )
+    return totals
+
+
+def enrollment_counts_by_mode(course_id, is_active=True):
+    """``{mode_slug: count}`` for one course."""
+    counters = CourseEnrollmentCount.objects.filter(course_id=course_id)
+    if is_active is not None:
+        counters = counters.filter(is_active=is_active)
+    return dict(
+        counters.values('mode__mode_slug').annotate(total=Sum('count'))
+        .values_list('mode__mode_slug', 'total')
+    )
+
+
+def reconcile_course(course_id):
+    """
+    Recount one course's enrollments and rewrite drifted counters.
+
+    The counter rows are locked first, so enrollments committing meanwhile
+    wait and apply their delta on top of the corrected value.
+    Returns the number of (mode, is_active) counters that were repaired.
+    """
+    with transaction.atomic():
+        counted = {}
+        for mode_id, is_active, count in (
+            CourseEnrollmentCount.objects.select_for_update()
+            .filter(course_id=course_id)
+            .values_list('mode_id', 'is_active', 'count')
+        ):
+            counted[(mode_id, is_active)] = counted.get((mode_id, is_active), 0) + count
+        actual = {
+            (mode_id, is_active): count
+            for mode_id, is_active, count in (
+                CourseEnrollment.objects.filter(course_id=course_id)
+                .values('mode_id', 'is_active').annotate(count=Count('id'))
+                .values_list('mode_id', 'is_active', 'count')
+            )
+        }
+
+        drifted = [
+            key for key in set(counted) | set(actual)
+            if counted.get(key, 0) != actual.get(key, 0)
+        ]
+        for mode_id, is_active in drifted:
+            CourseEnrollmentCount.objects.filter(
+                course_id=course_id, mode_id=mode_id, is_active=is_active
+            ).delete()
+            if actual.get((mode_id, is_active)):
+                CourseEnrollmentCount.objects.create(
+                    course_id=course_id, mode_id=mode_id, is_active=is_active,
+                    shard=0, count=actual[(mode_id, is_active)],
+                )
+    return len(drifted)
+
+
+def reconcile_enrollment_counts(course_ids=None):
+    """Repair counters for ``course_ids`` (every course with enrollments or counters by default)."""
+    if course_ids is None:
+        course_ids = set(
+            CourseEnrollment.objects.values_list('course_id', flat=True).distinct()
+        ) | set(
+            CourseEnrollmentCount.objects.values_list('course_id', flat=True).distinct()
+        )
+    course_ids = sorted(course_ids)
+    repaired = sum(reconcile_course(course_id) for course_id in course_ids)
+    return ReconcileResult(courses=len(course_ids), repaired=repaired)
@@ -0,0 +1,136 @@
+"""
+Incremental subsection grading for Modern edX LMS.
+
+A changed StudentModule only affects the subsection (sequential) that
+contains it, so grades are recomputed per (user, course, subsection) using
+the course structure's block -> subsection map instead of regrading the
+whole course. A stored ``PersistentSubsectionGrade`` whose
+``course_version`` matches the current structure and whose
+``subtree_edited_timestamp`` is not older than the change is left alone.
+"""
+from django.utils import timezone
+
+from .models import PersistentSubsectionGrade, StudentModule
+from .structure import get_course_structure
+
+CONTAINER_TYPES = ('chapter', 'sequential', 'vertical')
+SCORABLE_CATEGORIES = ('problem', 'openassessment', 'lti')
+
+
+def scorable_blocks(structure, usage_key):
+    """Blocks under a subsection that contribute to its score."""
+    for location in structure.descendants_of(usage_key):
+        block = structure.get_block(location)
+        if block.block_type in CONTAINER_TYPES:
+            continue
+        if block.block_type in SCORABLE_CATEGORIES or block.weight is not None:
+            yield block
+
+
+def block_score(block, row):
+    """Return (earned, possible) for a block, honouring the block's weight."""
+    grade = row.get('grade') if row else None
+    max_grade = row.get('max_grade') if row else None
+    if block.weight is not None:
+        if grade is not None and max_grade:
+            return grade / max_grade * block.weight, block.weight
+        return 0.0, block.weight
+    return grade or 0.0, max_grade or 0.0
+
+
+def compute_subsection_grade(user_id, structure, usage_key):
+    """Compute, without saving, the grade fields for one subsection."""
+    blocks = list(scorable_blocks(structure, usage_key))
+    rows = {
+        row['module_id']: row
+        for row in StudentModule.objects.filter(
+            student_id=user_id,
+            course_id=structure.course_pk,
+            module_id__in=[block.location for block in blocks],
+        ).values('module_id', 'grade', 'max_grade', 'modified')
+    }
+
+    earned_all = possible_all = 0.0
+    for block in blocks:
+        earned, possible = block_score(block, rows.get(block.location))
+        earned_all += earned
+        possible_all += possible
+
+    graded = structure.get_block(usage_key).graded
+    edited = max((row['modified'] for row in rows.values()), default=None)
+    return {
+        'subtree_edited_timestamp': edited or timezone.now(),
+        'course_version': structure.version,
+        'earned_all': earned_all,
+        'possible_all': possible_all,
+        'earned_graded': earned_all if graded else 0.0,
+        'possible_graded': possible_all if graded else 0.0,
+    }
+
+
+def update_subsection_grade(user_id, structure, usage_key, edited_at=None):
+    """
+    Recompute and persist one subsection grade.
+
+    ``edited_at`` is the modification time of the change that triggered the
+    update; when the stored grade already reflects it (and the course
+    version is unchanged) nothing is recomputed. Returns the grade row, or
+    ``None`` when ``usage_key`` is not a subsection of the course.
+    """
+    block = structure.get_block(usage_key)
+    if block is None or block.block_type != 'sequential':
+        return None
+
+    existing = PersistentSubsectionGrade.objects.filter(
+        user_id=user_id, course_id=structure.course_pk, usage_key=usage_key
+    ).first()
+    if (existing is not None and edited_at is not None
+            and existing.course_version == structure.version
+            and existing.subtree_edited_timestamp >= edited_at):
+        return existing
+
+    values = compute_subsection_grade(user_id, structure, usage_key)
+    if existing is None:
+        return PersistentSubsectionGrade.objects.create(
+            user_id=user_id, course_id=structure.course_pk, usage_key=usage_key, **values
+        )
+    for name, value in values.items():
+        setattr(existing, name, value)
+    existing.save()
+    return existing
+
+
+def update_grades_for_modules(keys):
+    """
+    Recompute the subsections touched by a batch of StudentModule changes.
+
+    ``keys`` are (student_id, course_id, module_id) tuples of rows that were
+    just written, so every affected subsection is stale; each is recomputed
+    once no matter how many of its modules changed.
+    """
+    by_course = {}
+    for student_id, course_pk, module_id in keys:
+        by_course.setdefault(course_pk, set()).add((student_id, module_id))
+
+    updated = 0
+    for course_pk, changes in by_course.items():
+        structure = get_course_structure(course_pk=course_pk)
+        affected = {
+            (student_id, structure.sequential_for(module_id))
+            for student_id, module_id in changes
+        }
+        for student_id, usage_key in affected:
+            if usage_key is None:
+                continue
+            if update_subsection_grade(student_id, structure, usage_key) is not None:
+                updated += 1
+    return updated
+
+
+def update_grade_for_module(module):
+    """Recompute the subsection containing a single saved StudentModule."""
+    structure = get_course_structure(course_pk=module.course_id)
+    usage_key = structure.sequential_for(module.module_id)
+    if usage_key is None:
+        return None
+    return update_subsection_grade(module.student_id, structure, usage_key, module.modified)
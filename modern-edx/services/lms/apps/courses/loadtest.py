@@ -0,0 +1,109 @@
+"""
+Latency load test for the LMS read path.
+
+Replays GET requests against running deployments - typically the WSGI
+server and the ASGI one with ``LMS_ASYNC_VIEWS`` on - from a pool of
+concurrent clients that each keep one connection alive, and reports
+latency percentiles and throughput per target.
+"""
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ('/courses/my-courses/', '/students/dashboard/')
+
+
+@dataclass
+class LoadTestResult:
+    target: str
+    requests: int
+    errors: int
+    elapsed_seconds: float
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+
+    def percentile(self, percent):
+        """Nearest-rank percentile of the latencies, in milliseconds."""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = max(int(round(percent / 100.0 * len(ordered))) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p90(self):
+        return self.percentile(90)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+    @property
+    def requests_per_second(self):
+        return self.requests / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self):
+        return {
+            'target': self.target,
+            'requests': self.requests,
+            'errors': self.errors,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'requests_per_second': round(self.requests_per_second, 1),
+            'p50_ms': round(self.p50, 2),
+            'p90_ms': round(self.p90, 2),
+            'p99_ms': round(self.p99, 2),
+        }
+
+
+class _Client(threading.local):
+    connection = None
+
+
+def run_load_test(base_url, paths=DEFAULT_PATHS, requests=1000, concurrency=50,
+                  headers=None, warmup=20, timeout=30.0) -> LoadTestResult:
+    """
+    Issue ``requests`` GETs (cycling through ``paths``) against ``base_url``
+    from ``concurrency`` threads; ``warmup`` requests run first and are not
+    measured. Redirects and 4xx/5xx responses count as errors.
+    """
+    url = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    prefix = url.path.rstrip('/')
+    headers = dict(headers or {})
+    client = _Client()
+
+    def fetch(index):
+        if client.connection is None:
+            client.connection = connection_class(url.netloc, timeout=timeout)
+        started = time.perf_counter()
+        try:
+            client.connection.request('GET', prefix + paths[index % len(paths)], headers=headers)
+            response = client.connection.getresponse()
+            response.read()
+            ok = 200 <= response.status < 300
+        except (OSError, http.client.HTTPException):
+            client.connection.close()
+            client.connection = None
+            ok = False
+        return (time.perf_counter() - started) * 1000.0, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, range(warmup)))
+        started = time.perf_counter()
+        outcomes = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return LoadTestResult(
+        target=base_url,
+        requests=requests,
+        errors=sum(1 for _, ok in outcomes if not ok),
+        elapsed_seconds=elapsed,
+        latencies_ms=[latency for latency, ok in outcomes if ok],
+    )
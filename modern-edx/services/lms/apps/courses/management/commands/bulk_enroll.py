@@ -0,0 +1,64 @@
+"""
+Enroll a cohort of users into a course from a CSV or JSON file.
+"""
+import csv
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.bulk_enroll import (
+    RowResult, BulkEnrollmentError, bulk_enroll, parse_csv, parse_json, summarize,
+)
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Bulk-enroll users (usernames, emails or id:<pk>) into a course.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', help='Course id, e.g. course-v1:Org+Num+Run.')
+        parser.add_argument('path', help='CSV or JSON file listing the users.')
+        parser.add_argument('--mode', default='audit', help='Default enrollment mode slug.')
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='Input format (defaults to the file extension).')
+        parser.add_argument('--batch-size', type=int, default=settings.BULK_ENROLL_BATCH_SIZE)
+        parser.add_argument('--report', help='Write the per-row result report to this CSV file.')
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(course_id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Unknown course: {options['course_id']}")
+
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'No such file: {path}')
+        text = path.read_text(encoding='utf-8-sig')
+        fmt = options['format'] or ('json' if path.suffix.lower() == '.json' else 'csv')
+
+        started = time.monotonic()
+        results = []
+        try:
+            requests = parse_json(text) if fmt == 'json' else parse_csv(text)
+            for progress in bulk_enroll(course, requests, mode=options['mode'],
+                                        batch_size=options['batch_size']):
+                results.extend(progress.results)
+                self.stdout.write(f'{progress.processed}/{progress.total} rows processed')
+        except BulkEnrollmentError as exc:
+            raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as handle:
+                writer = csv.DictWriter(handle, fieldnames=list(RowResult.__dataclass_fields__))
+                writer.writeheader()
+                writer.writerows(asdict(result) for result in results)
+
+        summary = summarize(results, time.monotonic() - started)
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {summary['total']} rows in {summary['elapsed_seconds']}s "
+            f"({summary['rows_per_second']} rows/s): {json.dumps(summary['counts'], sort_keys=True)}"
+        ))
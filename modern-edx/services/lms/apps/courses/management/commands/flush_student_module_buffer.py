@@ -0,0 +1,32 @@
+"""
+Replay journaled StudentModule updates left behind by stopped workers.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.courses.module_buffer import StudentModuleBuffer
+
+
+class Command(BaseCommand):
+    help = 'Flush StudentModule updates recovered from the write-behind journal.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--journal-dir',
+            help='Journal directory to recover (defaults to STUDENT_MODULE_BUFFER_JOURNAL_DIR).',
+        )
+
+    def handle(self, *args, **options):
+        if options['journal_dir']:
+            buffer = StudentModuleBuffer(journal_dir=options['journal_dir'])
+        else:
+            buffer = StudentModuleBuffer.from_settings()
+        if buffer.journal_dir is None:
+            self.stdout.write('No journal directory configured; nothing to recover.')
+            return
+
+        recovered = len(buffer)
+        flushed = buffer.flush()
+        buffer.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recovered {recovered} buffered updates, flushed {flushed} rows.'
+        ))
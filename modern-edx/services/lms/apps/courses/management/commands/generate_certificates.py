@@ -0,0 +1,44 @@
+"""
+Generate (or resume generating) certificates for courses.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.certificates import generate_certificates
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Grade enrolled learners, update certificate rows and render pending certificates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='+', help='Course identifiers to generate certificates for.')
+        parser.add_argument('--batch-size', type=int, default=settings.CERTIFICATE_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=settings.CERTIFICATE_RENDER_WORKERS,
+                            help='Render processes; 0 renders in this process.')
+        parser.add_argument('--render-only', action='store_true',
+                            help='Skip selection and only render certificates already pending.')
+        parser.add_argument('--retry-errors', action='store_true',
+                            help='Also re-render certificates left in the error status.')
+
+    def handle(self, *args, **options):
+        for course_id in options['course_ids']:
+            try:
+                course = Course.objects.get(course_id=course_id)
+            except Course.DoesNotExist:
+                raise CommandError(f'Course "{course_id}" does not exist.')
+
+            result = generate_certificates(
+                course,
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                render_only=options['render_only'],
+                retry_errors=options['retry_errors'],
+            )
+            statuses = ', '.join(f'{count} {status}' for status, count in sorted(result.statuses.items()))
+            self.stdout.write(self.style.SUCCESS(
+                f'{course_id}: selected {result.selected} learners '
+                f'({result.created} created, {result.updated} updated{"; " + statuses if statuses else ""}), '
+                f'rendered {result.rendered} certificates with {result.errors} errors in '
+                f'{result.elapsed_seconds:.2f}s - {result.certificates_per_second:.0f} certificates/s'
+            ))
@@ -0,0 +1,67 @@
+"""
+Compare read-path latency between running LMS deployments.
+
+Example, with the WSGI server on :8000 and ASGI (LMS_ASYNC_VIEWS=True)
+on :8001::
+
+    python manage.py loadtest_read_path wsgi=http://localhost:8000 asgi=http://localhost:8001 --cookie sessionid=...
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.loadtest import DEFAULT_PATHS, run_load_test
+
+
+class Command(BaseCommand):
+    help = 'Load-test the course and dashboard pages and report p50/p90/p99 latency per target.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+',
+                            help='NAME=BASE_URL pairs; the first one is the baseline.')
+        parser.add_argument('--path', dest='paths', action='append',
+                            help=f"Path to request (repeatable; default {', '.join(DEFAULT_PATHS)}).")
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--cookie', help='Cookie header to send, e.g. "sessionid=...".')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            name, sep, url = target.partition('=')
+            if not sep or not url.startswith(('http://', 'https://')):
+                raise CommandError(f'Expected NAME=http(s)://host[:port], got "{target}".')
+            targets.append((name, url))
+
+        headers = {'Cookie': options['cookie']} if options['cookie'] else {}
+        results = []
+        for name, url in targets:
+            result = run_load_test(
+                url,
+                paths=options['paths'] or DEFAULT_PATHS,
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                headers=headers,
+                warmup=options['warmup'],
+            )
+            results.append((name, result))
+
+        if options['json']:
+            self.stdout.write(json.dumps({name: result.to_dict() for name, result in results}, indent=2))
+            return
+
+        baseline = results[0][1]
+        self.stdout.write(f"{'target':<12}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, result in results:
+            self.stdout.write(
+                f'{name:<12}{result.requests_per_second:>10.1f}{result.p50:>10.2f}'
+                f'{result.p90:>10.2f}{result.p99:>10.2f}{result.errors:>8}'
+            )
+        for name, result in results[1:]:
+            if baseline.p50 and baseline.p99:
+                self.stdout.write(
+                    f'{name} vs {results[0][0]}: p50 x{result.p50 / baseline.p50:.2f}, '
+                    f'p99 x{result.p99 / baseline.p99:.2f}'
+                )
@@ -0,0 +1,14 @@
+"""
+Recount the CatalogCount buckets from the Course table.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.courses.catalog import rebuild_catalog_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild catalog course counters (needed after bulk imports that skip signals).'
+
+    def handle(self, *args, **options):
+        buckets = rebuild_catalog_counts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} catalog count buckets.'))
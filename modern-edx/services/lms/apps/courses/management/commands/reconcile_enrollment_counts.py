@@ -0,0 +1,33 @@
+"""
+Repair drift between CourseEnrollment rows and their sharded counters.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.enrollment_counts import reconcile_enrollment_counts
+from apps.courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Recount enrollments and rewrite drifted CourseEnrollmentCount rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'course_ids', nargs='*',
+            help='Course ids (e.g. course-v1:Org+Num+Run) to reconcile; defaults to all courses.',
+        )
+
+    def handle(self, *args, **options):
+        course_pks = None
+        if options['course_ids']:
+            found = dict(
+                Course.objects.filter(course_id__in=options['course_ids']).values_list('course_id', 'pk')
+            )
+            missing = set(options['course_ids']) - set(found)
+            if missing:
+                raise CommandError(f"Unknown course(s): {', '.join(sorted(missing))}")
+            course_pks = found.values()
+
+        result = reconcile_enrollment_counts(course_pks)
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {result.courses} courses, repaired {result.repaired} counters.'
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_catalog_counts(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CatalogCount = apps.get_model('courses', 'CatalogCount')
+    rows = Course.objects.values('org', 'pacing', 'level_type', 'catalog_visibility').annotate(
+        count=Count('id')
+    ).order_by()
+    CatalogCount.objects.bulk_create([CatalogCount(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('org', models.CharField(max_length=32)),
+                ('pacing', models.CharField(max_length=20)),
+                ('level_type', models.CharField(blank=True, max_length=32)),
+                ('catalog_visibility', models.CharField(max_length=32)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Catalog Count',
+                'verbose_name_plural': 'Catalog Counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created', 'id'], name='course_catalog_keyset_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='catalogcount',
+            unique_together={('org', 'pacing', 'level_type', 'catalog_visibility')},
+        ),
+        migrations.RunPython(populate_catalog_counts, migrations.RunPython.noop),
+    ]
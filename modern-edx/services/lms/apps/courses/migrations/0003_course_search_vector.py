@@ -0,0 +1,58 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.db import migrations
+
+# The GIN index and the trigger only exist on PostgreSQL; other databases
+# use the in-memory search backend.
+CREATE_SEARCH_SQL = """
+CREATE INDEX course_search_vector_idx ON courses_course USING gin (search_vector);
+
+CREATE FUNCTION courses_course_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.display_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.short_description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.overview, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.syllabus, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER courses_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF display_name, short_description, overview, syllabus, search_vector
+    ON courses_course
+    FOR EACH ROW EXECUTE FUNCTION courses_course_search_vector_update();
+
+UPDATE courses_course SET display_name = display_name;
+"""
+
+DROP_SEARCH_SQL = """
+DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course;
+DROP FUNCTION IF EXISTS courses_course_search_vector_update();
+DROP INDEX IF EXISTS course_search_vector_idx;
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_catalog_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
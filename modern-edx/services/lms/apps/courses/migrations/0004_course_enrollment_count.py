@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def populate_enrollment_counts(apps, schema_editor):
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+    CourseEnrollmentCount = apps.get_model('courses', 'CourseEnrollmentCount')
+    rows = CourseEnrollment.objects.values('course_id', 'mode_id', 'is_active').annotate(
+        count=Count('id')
+    ).order_by()
+    CourseEnrollmentCount.objects.bulk_create([CourseEnrollmentCount(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseEnrollmentCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_counts', to='courses.course')),
+                ('mode', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.coursemode')),
+            ],
+            options={
+                'verbose_name': 'Course Enrollment Count',
+                'verbose_name_plural': 'Course Enrollment Counts',
+                'unique_together': {('course', 'mode', 'is_active', 'shard')},
+            },
+        ),
+        migrations.RunPython(populate_enrollment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('courses', '0004_course_enrollment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='instructors',
+            field=models.ManyToManyField(blank=True, related_name='taught_courses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='courseenrollment',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
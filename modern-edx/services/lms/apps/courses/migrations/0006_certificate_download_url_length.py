@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_instructors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedcertificate',
+            name='download_url',
+            field=models.CharField(blank=True, max_length=512),
+        ),
+    ]
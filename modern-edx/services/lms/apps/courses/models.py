@@ -1,12 +1,16 @@
 """
 Enhanced course models for Modern edX LMS with legacy compatibility.
 """
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
+import random
 import uuid
 
 User = get_user_model()
@@ -114,6 +118,7 @@ class Course(models.Model):
     
     # Staff and instructor
     instructor_info = models.TextField(blank=True)
+    instructors = models.ManyToManyField(User, related_name='taught_courses', blank=True)
     
     # Course modes relationship
     modes = models.ManyToManyField(CourseMode, related_name='courses', blank=True)
@@ -128,11 +133,19 @@ class Course(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     modified = models.DateTimeField(auto_now=True)
     version = models.CharField(max_length=255, default='1')
+
+    # Full-text search document, maintained by a database trigger on
+    # PostgreSQL (see migration 0003 and apps.courses.search).
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = _('Course')
         verbose_name_plural = _('Courses')
         ordering = ['-created']
+        indexes = [
+            # Keyset pagination of the catalog walks (-created, id).
+            models.Index(fields=['-created', 'id'], name='course_catalog_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.display_name} ({self.course_id})"
@@ -152,6 +165,25 @@ class Course(models.Model):
         end_ok = not self.enrollment_end or now <= self.enrollment_end
         return start_ok and end_ok
 
+class CatalogCount(models.Model):
+    """
+    Number of courses per catalog filter bucket, maintained on Course
+    save/delete so catalog totals never need a COUNT(*) over courses.
+    """
+    org = models.CharField(max_length=32)
+    pacing = models.CharField(max_length=20)
+    level_type = models.CharField(max_length=32, blank=True)
+    catalog_visibility = models.CharField(max_length=32)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('org', 'pacing', 'level_type', 'catalog_visibility')
+        verbose_name = _('Catalog Count')
+        verbose_name_plural = _('Catalog Counts')
+
+    def __str__(self):
+        return f"{self.org}/{self.pacing}/{self.level_type}/{self.catalog_visibility}: {self.count}"
+
 class Chapter(models.Model):
     """
     Course chapters (sections) - hierarchical course structure.
@@ -300,6 +332,7 @@ class CourseEnrollment(models.Model):
     # Enrollment details
     is_active = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         unique_together = ('user', 'course')
@@ -309,6 +342,70 @@ class CourseEnrollment(models.Model):
     def __str__(self):
         return f"{self.user.username} enrolled in {self.course.display_name} ({self.mode.mode_slug})"
 
+    def _counter_key(self):
+        return (self.course_id, self.mode_id, self.is_active)
+
+    def save(self, *args, **kwargs):
+        """Save and move the enrollment between counters in one transaction."""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = CourseEnrollment.objects.filter(pk=self.pk).values_list(
+                    'course_id', 'mode_id', 'is_active'
+                ).first()
+            # Counted by the post_save receiver in signals.py.
+            self._activated = self.is_active and (previous is None or not previous[2])
+            super().save(*args, **kwargs)
+            current = self._counter_key()
+            if previous != current:
+                if previous is not None:
+                    CourseEnrollmentCount.adjust(*previous, delta=-1)
+                CourseEnrollmentCount.adjust(*current, delta=1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            CourseEnrollmentCount.adjust(*self._counter_key(), delta=-1)
+        return result
+
+class CourseEnrollmentCount(models.Model):
+    """
+    Sharded enrollment counter per (course, mode, is_active).
+
+    Writers add to a random shard so concurrent enrollments in a popular
+    course do not queue on a single row; readers sum the shards. Counters
+    are kept in step by ``CourseEnrollment.save``/``delete``; bulk writes
+    must call ``adjust`` themselves, and ``reconcile_enrollment_counts``
+    repairs any drift.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollment_counts')
+    mode = models.ForeignKey(CourseMode, on_delete=models.CASCADE, related_name='+')
+    is_active = models.BooleanField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'mode', 'is_active', 'shard')
+        verbose_name = _('Course Enrollment Count')
+        verbose_name_plural = _('Course Enrollment Counts')
+
+    def __str__(self):
+        return f"{self.course_id}/{self.mode_id}/{'active' if self.is_active else 'inactive'}#{self.shard}: {self.count}"
+
+    @classmethod
+    def adjust(cls, course_id, mode_id, is_active, delta):
+        """Add ``delta`` to one shard of the counter."""
+        shard = random.randrange(getattr(settings, 'ENROLLMENT_COUNTER_SHARDS', 8))
+        key = {'course_id': course_id, 'mode_id': mode_id, 'is_active': is_active, 'shard': shard}
+        if cls.objects.filter(**key).update(count=F('count') + delta):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(count=delta, **key)
+        except IntegrityError:
+            # Another writer created the shard first.
+            cls.objects.filter(**key).update(count=F('count') + delta)
+
 class StudentModule(models.Model):
     """
     Student progress and state tracking for course content.
@@ -396,7 +493,7 @@ class GeneratedCertificate(models.Model):
     # Certificate details
     verify_uuid = models.UUIDField(default=uuid.uuid4, unique=True)
     download_uuid = models.UUIDField(default=uuid.uuid4, unique=True)
-    download_url = models.CharField(max_length=128, blank=True)
+    download_url = models.CharField(max_length=512, blank=True)
     grade = models.CharField(max_length=5, blank=True)
     
     # Status and tracking
@@ -0,0 +1,324 @@
+"""
+Write-behind buffer for StudentModule state.
+
+Learner interactions update ``state``, ``grade``, ``max_grade`` and ``done``
+many times per minute. Instead of a row-level save per interaction, updates
+are merged in memory per (student, course, module_id) and flushed in batches
+with ``bulk_create(update_conflicts=True)`` once a size threshold is reached
+or the flush interval elapses.
+
+Every update is appended to a local journal before it is acknowledged, so a
+crashed worker loses nothing: ``flush_student_module_buffer`` (or the next
+buffer started on the same journal directory) replays leftover segments.
+Journal records carry a wall-clock sequence stamp and recovery replays them
+in stamp order across segments, so the newest recovered write for a field
+wins. Reads through ``get_student_module``/``get_student_modules`` overlay
+pending updates, so learners always see their own latest writes. Reads
+never create the buffer: a process that has not written has nothing
+pending, and recovery stays on the write path and the flush command.
+
+Buffers are per process. When two workers hold updates for the same
+(student, course, module_id), the one that flushes last wins, whatever the
+order of the writes. Requests for one learner are normally served by one
+worker at a time, but anything that must not lose a concurrent update (such
+as grade overrides) should write ``StudentModule`` directly instead.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import StudentModule
+from .progress import invalidate_learner_progress
+from .signals import student_modules_flushed
+
+logger = logging.getLogger(__name__)
+
+BUFFERED_FIELDS = ('state', 'grade', 'max_grade', 'done')
+UNIQUE_FIELDS = ['student', 'course', 'module_id']
+
+
+class StudentModuleBuffer:
+    """Per-process merge buffer with an append-only crash journal."""
+
+    def __init__(self, journal_dir=None, max_pending=500, flush_interval=2.0,
+                 batch_size=500, fsync=True):
+        self.journal_dir = Path(journal_dir) if journal_dir else None
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+
+        self._pending = {}
+        self._segments = []
+        self._journal = None
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = None
+
+        if self.journal_dir is not None:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            self._recover()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            journal_dir=getattr(settings, 'STUDENT_MODULE_BUFFER_JOURNAL_DIR', None),
+            max_pending=getattr(settings, 'STUDENT_MODULE_BUFFER_MAX_PENDING', 500),
+            flush_interval=getattr(settings, 'STUDENT_MODULE_BUFFER_FLUSH_INTERVAL', 2.0),
+            batch_size=getattr(settings, 'STUDENT_MODULE_BUFFER_BATCH_SIZE', 500),
+            fsync=getattr(settings, 'STUDENT_MODULE_BUFFER_FSYNC', True),
+        )
+
+    # Journal handling
+    #
+    # Each segment stays open under an exclusive flock until its updates are
+    # in the database, so recovery never adopts a live worker's segment.
+
+    def _open_segment(self):
+        # Time-prefixed so segment names sort in creation order.
+        path = self.journal_dir / f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex}.journal"
+        handle = open(path, 'a', encoding='utf-8')
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        self._journal = handle
+        self._segments.append((path, handle))
+
+    def _append_journal(self, key, fields):
+        if self.journal_dir is None:
+            return
+        if self._journal is None:
+            self._open_segment()
+        self._journal.write(json.dumps({'k': key, 'f': fields, 's': time.time_ns()}) + '\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _close_segment(self):
+        # Stop appending; the handle (and its lock) is released by _discard.
+        self._journal = None
+
+    @staticmethod
+    def _discard(segments):
+        for path, handle in segments:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            handle.close()
+
+    def _recover(self):
+        """Adopt updates left behind in journal segments by dead processes."""
+        entries = []
+        for path in sorted(self.journal_dir.glob('*.journal')):
+            handle = open(path, 'r+', encoding='utf-8')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                continue
+            for line_number, line in enumerate(handle):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line means the write was never acknowledged.
+                    continue
+                sort_key = (entry.get('s', 0), len(self._segments), line_number)
+                entries.append((sort_key, tuple(entry['k']), entry['f']))
+            self._segments.append((path, handle))
+        # Segments of different workers interleave in time; replay by stamp.
+        entries.sort(key=lambda entry: entry[0])
+        for _, key, fields in entries:
+            self._merge(key, fields)
+        if self._pending:
+            logger.info("Recovered %d buffered student module updates", len(self._pending))
+
+    # Buffering
+
+    def _merge(self, key, fields):
+        self._pending.setdefault(key, {}).update(fields)
+
+    def record(self, student_id, course_id, module_id, **fields):
+        """Buffer an update; later values for the same field win."""
+        unknown = set(fields) - set(BUFFERED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported StudentModule fields: {', '.join(sorted(unknown))}")
+        key = (student_id, course_id, module_id)
+        with self._lock:
+            self._append_journal(list(key), fields)
+            self._merge(key, fields)
+            should_flush = len(self._pending) >= self.max_pending
+        self._ensure_timer()
+        if should_flush:
+            self.flush()
+
+    def pending_for(self, student_id, course_id, module_id):
+        with self._lock:
+            fields = self._pending.get((student_id, course_id, module_id))
+            return dict(fields) if fields else None
+
+    def pending_for_course(self, student_id, course_id):
+        with self._lock:
+            return {
+                key[2]: dict(fields)
+                for key, fields in self._pending.items()
+                if key[0] == student_id and key[1] == course_id
+            }
+
+    def __len__(self):
+        return len(self._pending)
+
+    # Flushing
+
+    def flush(self):
+        """Write all pending updates to the database; returns the number of rows."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._close_segment()
+                segments, self._segments = self._segments, []
+
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception("Flushing %d student module updates failed", len(batch))
+                with self._lock:
+                    # Keep newer updates on top of the ones we failed to write.
+                    for key, fields in self._pending.items():
+                        batch.setdefault(key, {}).update(fields)
+                    self._pending = batch
+                    self._segments = segments + self._segments
+                raise
+
+            self._discard(segments)
+
+        student_modules_flushed.send(sender=StudentModule, keys=list(batch))
+        return len(batch)
+
+    def _write(self, batch):
+        # Rows only update the fields that were actually buffered for them.
+        groups = {}
+        for key, fields in batch.items():
+            groups.setdefault(tuple(sorted(fields)), []).append((key, fields))
+
+        with transaction.atomic():
+            for field_names, entries in groups.items():
+                objs = [
+                    StudentModule(student_id=key[0], course_id=key[1], module_id=key[2], **fields)
+                    for key, fields in entries
+                ]
+                StudentModule.objects.bulk_create(
+                    objs,
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=UNIQUE_FIELDS,
+                    update_fields=list(field_names) + ['modified'],
+                )
+
+    def _ensure_timer(self):
+        if self._timer is not None or not self.flush_interval:
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(
+                target=self._run_timer, name='student-module-flusher', daemon=True
+            )
+            self._timer.start()
+
+    def _run_timer(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; the journal still holds the updates.
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        self._stop.set()
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._close_segment()
+                # Unflushed segments are left on disk for recovery.
+                for _, handle in self._segments:
+                    handle.close()
+                self._segments = []
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Return the process-wide buffer, creating it on first use."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = StudentModuleBuffer.from_settings()
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def peek_buffer():
+    """Return the process-wide buffer if one was started, without starting it."""
+    return _buffer
+
+
+def record_module_update(student_id, course_id, module_id, **fields):
+    """Buffer a StudentModule update for ``student_id``/``course_id``/``module_id``."""
+    get_buffer().record(student_id, course_id, module_id, **fields)
+    invalidate_learner_progress((student_id, course_id))
+
+
+def _apply_pending(module, fields):
+    for name, value in fields.items():
+        setattr(module, name, value)
+    return module
+
+
+def get_student_module(student_id, course_id, module_id):
+    """
+    Read a learner's module state including their own unflushed writes.
+
+    Returns an unsaved instance when the row only exists in the buffer and
+    ``None`` when there is no state at all.
+    """
+    buffer = peek_buffer()
+    pending = buffer.pending_for(student_id, course_id, module_id) if buffer is not None else None
+    module = StudentModule.objects.filter(
+        student_id=student_id, course_id=course_id, module_id=module_id
+    ).first()
+    if pending is None:
+        return module
+    if module is None:
+        module = StudentModule(student_id=student_id, course_id=course_id, module_id=module_id)
+    return _apply_pending(module, pending)
+
+
+def get_student_modules(student_id, course_id):
+    """All of a learner's modules in a course, with unflushed writes applied."""
+    buffer = peek_buffer()
+    pending = buffer.pending_for_course(student_id, course_id) if buffer is not None else {}
+    modules = []
+    for module in StudentModule.objects.filter(student_id=student_id, course_id=course_id):
+        fields = pending.pop(module.module_id, None)
+        modules.append(_apply_pending(module, fields) if fields else module)
+    for module_id, fields in pending.items():
+        modules.append(_apply_pending(
+            StudentModule(student_id=student_id, course_id=course_id, module_id=module_id),
+            fields,
+        ))
+    return modules
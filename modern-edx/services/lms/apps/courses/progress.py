@@ -0,0 +1,239 @@
+"""
+Course progress for Modern edX LMS.
+
+``get_course_progress`` joins a learner's StudentModule rows (including
+their unflushed buffered writes) against the cached ``CourseStructure``
+and computes completion and grade percentages per chapter and
+sequential in a single pass over the modules. Each leaf block's
+chapter/sequential ancestors, the number of leaves under every section
+and the possible points of weighted blocks are precomputed once per
+structure version in a ``ProgressIndex``.
+
+Results are cached per learner and course under a token bumped on each
+of the learner's module writes (see ``invalidate_learner_progress``) and
+keyed on the structure version, so course edits also supersede them.
+"""
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .grades import CONTAINER_TYPES, SCORABLE_CATEGORIES, block_score
+from .structure import LocalStructureCache, get_course_structure
+
+COMPLETED = 'completed'
+
+
+@dataclass(frozen=True)
+class _Leaf:
+    block: object
+    sections: Tuple[str, ...]  # chapter, then sequential (when there is one)
+    scorable: bool
+
+
+@dataclass(frozen=True)
+class ProgressIndex:
+    """Leaf -> section map and per-section totals for one structure version."""
+    course_id: str
+    version: str
+    leaves: Dict[str, _Leaf]
+    leaf_totals: Dict[str, int]
+    weighted_possible: Dict[str, float]
+
+    @classmethod
+    def build(cls, structure):
+        leaves, totals, weighted = {}, {}, {}
+        for block in structure.iter_blocks():
+            if block.block_type in CONTAINER_TYPES:
+                continue
+            ancestors = [structure.get_block(location) for location in block.ancestors]
+            if block.visible_to_staff_only or any(a.visible_to_staff_only for a in ancestors):
+                continue
+            sections = tuple(a.location for a in ancestors if a.block_type in ('chapter', 'sequential'))
+            scorable = block.block_type in SCORABLE_CATEGORIES or block.weight is not None
+            leaves[block.location] = _Leaf(block, sections, scorable)
+            for section in sections:
+                totals[section] = totals.get(section, 0) + 1
+                if scorable and block.weight is not None:
+                    # Weighted blocks are worth their weight whether attempted or not.
+                    weighted[section] = weighted.get(section, 0.0) + block.weight
+        return cls(structure.course_id, structure.version, leaves, totals, weighted)
+
+
+@dataclass
+class SectionProgress:
+    location: str
+    block_type: str  # 'chapter' or 'sequential'
+    display_name: str
+    graded: bool = False
+    format: str = ''
+    due: Optional[datetime] = None
+    completed: int = 0
+    total: int = 0
+    earned: float = 0.0
+    possible: float = 0.0
+    children: List['SectionProgress'] = field(default_factory=list)
+
+    @property
+    def percent_complete(self):
+        return round(100.0 * self.completed / self.total, 1) if self.total else 0.0
+
+    @property
+    def percent_grade(self):
+        return round(100.0 * self.earned / self.possible, 1) if self.possible else 0.0
+
+    def to_dict(self):
+        return {
+            'location': self.location,
+            'block_type': self.block_type,
+            'display_name': self.display_name,
+            'graded': self.graded,
+            'format': self.format,
+            'due': self.due,
+            'completed': self.completed,
+            'total': self.total,
+            'percent_complete': self.percent_complete,
+            'earned': round(self.earned, 4),
+            'possible': round(self.possible, 4),
+            'percent_grade': self.percent_grade,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+@dataclass
+class CourseProgress:
+    user_id: int
+    course_id: str
+    course_version: str
+    chapters: List[SectionProgress]
+    completed: int = 0
+    total: int = 0
+    earned: float = 0.0
+    possible: float = 0.0
+
+    @property
+    def percent_complete(self):
+        return round(100.0 * self.completed / self.total, 1) if self.total else 0.0
+
+    @property
+    def percent_grade(self):
+        return round(100.0 * self.earned / self.possible, 1) if self.possible else 0.0
+
+    def to_dict(self):
+        return {
+            'course_id': self.course_id,
+            'course_version': self.course_version,
+            'completed': self.completed,
+            'total': self.total,
+            'percent_complete': self.percent_complete,
+            'percent_grade': self.percent_grade,
+            'chapters': [chapter.to_dict() for chapter in self.chapters],
+        }
+
+
+_index_cache = LocalStructureCache(getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_SIZE', 128))
+
+
+def get_progress_index(structure):
+    index = _index_cache.get(structure.course_id, structure.version)
+    if index is None:
+        index = ProgressIndex.build(structure)
+        _index_cache.set(index)
+    return index
+
+
+def compute_course_progress(user_id, structure, modules):
+    """Fold ``modules`` into per-section progress for ``structure``."""
+    index = get_progress_index(structure)
+    sections = {}
+    for location in structure.chapters:
+        chapter = structure.get_block(location)
+        if chapter.visible_to_staff_only:
+            continue
+        node = sections[location] = SectionProgress(
+            location, 'chapter', chapter.display_name,
+            total=index.leaf_totals.get(location, 0),
+            possible=index.weighted_possible.get(location, 0.0),
+        )
+        for sequential in structure.children_of(location):
+            if sequential.visible_to_staff_only:
+                continue
+            node.children.append(sections.setdefault(sequential.location, SectionProgress(
+                sequential.location, 'sequential', sequential.display_name,
+                graded=sequential.graded, format=sequential.format, due=sequential.due,
+                total=index.leaf_totals.get(sequential.location, 0),
+                possible=index.weighted_possible.get(sequential.location, 0.0),
+            )))
+            node.graded = node.graded or sequential.graded
+
+    for module in modules:
+        leaf = index.leaves.get(module.module_id)
+        if leaf is None:
+            continue
+        completed = module.done == COMPLETED
+        earned = possible = 0.0
+        if leaf.scorable:
+            earned, possible = block_score(leaf.block, {'grade': module.grade, 'max_grade': module.max_grade})
+            if leaf.block.weight is not None:
+                possible = 0.0  # counted in weighted_possible
+        for section_location in leaf.sections:
+            section = sections[section_location]
+            section.completed += completed
+            section.earned += earned
+            section.possible += possible
+
+    chapters = [sections[location] for location in structure.chapters if location in sections]
+    return CourseProgress(
+        user_id=user_id,
+        course_id=structure.course_id,
+        course_version=structure.version,
+        chapters=chapters,
+        completed=sum(chapter.completed for chapter in chapters),
+        total=sum(chapter.total for chapter in chapters),
+        earned=sum(chapter.earned for chapter in chapters),
+        possible=sum(chapter.possible for chapter in chapters),
+    )
+
+
+def _token_key(user_id, course_pk):
+    return f'course_progress:token:{user_id}:{course_pk}'
+
+
+def invalidate_learner_progress(*keys):
+    """Drop memoized progress for (user_id, course_pk) pairs."""
+    cache.set_many({_token_key(user_id, course_pk): time.time_ns() for user_id, course_pk in keys}, None)
+
+
+def _token(user_id, course_pk):
+    key = _token_key(user_id, course_pk)
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, time.time_ns(), None)
+        token = cache.get(key)
+    return token
+
+
+def get_course_progress(user_id, course_id=None, course_pk=None) -> CourseProgress:
+    """
+    Progress of ``user_id`` in a course, memoized until their next module
+    write. Raises ``Course.DoesNotExist`` for unknown courses.
+    """
+    from .module_buffer import get_student_modules  # module_buffer imports this module
+
+    structure = get_course_structure(course_id=course_id, course_pk=course_pk)
+    token = _token(user_id, structure.course_pk)
+    if token is None:
+        # No shared cache to hold tokens (e.g. DummyCache).
+        return compute_course_progress(user_id, structure, get_student_modules(user_id, structure.course_pk))
+
+    key = f'course_progress:{user_id}:{structure.course_pk}:{token}:{structure.version}'
+    progress = cache.get(key)
+    if progress is None:
+        progress = compute_course_progress(
+            user_id, structure, get_student_modules(user_id, structure.course_pk)
+        )
+        cache.set(key, progress, getattr(settings, 'COURSE_PROGRESS_CACHE_TIMEOUT', 3600))
+    return progress
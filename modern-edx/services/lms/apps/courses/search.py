@@ -0,0 +1,247 @@
+"""
+Full-text course search for Modern edX LMS.
+
+On PostgreSQL, ``Course.search_vector`` is a weighted ``tsvector`` over
+``display_name`` (A), ``short_description`` (B), ``overview`` (C) and
+``syllabus`` (D), kept current by a trigger and served from a GIN index.
+Elsewhere (SQLite in development and tests) an in-memory inverted index
+with the same weighting is built per catalog generation, so any course
+change rebuilds it on the next search.
+
+Both backends leave out courses whose ``catalog_visibility`` is not
+discoverable unless the caller filters on a visibility explicitly.
+
+Snippets are HTML: course text is escaped and only the ``<b>`` highlight
+tags are markup.
+"""
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils.html import escape
+
+from .catalog import CATALOG_FILTERS, catalog_generation, discoverable
+from .models import Course
+
+SEARCH_CONFIG = 'english'
+RESULT_FIELDS = ('id', 'course_id', 'display_name', 'org', 'short_description')
+HIGHLIGHT_START = '<b>'
+HIGHLIGHT_STOP = '</b>'
+# ts_headline copies the source text verbatim; it marks matches with these
+# control characters, which are swapped for the tags after escaping.
+_HEADLINE_START = '\x02'
+_HEADLINE_STOP = '\x03'
+
+# Field weights matching PostgreSQL's default ts_rank weights for D, C, B, A.
+FIELD_WEIGHTS = (
+    ('display_name', 1.0),
+    ('short_description', 0.4),
+    ('overview', 0.2),
+    ('syllabus', 0.1),
+)
+SNIPPET_FIELDS = ('short_description', 'overview', 'syllabus', 'display_name')
+SNIPPET_WORDS = 30
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from in into is it of on or that the their '
+    'this to was with'.split()
+)
+_WORD_RE = re.compile(r'\w+')
+
+
+@dataclass
+class SearchResults:
+    total: int
+    hits: List[dict] = field(default_factory=list)
+
+
+def _normalize(word):
+    word = word.lower()
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercased, lightly stemmed terms of ``text`` without stop words."""
+    terms = (_normalize(word) for word in _WORD_RE.findall(text or ''))
+    return [term for term in terms if term not in STOP_WORDS]
+
+
+class PostgresSearchBackend:
+    """Ranked search over the ``search_vector`` GIN index."""
+
+    def _query(self, query):
+        return SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+
+    def filter_queryset(self, queryset, query):
+        return queryset.filter(search_vector=self._query(query))
+
+    def search(self, query, filters=None, offset=0, limit=20):
+        search_query = self._query(query)
+        queryset = Course.objects.filter(search_vector=search_query, **discoverable(filters or {}))
+        total = queryset.count()
+        rows = (
+            queryset
+            .annotate(
+                rank=SearchRank(F('search_vector'), search_query),
+                snippet=SearchHeadline(
+                    Concat('short_description', Value(' '), 'overview'),
+                    search_query,
+                    config=SEARCH_CONFIG,
+                    start_sel=_HEADLINE_START,
+                    stop_sel=_HEADLINE_STOP,
+                    max_words=SNIPPET_WORDS,
+                    min_words=SNIPPET_WORDS // 2,
+                ),
+            )
+            .order_by('-rank', '-created', 'id')
+            .values(*RESULT_FIELDS, 'rank', 'snippet')[offset:offset + limit]
+        )
+        hits = list(rows)
+        for row in hits:
+            row['snippet'] = render_headline(row['snippet'])
+        return SearchResults(total=total, hits=hits)
+
+
+def render_headline(headline):
+    """Escape a ``ts_headline`` result and turn its match markers into tags."""
+    return (
+        escape(headline or '')
+        .replace(_HEADLINE_START, HIGHLIGHT_START)
+        .replace(_HEADLINE_STOP, HIGHLIGHT_STOP)
+    )
+
+
+@dataclass(frozen=True)
+class _MemoryIndex:
+    generation: object
+    documents: Dict[int, dict]
+    postings: Dict[str, Dict[int, float]]
+
+    def matching(self, terms):
+        """Score courses containing every term."""
+        if not terms:
+            return {}
+        candidates = None
+        for term in terms:
+            ids = set(self.postings.get(term, ()))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return {}
+        return {
+            pk: sum(self.postings[term][pk] for term in terms)
+            for pk in candidates
+        }
+
+
+def _matches(row, lookup, value):
+    if lookup.endswith('__in'):
+        return row[lookup[:-len('__in')]] in value
+    return row[lookup] == value
+
+
+class InMemorySearchBackend:
+    """Inverted index over all courses, rebuilt when the catalog changes."""
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _build(self, generation):
+        documents, postings = {}, {}
+        values = Course.objects.values(*RESULT_FIELDS, *CATALOG_FILTERS, 'overview', 'syllabus', 'created')
+        for row in values:
+            documents[row['id']] = row
+            for field_name, weight in FIELD_WEIGHTS:
+                terms = tokenize(row[field_name])
+                if not terms:
+                    continue
+                # Term frequency normalised by document length, as ts_rank does with 1.
+                norm = 1 + math.log(len(terms))
+                for term in terms:
+                    scores = postings.setdefault(term, {})
+                    scores[row['id']] = scores.get(row['id'], 0.0) + weight / norm
+        return _MemoryIndex(generation, documents, postings)
+
+    def _get_index(self):
+        generation = catalog_generation()
+        with self._lock:
+            index = self._index
+            if index is None or generation is None or index.generation != generation:
+                index = self._index = self._build(generation)
+        return index
+
+    def filter_queryset(self, queryset, query):
+        return queryset.filter(pk__in=list(self._get_index().matching(tokenize(query))))
+
+    def search(self, query, filters=None, offset=0, limit=20):
+        index = self._get_index()
+        terms = tokenize(query)
+        scores = index.matching(terms)
+        filters = discoverable(filters or {})
+        hits = [
+            index.documents[pk] for pk in scores
+            if all(_matches(index.documents[pk], name, value) for name, value in filters.items())
+        ]
+        hits.sort(key=lambda row: (-scores[row['id']], -row['created'].timestamp(), row['id']))
+        return SearchResults(total=len(hits), hits=[
+            dict(
+                {name: row[name] for name in RESULT_FIELDS},
+                rank=scores[row['id']],
+                snippet=highlight(row, set(terms)),
+            )
+            for row in hits[offset:offset + limit]
+        ])
+
+
+def highlight(row, terms):
+    """Window of the first field mentioning a term, escaped, with matches wrapped."""
+    for field_name in SNIPPET_FIELDS:
+        words = (row.get(field_name) or '').split()
+        positions = {
+            position for position, word in enumerate(words)
+            if any(_normalize(token) in terms for token in _WORD_RE.findall(word))
+        }
+        if not positions:
+            continue
+        start = max(min(positions) - SNIPPET_WORDS // 3, 0)
+        window = words[start:start + SNIPPET_WORDS]
+        return ' '.join(
+            f'{HIGHLIGHT_START}{escape(word)}{HIGHLIGHT_STOP}' if start + i in positions else escape(word)
+            for i, word in enumerate(window)
+        )
+    return ''
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+BACKENDS = {
+    'postgres': PostgresSearchBackend,
+    'memory': InMemorySearchBackend,
+}
+
+
+def get_search_backend():
+    """
+    Return the configured backend. ``COURSE_SEARCH_BACKEND = 'auto'`` picks
+    PostgreSQL full-text search when the default database supports it.
+    """
+    name = getattr(settings, 'COURSE_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = 'postgres' if connection.vendor == 'postgresql' else 'memory'
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def search_courses(query, filters=None, offset=0, limit=20) -> SearchResults:
+    return get_search_backend().search(query, filters=filters, offset=offset, limit=limit)
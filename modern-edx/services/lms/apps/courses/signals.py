@@ -0,0 +1,129 @@
+"""
+Signal handlers for the courses app.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from lms.metrics import ENROLLMENTS, inc_on_commit
+
+from .catalog import (
+    CATALOG_FILTERS, adjust_catalog_count, bump_catalog_generation, catalog_bucket,
+)
+from .grades import update_grade_for_module, update_grades_for_modules
+from .models import (
+    Course, Chapter, Sequential, Vertical, XBlock, StudentModule, CourseEnrollment, GeneratedCertificate,
+)
+from .progress import invalidate_learner_progress
+from .structure import invalidate_course_structure
+from .verification import invalidate_certificate_verification
+
+# Sent after the StudentModule write-behind buffer persists a batch.
+# ``keys`` is a list of (student_id, course_id, module_id) tuples.
+student_modules_flushed = Signal()
+
+# Sent after a bulk enrollment batch inserts or reactivates enrollments
+# without save(). ``course_pk`` is the course, ``user_ids`` the learners.
+enrollments_bulk_changed = Signal()
+
+
+def _course_pk_for_block(instance):
+    """Resolve the owning course pk of any node in the course tree."""
+    if isinstance(instance, Chapter):
+        return instance.course_id
+    if isinstance(instance, Sequential):
+        lookup = {'chapters__id': instance.chapter_id}
+    elif isinstance(instance, Vertical):
+        lookup = {'chapters__sequentials__id': instance.sequential_id}
+    else:
+        lookup = {'chapters__sequentials__verticals__id': instance.vertical_id}
+    return Course.objects.filter(**lookup).values_list('pk', flat=True).first()
+
+
+def touch_course(course_pk):
+    """
+    Bump ``Course.modified`` so every cached course structure keyed on the
+    old version is superseded, and drop this process's local copy.
+    """
+    if course_pk is None:
+        return
+    Course.objects.filter(pk=course_pk).update(modified=timezone.now())
+    course_id = Course.objects.filter(pk=course_pk).values_list('course_id', flat=True).first()
+    if course_id:
+        invalidate_course_structure(course_id)
+
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_save, sender=Sequential)
+@receiver(post_save, sender=Vertical)
+@receiver(post_save, sender=XBlock)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_delete, sender=Sequential)
+@receiver(post_delete, sender=Vertical)
+@receiver(post_delete, sender=XBlock)
+def course_block_changed(sender, instance, raw=False, **kwargs):
+    """Invalidate the course structure whenever any node in the tree changes."""
+    if raw:
+        return
+    touch_course(_course_pk_for_block(instance))
+
+
+@receiver(pre_save, sender=Course)
+def course_saving(sender, instance, raw=False, **kwargs):
+    """Remember the catalog bucket the course is leaving."""
+    if raw or instance.pk is None:
+        return
+    instance._catalog_bucket = (
+        Course.objects.filter(pk=instance.pk).values(*CATALOG_FILTERS).first()
+    )
+
+
+@receiver(post_save, sender=Course)
+def course_changed(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_course_structure(instance.course_id)
+
+    bucket = catalog_bucket(instance)
+    previous = None if created else getattr(instance, '_catalog_bucket', None)
+    if previous != bucket:
+        if previous is not None:
+            adjust_catalog_count(previous, -1)
+        adjust_catalog_count(bucket, 1)
+    bump_catalog_generation()
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    adjust_catalog_count(catalog_bucket(instance), -1)
+    bump_catalog_generation()
+
+
+@receiver(post_save, sender=StudentModule)
+def student_module_saved(sender, instance, raw=False, **kwargs):
+    """Regrade only the subsection containing the saved module."""
+    if raw:
+        return
+    update_grade_for_module(instance)
+    invalidate_learner_progress((instance.student_id, instance.course_id))
+
+
+@receiver(student_modules_flushed)
+def student_modules_batch_saved(sender, keys, **kwargs):
+    update_grades_for_modules(keys)
+    invalidate_learner_progress(*{(student_id, course_pk) for student_id, course_pk, _ in keys})
+
+
+@receiver(post_save, sender=GeneratedCertificate)
+@receiver(post_delete, sender=GeneratedCertificate)
+def certificate_changed(sender, instance, raw=False, **kwargs):
+    invalidate_certificate_verification(instance.verify_uuid)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def enrollment_saved(sender, instance, raw=False, **kwargs):
+    """Count enrollments created or reactivated once they commit."""
+    if raw or not getattr(instance, '_activated', False):
+        return
+    instance._activated = False
+    inc_on_commit(ENROLLMENTS)
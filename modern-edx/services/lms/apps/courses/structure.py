@@ -0,0 +1,287 @@
+"""
+Materialized course structure cache for Modern edX LMS.
+
+The Chapter -> Sequential -> Vertical -> XBlock hierarchy of a course is
+loaded in a fixed number of queries (one per level) and stored as an
+immutable ``CourseStructure``. Structures are kept in a small per-process
+LRU and in the shared Django cache (Redis), keyed on the course's
+``version``/``modified`` pair, so any change to the tree simply produces a
+new key. See ``apps.courses.signals`` for invalidation.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Course, Chapter, Sequential, Vertical, XBlock
+
+CACHE_KEY_PREFIX = 'course_structure'
+
+
+@dataclass(frozen=True)
+class BlockNode:
+    """A single node of the course tree."""
+    location: str
+    block_type: str  # 'chapter', 'sequential', 'vertical' or the XBlock category
+    display_name: str
+    parent: Optional[str]
+    ancestors: Tuple[str, ...]  # chapter first, direct parent last
+    children: Tuple[str, ...]
+    order: int = 0
+    visible_to_staff_only: bool = False
+    graded: bool = False
+    format: str = ''
+    start: Optional[datetime] = None
+    due: Optional[datetime] = None
+    weight: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class CourseStructure:
+    """Immutable snapshot of a course's block tree."""
+    course_id: str
+    course_pk: int
+    version: str
+    chapters: Tuple[str, ...]
+    blocks: Tuple[BlockNode, ...]
+    _index: Dict[str, BlockNode] = field(default=None, init=False, repr=False, compare=False)
+    _descendants: Dict[str, Tuple[str, ...]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_index', {block.location: block for block in self.blocks})
+        descendants = {}
+        for block in self.blocks:
+            for ancestor in block.ancestors:
+                descendants.setdefault(ancestor, []).append(block.location)
+        object.__setattr__(self, '_descendants', {
+            location: tuple(children) for location, children in descendants.items()
+        })
+
+    def __contains__(self, location):
+        return location in self._index
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def get_block(self, location) -> Optional[BlockNode]:
+        return self._index.get(location)
+
+    def children_of(self, location) -> Iterator[BlockNode]:
+        for child in self._index[location].children:
+            yield self._index[child]
+
+    def iter_blocks(self, block_type=None) -> Iterator[BlockNode]:
+        for block in self.blocks:
+            if block_type is None or block.block_type == block_type:
+                yield block
+
+    def descendants_of(self, location) -> Tuple[str, ...]:
+        """Locations of every block below ``location``."""
+        return self._descendants.get(location, ())
+
+    def sequential_for(self, location) -> Optional[str]:
+        """Return the location of the sequential (subsection) containing ``location``."""
+        block = self._index.get(location)
+        if block is None:
+            return None
+        if block.block_type == 'sequential':
+            return block.location
+        return block.ancestors[1] if len(block.ancestors) > 1 else None
+
+    def to_dict(self):
+        """Nested representation suitable for JSON outline responses."""
+        def serialize(location):
+            block = self._index[location]
+            return {
+                'location': block.location,
+                'block_type': block.block_type,
+                'display_name': block.display_name,
+                'graded': block.graded,
+                'format': block.format,
+                'due': block.due,
+                'children': [serialize(child) for child in block.children],
+            }
+
+        return {
+            'course_id': self.course_id,
+            'version': self.version,
+            'chapters': [serialize(location) for location in self.chapters],
+        }
+
+
+class LocalStructureCache:
+    """
+    Small thread-safe LRU holding the latest entry per course.
+
+    Entries are anything with ``course_id`` and ``version`` attributes, such
+    as ``CourseStructure`` or objects derived from one.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, course_id, version):
+        with self._lock:
+            structure = self._data.get(course_id)
+            if structure is None or structure.version != version:
+                return None
+            self._data.move_to_end(course_id)
+            return structure
+
+    def set(self, structure):
+        with self._lock:
+            self._data[structure.course_id] = structure
+            self._data.move_to_end(structure.course_id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def discard(self, course_id):
+        with self._lock:
+            self._data.pop(course_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = LocalStructureCache(
+    getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_SIZE', 128)
+)
+
+
+def make_version(course_version, modified):
+    """Build the structure version token from ``Course.version``/``modified``."""
+    return f"{course_version}:{modified.isoformat() if modified else ''}"
+
+
+def _cache_key(course_id, version):
+    digest = hashlib.md5(f"{course_id}|{version}".encode()).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{digest}"
+
+
+def load_course_structure(course):
+    """
+    Build a ``CourseStructure`` straight from the database.
+
+    Issues exactly one query per level of the hierarchy regardless of the
+    number of blocks in the course.
+    """
+    chapters = list(
+        Chapter.objects.filter(course_id=course.pk)
+        .order_by('order', 'pk')
+        .values('id', 'location', 'display_name', 'order', 'visible_to_staff_only',
+                'graded', 'format', 'start', 'due')
+    )
+    sequentials = list(
+        Sequential.objects.filter(chapter__course_id=course.pk)
+        .order_by('order', 'pk')
+        .values('id', 'chapter_id', 'location', 'display_name', 'order',
+                'visible_to_staff_only', 'graded', 'format', 'start', 'due')
+    )
+    verticals = list(
+        Vertical.objects.filter(sequential__chapter__course_id=course.pk)
+        .order_by('order', 'pk')
+        .values('id', 'sequential_id', 'location', 'display_name', 'order',
+                'visible_to_staff_only')
+    )
+    xblocks = list(
+        XBlock.objects.filter(vertical__sequential__chapter__course_id=course.pk)
+        .order_by('order', 'pk')
+        .values('vertical_id', 'location', 'category', 'display_name', 'order',
+                'visible_to_staff_only', 'weight')
+    )
+
+    chapter_locations = {row['id']: row['location'] for row in chapters}
+    sequential_locations = {row['id']: row['location'] for row in sequentials}
+    vertical_locations = {row['id']: row['location'] for row in verticals}
+
+    children = {}
+    for parent_map, rows, parent_key in (
+        (chapter_locations, sequentials, 'chapter_id'),
+        (sequential_locations, verticals, 'sequential_id'),
+        (vertical_locations, xblocks, 'vertical_id'),
+    ):
+        for row in rows:
+            children.setdefault(parent_map[row[parent_key]], []).append(row['location'])
+
+    blocks = []
+    blocks_by_location = {}
+
+    def add(row, block_type, parent):
+        location = row['location']
+        ancestors = ()
+        if parent is not None:
+            ancestors = blocks_by_location[parent].ancestors + (parent,)
+        node = BlockNode(
+            location=location,
+            block_type=block_type,
+            display_name=row['display_name'],
+            parent=parent,
+            ancestors=ancestors,
+            children=tuple(children.get(location, ())),
+            order=row['order'],
+            visible_to_staff_only=row['visible_to_staff_only'],
+            graded=row.get('graded', False),
+            format=row.get('format', ''),
+            start=row.get('start'),
+            due=row.get('due'),
+            weight=row.get('weight'),
+        )
+        blocks_by_location[location] = node
+        blocks.append(node)
+
+    for row in chapters:
+        add(row, 'chapter', None)
+    for row in sequentials:
+        add(row, 'sequential', chapter_locations[row['chapter_id']])
+    for row in verticals:
+        add(row, 'vertical', sequential_locations[row['sequential_id']])
+    for row in xblocks:
+        add(row, row['category'], vertical_locations[row['vertical_id']])
+
+    return CourseStructure(
+        course_id=course.course_id,
+        course_pk=course.pk,
+        version=make_version(course.version, course.modified),
+        chapters=tuple(row['location'] for row in chapters),
+        blocks=tuple(blocks),
+    )
+
+
+def get_course_structure(course_id=None, course_pk=None):
+    """
+    Return the cached ``CourseStructure`` for ``course_id`` (or ``course_pk``).
+
+    A cache hit costs a single indexed lookup of the course's version; misses
+    fall through the local LRU, then the shared cache, then the database.
+    Raises ``Course.DoesNotExist`` for unknown courses.
+    """
+    lookup = {'pk': course_pk} if course_pk is not None else {'course_id': course_id}
+    course = Course.objects.only('id', 'course_id', 'version', 'modified').get(**lookup)
+    course_id = course.course_id
+    version = make_version(course.version, course.modified)
+
+    structure = _local_cache.get(course_id, version)
+    if structure is not None:
+        return structure
+
+    key = _cache_key(course_id, version)
+    structure = cache.get(key)
+    if structure is None:
+        structure = load_course_structure(course)
+        cache.set(key, structure, getattr(settings, 'COURSE_STRUCTURE_CACHE_TIMEOUT', 3600))
+
+    _local_cache.set(structure)
+    return structure
+
+
+def invalidate_course_structure(course_id):
+    """Drop the process-local copy; the shared entry is superseded by the new version."""
+    _local_cache.discard(course_id)
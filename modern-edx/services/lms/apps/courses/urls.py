@@ -1,6 +1,7 @@
 """
 URL configuration for courses app.
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -12,12 +13,23 @@ router = DefaultRouter()
 router.register(r'', views.CourseViewSet, basename='course')
 
 urlpatterns = [
+    # API views (ahead of the <course_id> catch-all)
+    path('api/', include(router.urls)),
+
     # Web views
     path('', views.course_catalog, name='catalog'),
-    path('my-courses/', views.my_courses, name='my_courses'),
-    path('<str:course_id>/', views.course_detail, name='detail'),
-    path('<str:course_id>/progress/', views.course_progress, name='progress'),
-    
-    # API views
-    path('api/', include(router.urls)),
+    path('certificates/verify/<uuid:verify_uuid>/', views.certificate_verify, name='certificate_verify'),
 ]
+
+if settings.LMS_ASYNC_VIEWS:
+    urlpatterns += [
+        path('my-courses/', views.my_courses_async, name='my_courses'),
+        path('<str:course_id>/', views.course_detail_async, name='detail'),
+        path('<str:course_id>/progress/', views.course_progress_async, name='progress'),
+    ]
+else:
+    urlpatterns += [
+        path('my-courses/', views.my_courses, name='my_courses'),
+        path('<str:course_id>/', views.course_detail, name='detail'),
+        path('<str:course_id>/progress/', views.course_progress, name='progress'),
+    ]
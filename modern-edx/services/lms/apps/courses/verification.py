@@ -0,0 +1,94 @@
+"""
+Public certificate verification for Modern edX LMS.
+
+Verification pages are read-mostly and crawled constantly, so the
+serialized payload for each ``verify_uuid`` is cached read-through, and
+unknown UUIDs are cached as a miss for a shorter time. Only issued
+(``downloadable``) certificates are public; any other status, whose row
+may carry a failing grade, is served exactly like an unknown UUID.
+
+Any write to a certificate drops its entry once the write commits:
+``post_save``/``post_delete`` handle single saves, and the bulk paths in
+``apps.courses.certificates`` call ``invalidate_certificate_verification``
+themselves.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import GeneratedCertificate
+
+VALID_STATUS = 'downloadable'
+
+_MISSING = 'missing'
+
+
+def _key(verify_uuid):
+    return f'certificate_verify:{verify_uuid}'
+
+
+def verification_payload(certificate):
+    """Public fields of ``certificate``; it must have user and course loaded."""
+    user = certificate.user
+    return {
+        'verify_uuid': str(certificate.verify_uuid),
+        'name': certificate.name or user.get_full_name() or user.username,
+        'course_id': certificate.course.course_id,
+        'course_name': certificate.course.display_name,
+        'org': certificate.course.org,
+        'mode': certificate.mode,
+        'grade': certificate.grade,
+        'status': certificate.status,
+        'is_valid': certificate.status == VALID_STATUS,
+        'issued': certificate.modified_date,
+    }
+
+
+def _load(verify_uuid):
+    certificate = (
+        GeneratedCertificate.objects.select_related('user', 'course')
+        .only(
+            'verify_uuid', 'name', 'mode', 'grade', 'status', 'modified_date',
+            'user__username', 'user__first_name', 'user__last_name',
+            'course__course_id', 'course__display_name', 'course__org',
+        )
+        .filter(verify_uuid=verify_uuid, status=VALID_STATUS)
+        .first()
+    )
+    return verification_payload(certificate) if certificate else None
+
+
+def get_certificate_verification(verify_uuid):
+    """
+    Verification payload for ``verify_uuid``, or ``None`` when no issued
+    certificate has it.
+    """
+    try:
+        verify_uuid = uuid.UUID(str(verify_uuid))
+    except ValueError:
+        return None
+
+    key = _key(verify_uuid)
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == _MISSING else cached
+
+    payload = _load(verify_uuid)
+    if payload is None:
+        cache.set(key, _MISSING, getattr(settings, 'CERTIFICATE_VERIFY_MISS_CACHE_TIMEOUT', 300))
+    else:
+        cache.set(key, payload, getattr(settings, 'CERTIFICATE_VERIFY_CACHE_TIMEOUT', 86400))
+    return payload
+
+
+def invalidate_certificate_verification(*verify_uuids):
+    """
+    Drop cached verification entries (hits and misses) for ``verify_uuids``
+    when the current transaction commits, so a read racing the write can't
+    cache the old row again after the drop.
+    """
+    if verify_uuids:
+        keys = [_key(verify_uuid) for verify_uuid in verify_uuids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,21 +1,52 @@
 """
 Course views for Modern edX LMS.
 """
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from lms.profiling import query_budget
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .bulk_enroll import BulkEnrollmentError, parse_csv, parse_json, stream_bulk_enroll
+from .catalog import InvalidCursor, get_catalog_page, parse_filters
+from .decorators import async_login_required
+from .enrollment_counts import enrollment_count, enrollment_counts_by_mode
 from .models import Course, CourseEnrollment, StudentModule, GeneratedCertificate
+from .progress import get_course_progress
+from .search import search_courses
+from .structure import get_course_structure
+from .verification import get_certificate_verification
+
+CATALOG_PAGE_SIZE = 12
+
 
 def course_catalog(request):
-    """Course catalog page."""
-    courses = Course.objects.filter(catalog_visibility__in=['both', 'about'])[:12]
+    """Course catalog page, keyset-paginated with ?cursor=."""
+    try:
+        page = get_catalog_page(
+            parse_filters(request.GET), cursor=request.GET.get('cursor'), page_size=CATALOG_PAGE_SIZE
+        )
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+    pacing = dict(Course.PACING_CHOICES)
+    courses = [dict(row, pacing_display=pacing.get(row['pacing'], row['pacing'])) for row in page['results']]
+    next_url = None
+    if page['next_cursor']:
+        next_url = replace_query_param(request.get_full_path(), 'cursor', page['next_cursor'])
     context = {
         'title': 'Course Catalog',
         'courses': courses,
-        'total_courses': Course.objects.count(),
+        'total_courses': page['count'],
+        'next_url': next_url,
     }
     return render(request, 'courses/catalog.html', context)
 
@@ -37,9 +68,11 @@ def course_detail(request, course_id):
         'course': course,
         'is_enrolled': is_enrolled,
         'enrollment': enrollment,
+        'enrollment_count': enrollment_count(course.pk),
     }
     return render(request, 'courses/detail.html', context)
 
+@query_budget(4)
 @login_required
 def my_courses(request):
     """Student's enrolled courses."""
@@ -54,37 +87,136 @@ def my_courses(request):
     }
     return render(request, 'courses/my_courses.html', context)
 
+@query_budget(12)
 @login_required  
 def course_progress(request, course_id):
     """Course progress page."""
     course = get_object_or_404(Course, course_id=course_id)
     enrollment = get_object_or_404(CourseEnrollment, user=request.user, course=course)
     
-    # Get student modules for progress tracking
-    modules = StudentModule.objects.filter(
-        student=request.user,
-        course=course
-    ).order_by('modified')
-    
     context = {
         'title': f'Progress: {course.display_name}',
         'course': course,
         'enrollment': enrollment,
-        'modules': modules,
+        'progress': get_course_progress(request.user.pk, course_pk=course.pk),
     }
     return render(request, 'courses/progress.html', context)
 
+def certificate_verify(request, verify_uuid):
+    """Public certificate verification, served from the verification cache."""
+    payload = get_certificate_verification(verify_uuid)
+    if payload is None:
+        return JsonResponse({'detail': 'Certificate not found.'}, status=404)
+    return JsonResponse(payload)
+
+# Async read path (served when LMS_ASYNC_VIEWS is on, ideally under ASGI)
+async def _aget_course(course_id):
+    try:
+        return await Course.objects.aget(course_id=course_id)
+    except Course.DoesNotExist:
+        raise Http404('No Course matches the given query.')
+
+async def _aenrollment(user_id, course):
+    if user_id is None:
+        return None
+    return await CourseEnrollment.objects.filter(
+        user_id=user_id, course=course
+    ).select_related('mode').afirst()
+
+async def _arender(request, template_name, context):
+    # Rendering resolves request.user and other lazy values; keep it off the event loop.
+    return await sync_to_async(render)(request, template_name, context)
+
+async def course_detail_async(request, course_id):
+    """Async course detail page."""
+    course = await _aget_course(course_id)
+    user_id = await sync_to_async(lambda: request.user.pk)()
+
+    enrollment, count = await asyncio.gather(
+        _aenrollment(user_id, course),
+        sync_to_async(enrollment_count)(course.pk),
+    )
+
+    context = {
+        'title': course.display_name,
+        'course': course,
+        'is_enrolled': enrollment is not None,
+        'enrollment': enrollment,
+        'enrollment_count': count,
+    }
+    return await _arender(request, 'courses/detail.html', context)
+
+@query_budget(4)
+@async_login_required
+async def my_courses_async(request):
+    """Async list of the student's enrolled courses."""
+    enrollments = [
+        enrollment async for enrollment in CourseEnrollment.objects.filter(
+            user_id=request.user.pk,
+            is_active=True
+        ).select_related('course', 'mode')
+    ]
+
+    context = {
+        'title': 'My Courses',
+        'enrollments': enrollments,
+    }
+    return await _arender(request, 'courses/my_courses.html', context)
+
+@query_budget(12)
+@async_login_required
+async def course_progress_async(request, course_id):
+    """Async course progress page."""
+    course = await _aget_course(course_id)
+    enrollment, progress = await asyncio.gather(
+        _aenrollment(request.user.pk, course),
+        sync_to_async(get_course_progress)(request.user.pk, course_pk=course.pk),
+    )
+    if enrollment is None:
+        raise Http404('No CourseEnrollment matches the given query.')
+
+    context = {
+        'title': f'Progress: {course.display_name}',
+        'course': course,
+        'enrollment': enrollment,
+        'progress': progress,
+    }
+    return await _arender(request, 'courses/progress.html', context)
+
 # API Views (basic implementation)
 class CourseViewSet(viewsets.ModelViewSet):
     """Course API ViewSet."""
     queryset = Course.objects.all()
     
+    def _page_size(self, request):
+        try:
+            page_size = int(request.query_params.get('page_size', settings.COURSE_CATALOG_PAGE_SIZE))
+        except ValueError:
+            page_size = settings.COURSE_CATALOG_PAGE_SIZE
+        return max(1, min(page_size, settings.COURSE_CATALOG_MAX_PAGE_SIZE))
+
     def list(self, request):
-        courses = self.queryset.values(
-            'course_id', 'display_name', 'short_description', 
-            'org', 'start', 'end'
-        )[:20]
-        return Response(list(courses))
+        """Keyset-paginated catalog; filter with ?org=&pacing=&level_type=&catalog_visibility=."""
+        page_size = self._page_size(request)
+        try:
+            page = get_catalog_page(
+                parse_filters(request.query_params),
+                cursor=request.query_params.get('cursor'),
+                page_size=page_size,
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+
+        next_url = None
+        if page['next_cursor']:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'cursor', page['next_cursor']
+            )
+        return Response({
+            'count': page['count'],
+            'next': next_url,
+            'results': page['results'],
+        })
     
     def retrieve(self, request, pk=None):
         course = get_object_or_404(Course, course_id=pk)
@@ -97,5 +229,84 @@ class CourseViewSet(viewsets.ModelViewSet):
             'start': course.start,
             'end': course.end,
             'pacing': course.pacing,
+            'enrollment_count': enrollment_count(course.pk),
+            'enrollment_count_by_mode': enrollment_counts_by_mode(course.pk),
         }
         return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search: ?q=<terms>&page=&page_size= plus catalog filters."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'detail': 'The q parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = self._page_size(request)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+
+        results = search_courses(
+            query,
+            filters=parse_filters(request.query_params),
+            offset=(page - 1) * page_size,
+            limit=page_size,
+        )
+        url = request.build_absolute_uri()
+        next_url = previous_url = None
+        if page * page_size < results.total:
+            next_url = replace_query_param(url, 'page', page + 1)
+        if page > 1:
+            previous_url = (
+                replace_query_param(url, 'page', page - 1) if page > 2
+                else remove_query_param(url, 'page')
+            )
+        return Response({
+            'count': results.total,
+            'next': next_url,
+            'previous': previous_url,
+            'results': results.hits,
+        })
+
+    @action(detail=True, methods=['get'])
+    def outline(self, request, pk=None):
+        try:
+            structure = get_course_structure(pk)
+        except Course.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(structure.to_dict())
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def progress(self, request, pk=None):
+        """The requesting learner's completion and grade percentages per chapter and subsection."""
+        course = get_object_or_404(Course.objects.only('id', 'course_id'), course_id=pk)
+        if not CourseEnrollment.objects.filter(user=request.user, course=course, is_active=True).exists():
+            raise NotFound('Not enrolled in this course.')
+        return Response(get_course_progress(request.user.pk, course_pk=course.pk).to_dict())
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk_enroll(self, request, pk=None):
+        """
+        Enroll many users at once from a JSON list or a CSV body/upload.
+
+        Streams NDJSON: a ``progress`` line per batch with per-row results,
+        then a ``summary`` line.
+        """
+        course = get_object_or_404(Course, course_id=pk)
+        mode = request.query_params.get('mode')
+        try:
+            if request.content_type.startswith('text/csv'):
+                requests = parse_csv(request.body.decode('utf-8-sig'))
+            elif 'file' in request.FILES:
+                requests = parse_csv(request.FILES['file'].read().decode('utf-8-sig'))
+                mode = mode or request.data.get('mode')
+            else:
+                requests = parse_json(request.data)
+                if isinstance(request.data, dict):
+                    mode = mode or request.data.get('mode')
+            lines = stream_bulk_enroll(
+                course, requests, mode=mode or 'audit', batch_size=settings.BULK_ENROLL_BATCH_SIZE
+            )
+        except BulkEnrollmentError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
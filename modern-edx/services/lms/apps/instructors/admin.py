@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import InstructorProfile, TeachingCredential, InstructorRating, InstructorAnalytics
+from .models import (
+    InstructorProfile, TeachingCredential, InstructorRating, InstructorAnalytics, InstructorRollupRun,
+    InstructorRatingAggregate,
+)
 
 @admin.register(InstructorProfile)
 class InstructorProfileAdmin(admin.ModelAdmin):
@@ -22,8 +25,20 @@ class InstructorRatingAdmin(admin.ModelAdmin):
     search_fields = ['instructor__user__username', 'student__username', 'course__display_name']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(InstructorRatingAggregate)
+class InstructorRatingAggregateAdmin(admin.ModelAdmin):
+    list_display = ['instructor', 'course', 'count', 'overall_rating_sum', 'recommend_count']
+    search_fields = ['instructor__user__username']
+    readonly_fields = [field.name for field in InstructorRatingAggregate._meta.fields]
+
 @admin.register(InstructorAnalytics)
 class InstructorAnalyticsAdmin(admin.ModelAdmin):
     list_display = ['instructor', 'active_courses_count', 'current_active_students', 'student_satisfaction_score']
     search_fields = ['instructor__user__username']
     readonly_fields = ['last_updated']
+
+@admin.register(InstructorRollupRun)
+class InstructorRollupRunAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'full', 'instructors_updated', 'duration', 'high_water_mark']
+    list_filter = ['full']
+    readonly_fields = ['started_at', 'finished_at', 'duration', 'high_water_mark', 'full', 'instructors_updated']
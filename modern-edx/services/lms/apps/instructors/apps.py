@@ -4,3 +4,6 @@ class InstructorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.instructors'
     verbose_name = 'Instructors'
+
+    def ready(self):
+        from . import signals  # noqa: F401
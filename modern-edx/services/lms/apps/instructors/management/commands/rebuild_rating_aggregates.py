@@ -0,0 +1,18 @@
+"""
+Recompute InstructorRatingAggregate rows from InstructorRating.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.instructors.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-instructor and per-course rating aggregates from the ratings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('instructor_ids', nargs='*', type=int,
+                            help='Instructor profile ids to rebuild; defaults to all instructors.')
+
+    def handle(self, *args, **options):
+        written = rebuild_rating_aggregates(options['instructor_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} rating aggregates.'))
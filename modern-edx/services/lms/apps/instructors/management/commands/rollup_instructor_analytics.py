@@ -0,0 +1,22 @@
+"""
+Recompute instructor analytics rollups.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.instructors.rollups import run_instructor_rollup
+
+
+class Command(BaseCommand):
+    help = 'Refresh InstructorAnalytics for instructors changed since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every instructor instead of only changed ones.')
+
+    def handle(self, *args, **options):
+        run = run_instructor_rollup(full=options['full'])
+        kind = 'Full' if run.full else 'Incremental'
+        self.stdout.write(self.style.SUCCESS(
+            f'{kind} rollup updated {run.instructors_updated} instructors '
+            f'in {run.duration.total_seconds():.2f}s.'
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instructors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstructorRollupRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+                ('duration', models.DurationField()),
+                ('high_water_mark', models.DateTimeField()),
+                ('full', models.BooleanField(default=False)),
+                ('instructors_updated', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Instructor Rollup Run',
+                'verbose_name_plural': 'Instructor Rollup Runs',
+                'ordering': ['-started_at'],
+                'get_latest_by': 'started_at',
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+
+DIMENSIONS = ('overall_rating', 'teaching_quality', 'responsiveness', 'course_organization')
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    InstructorRating = apps.get_model('instructors', 'InstructorRating')
+    InstructorRatingAggregate = apps.get_model('instructors', 'InstructorRatingAggregate')
+    annotations = {
+        'count': Count('id'),
+        'recommend_count': Count('id', filter=Q(would_recommend=True)),
+        **{f'{dimension}_sum': Sum(dimension) for dimension in DIMENSIONS},
+        **{f'overall_{stars}': Count('id', filter=Q(overall_rating=stars)) for stars in range(1, 6)},
+    }
+    rows = [
+        InstructorRatingAggregate(**row)
+        for group_by in (('instructor_id',), ('instructor_id', 'course_id'))
+        for row in InstructorRating.objects.values(*group_by).annotate(**annotations).order_by()
+    ]
+    InstructorRatingAggregate.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_instructors'),
+        ('instructors', '0002_instructor_rollup_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstructorRatingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('overall_rating_sum', models.IntegerField(default=0)),
+                ('teaching_quality_sum', models.IntegerField(default=0)),
+                ('responsiveness_sum', models.IntegerField(default=0)),
+                ('course_organization_sum', models.IntegerField(default=0)),
+                ('recommend_count', models.IntegerField(default=0)),
+                ('overall_1', models.IntegerField(default=0)),
+                ('overall_2', models.IntegerField(default=0)),
+                ('overall_3', models.IntegerField(default=0)),
+                ('overall_4', models.IntegerField(default=0)),
+                ('overall_5', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_aggregates', to='instructors.instructorprofile')),
+            ],
+            options={
+                'verbose_name': 'Instructor Rating Aggregate',
+                'verbose_name_plural': 'Instructor Rating Aggregates',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='instructorratingaggregate',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', False)), fields=('instructor', 'course'), name='instructor_rating_aggregate_course_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='instructorratingaggregate',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', True)), fields=('instructor',), name='instructor_rating_aggregate_total_uniq'),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 """
 Instructor models for Modern edX LMS.
 """
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
@@ -78,29 +79,15 @@ class InstructorProfile(models.Model):
         return f"Instructor: {self.user.get_display_name()}"
     
     def update_analytics(self):
-        """Update computed analytics fields."""
-        from apps.courses.models import Course, Enrollment
+        """Recompute this instructor's rollups (see ``apps.instructors.rollups``)."""
+        from .rollups import refresh_instructor_analytics
         
-        # Update total courses created
-        self.total_courses_created = Course.objects.filter(
-            instructor=self.user,
-            is_active=True
-        ).count()
-        
-        # Update total students taught
-        courses = Course.objects.filter(instructor=self.user)
-        self.total_students_taught = Enrollment.objects.filter(
-            course__in=courses,
-            status='enrolled'
-        ).values('user').distinct().count()
-        
-        # Update average rating (placeholder for future rating system)
-        # This would be calculated from course ratings
-        
-        self.save(update_fields=[
-            'total_courses_created', 
+        refresh_instructor_analytics([self.pk])
+        self.refresh_from_db(fields=[
+            'total_courses_created',
             'total_students_taught',
-            'updated_at'
+            'average_course_rating',
+            'updated_at',
         ])
 
 class TeachingCredential(models.Model):
@@ -201,6 +188,131 @@ class InstructorRating(models.Model):
     def __str__(self):
         return f"Rating for {self.instructor.user.get_display_name()} - {self.overall_rating}/5"
 
+    def _aggregate_values(self):
+        return (self.instructor_id, self.course_id, self.overall_rating, self.teaching_quality,
+                self.responsiveness, self.course_organization, self.would_recommend)
+    
+    def save(self, *args, **kwargs):
+        """Save and move the rating between aggregates in one transaction."""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                # Lock the row so concurrent edits move it between aggregates one at a time.
+                previous = InstructorRating.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'instructor_id', 'course_id', *InstructorRatingAggregate.DIMENSIONS, 'would_recommend'
+                ).first()
+            super().save(*args, **kwargs)
+            current = self._aggregate_values()
+            if previous != current:
+                if previous is not None:
+                    InstructorRatingAggregate.apply(*previous, sign=-1)
+                InstructorRatingAggregate.apply(*current, sign=1)
+
+class InstructorRatingAggregate(models.Model):
+    """
+    Running sums of ``InstructorRating`` per instructor (``course`` unset)
+    and per instructor and course.
+    
+    Kept in step by ``InstructorRating.save`` and, for every kind of delete,
+    ``apps.instructors.signals.rating_deleted``; bulk creates and updates
+    bypass those, so ``apps.instructors.ratings.rebuild_rating_aggregates``
+    recomputes the rows from scratch.
+    """
+    
+    DIMENSIONS = ('overall_rating', 'teaching_quality', 'responsiveness', 'course_organization')
+    
+    instructor = models.ForeignKey(
+        InstructorProfile,
+        on_delete=models.CASCADE,
+        related_name='rating_aggregates'
+    )
+    course = models.ForeignKey(
+        'courses.Course',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    count = models.IntegerField(default=0)
+    overall_rating_sum = models.IntegerField(default=0)
+    teaching_quality_sum = models.IntegerField(default=0)
+    responsiveness_sum = models.IntegerField(default=0)
+    course_organization_sum = models.IntegerField(default=0)
+    recommend_count = models.IntegerField(default=0)
+    
+    # Histogram of overall_rating
+    overall_1 = models.IntegerField(default=0)
+    overall_2 = models.IntegerField(default=0)
+    overall_3 = models.IntegerField(default=0)
+    overall_4 = models.IntegerField(default=0)
+    overall_5 = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('Instructor Rating Aggregate')
+        verbose_name_plural = _('Instructor Rating Aggregates')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['instructor', 'course'],
+                condition=Q(course__isnull=False),
+                name='instructor_rating_aggregate_course_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['instructor'],
+                condition=Q(course__isnull=True),
+                name='instructor_rating_aggregate_total_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        scope = f"course {self.course_id}" if self.course_id else 'all courses'
+        return f"Ratings for instructor {self.instructor_id} ({scope}): {self.count}"
+    
+    @staticmethod
+    def deltas(overall_rating, teaching_quality, responsiveness, course_organization,
+               would_recommend, sign=1):
+        """Field increments contributed by one rating."""
+        return {
+            'count': sign,
+            'overall_rating_sum': sign * overall_rating,
+            'teaching_quality_sum': sign * teaching_quality,
+            'responsiveness_sum': sign * responsiveness,
+            'course_organization_sum': sign * course_organization,
+            'recommend_count': sign if would_recommend else 0,
+            f'overall_{overall_rating}': sign,
+        }
+    
+    @classmethod
+    def apply(cls, instructor_id, course_id, *values, sign=1):
+        """Add (``sign=1``) or remove (``sign=-1``) one rating from both of its aggregates."""
+        deltas = cls.deltas(*values, sign=sign)
+        cls.adjust(instructor_id, None, deltas)
+        cls.adjust(instructor_id, course_id, deltas)
+    
+    @classmethod
+    def adjust(cls, instructor_id, course_id, deltas):
+        # course_id=None filters on IS NULL, matching the instructor-wide row.
+        key = {'instructor_id': instructor_id, 'course_id': course_id}
+        increments = {name: F(name) + delta for name, delta in deltas.items() if delta}
+        # A missing row is never created to remove a rating: it was deleted
+        # along with its instructor or course.
+        if cls.objects.filter(**key).update(**increments) or deltas['count'] < 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**key, **deltas)
+        except IntegrityError:
+            # Another writer created the row first.
+            cls.objects.filter(**key).update(**increments)
+    
+    def average(self, dimension):
+        if not self.count:
+            return None
+        return round(getattr(self, f'{dimension}_sum') / self.count, 2)
+    
+    @property
+    def histogram(self):
+        return {stars: getattr(self, f'overall_{stars}') for stars in range(1, 6)}
+
 class InstructorAnalytics(models.Model):
     """Analytics data for instructors."""
     
@@ -250,3 +362,25 @@ class InstructorAnalytics(models.Model):
     
     def __str__(self):
         return f"Analytics for {self.instructor.user.get_display_name()}"
+
+
+class InstructorRollupRun(models.Model):
+    """One pass of the instructor analytics rollup job."""
+    
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    duration = models.DurationField()
+    # Changes modified at or after this point are picked up by the next run.
+    high_water_mark = models.DateTimeField()
+    full = models.BooleanField(default=False)
+    instructors_updated = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('Instructor Rollup Run')
+        verbose_name_plural = _('Instructor Rollup Runs')
+        ordering = ['-started_at']
+        get_latest_by = 'started_at'
+    
+    def __str__(self):
+        kind = 'full' if self.full else 'incremental'
+        return f"{kind} rollup at {self.started_at:%Y-%m-%d %H:%M:%S} ({self.instructors_updated} instructors)"
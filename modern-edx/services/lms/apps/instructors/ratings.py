@@ -0,0 +1,87 @@
+"""
+Instructor rating summaries for Modern edX LMS.
+
+Summaries and histograms are read from ``InstructorRatingAggregate``
+rows, which ``InstructorRating.save`` and the rating ``post_delete``
+handler keep in step, so serving them never scans the ratings table.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import InstructorRating, InstructorRatingAggregate
+
+_SUM_FIELDS = tuple(f'{dimension}_sum' for dimension in InstructorRatingAggregate.DIMENSIONS)
+
+
+def summarize(aggregate):
+    """Plain dict summary of one aggregate row (or of no ratings at all)."""
+    if aggregate is None:
+        aggregate = InstructorRatingAggregate()
+    return {
+        'count': aggregate.count,
+        'averages': {
+            dimension: aggregate.average(dimension)
+            for dimension in InstructorRatingAggregate.DIMENSIONS
+        },
+        'recommend_percent': (
+            round(100.0 * aggregate.recommend_count / aggregate.count, 1) if aggregate.count else None
+        ),
+        'histogram': aggregate.histogram,
+    }
+
+
+def instructor_rating_summary(instructor_id, course_id=None):
+    """Summary across all of the instructor's courses, or for one course."""
+    aggregate = InstructorRatingAggregate.objects.filter(
+        instructor_id=instructor_id, course_id=course_id
+    ).first()
+    return summarize(aggregate)
+
+
+def course_rating_summaries(instructor_id):
+    """Per-course summaries, most rated first."""
+    aggregates = (
+        InstructorRatingAggregate.objects
+        .filter(instructor_id=instructor_id, course__isnull=False, count__gt=0)
+        .select_related('course')
+        .only('course__course_id', 'course__display_name', 'count', 'recommend_count',
+              *_SUM_FIELDS, *(f'overall_{stars}' for stars in range(1, 6)))
+        .order_by('-count', 'course_id')
+    )
+    return [
+        dict(summarize(aggregate), course_id=aggregate.course.course_id,
+             display_name=aggregate.course.display_name)
+        for aggregate in aggregates
+    ]
+
+
+def _aggregate_rows(queryset, group_by):
+    annotations = {
+        'count': Count('id'),
+        'recommend_count': Count('id', filter=Q(would_recommend=True)),
+        **{f'{dimension}_sum': Sum(dimension) for dimension in InstructorRatingAggregate.DIMENSIONS},
+        **{f'overall_{stars}': Count('id', filter=Q(overall_rating=stars)) for stars in range(1, 6)},
+    }
+    return queryset.values(*group_by).annotate(**annotations).order_by()
+
+
+def rebuild_rating_aggregates(instructor_ids=None):
+    """
+    Recompute aggregates from ``InstructorRating`` for ``instructor_ids``
+    (all instructors by default); returns the number of rows written.
+    """
+    ratings = InstructorRating.objects.all()
+    aggregates = InstructorRatingAggregate.objects.all()
+    if instructor_ids is not None:
+        ratings = ratings.filter(instructor_id__in=instructor_ids)
+        aggregates = aggregates.filter(instructor_id__in=instructor_ids)
+
+    rows = [
+        InstructorRatingAggregate(**row)
+        for group_by in (('instructor_id',), ('instructor_id', 'course_id'))
+        for row in _aggregate_rows(ratings, group_by)
+    ]
+    with transaction.atomic():
+        aggregates.delete()
+        InstructorRatingAggregate.objects.bulk_create(rows)
+    return len(rows)
@@ -0,0 +1,213 @@
+"""
+Instructor analytics rollups for Modern edX LMS.
+
+``run_instructor_rollup`` recomputes ``InstructorAnalytics`` and the
+computed ``InstructorProfile`` fields for a whole batch of instructors at
+once: every metric comes from one grouped aggregate over ``Course``,
+``CourseEnrollment`` or ``GeneratedCertificate`` (ratings are read from
+``InstructorRatingAggregate``), and results are written back with
+``bulk_update``.
+
+Runs are incremental. Each ``InstructorRollupRun`` stores the time it
+started as its high-water mark, and the next run only revisits instructors
+whose courses, enrollments, certificates or ratings were modified since
+then (less ``INSTRUCTOR_ROLLUP_OVERLAP`` seconds for transactions that
+were still open). Deletions and course staff changes touch the affected
+profiles' ``updated_at`` (see ``apps.instructors.signals``); a ``full``
+run recomputes everyone regardless.
+"""
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.courses.models import Course, CourseEnrollment, GeneratedCertificate
+
+from .models import InstructorAnalytics, InstructorProfile, InstructorRatingAggregate, InstructorRollupRun
+
+CERTIFIED_STATUS = 'downloadable'
+ANALYTICS_FIELDS = (
+    'active_courses_count', 'completed_courses_count', 'current_active_students',
+    'student_completion_rate', 'student_satisfaction_score', 'last_updated',
+)
+PROFILE_FIELDS = ('total_courses_created', 'total_students_taught', 'average_course_rating')
+
+_CENT = Decimal('0.01')
+
+
+@dataclass(frozen=True)
+class InstructorMetrics:
+    courses: int = 0
+    active_courses: int = 0
+    students: int = 0
+    active_students: int = 0
+    enrollments: int = 0
+    certificates: int = 0
+    rating: Decimal = Decimal('0.00')
+
+    @property
+    def completion_rate(self):
+        if not self.enrollments:
+            return Decimal('0.00')
+        rate = Decimal(100 * min(self.certificates, self.enrollments)) / self.enrollments
+        return rate.quantize(_CENT)
+
+
+def _grouped(queryset, key, **aggregates):
+    return {
+        row.pop(key): row
+        for row in queryset.values(key).annotate(**aggregates).order_by()
+        if row[key] is not None
+    }
+
+
+def compute_instructor_metrics(profiles, now=None):
+    """
+    ``InstructorMetrics`` per profile pk, with one query per source table
+    for the whole batch.
+    """
+    now = now or timezone.now()
+    by_user = {profile.user_id: profile.pk for profile in profiles}
+    user_ids = list(by_user)
+
+    courses = _grouped(
+        Course.objects.filter(instructors__in=user_ids), 'instructors',
+        total=Count('id', distinct=True),
+        active=Count('id', distinct=True, filter=Q(end__isnull=True) | Q(end__gt=now)),
+    )
+    enrollments = _grouped(
+        CourseEnrollment.objects.filter(course__instructors__in=user_ids), 'course__instructors',
+        students=Count('user', distinct=True),
+        active_students=Count('user', distinct=True, filter=Q(is_active=True)),
+        enrollments=Count('id'),
+    )
+    certificates = _grouped(
+        GeneratedCertificate.objects.filter(course__instructors__in=user_ids, status=CERTIFIED_STATUS),
+        'course__instructors',
+        certificates=Count('id'),
+    )
+    ratings = {
+        aggregate.instructor_id: aggregate.average('overall_rating')
+        for aggregate in InstructorRatingAggregate.objects.filter(
+            instructor_id__in=list(by_user.values()), course__isnull=True
+        ).only('instructor_id', 'count', 'overall_rating_sum')
+    }
+
+    metrics = {}
+    for user_id, profile_pk in by_user.items():
+        course_row = courses.get(user_id, {})
+        enrollment_row = enrollments.get(user_id, {})
+        rating = ratings.get(profile_pk)
+        metrics[profile_pk] = InstructorMetrics(
+            courses=course_row.get('total', 0),
+            active_courses=course_row.get('active', 0),
+            students=enrollment_row.get('students', 0),
+            active_students=enrollment_row.get('active_students', 0),
+            enrollments=enrollment_row.get('enrollments', 0),
+            certificates=certificates.get(user_id, {}).get('certificates', 0),
+            rating=Decimal(str(rating)).quantize(_CENT) if rating is not None else Decimal('0.00'),
+        )
+    return metrics
+
+
+def refresh_instructor_analytics(profile_ids, now=None):
+    """Recompute and store the rollups of ``profile_ids``; returns how many were written."""
+    now = now or timezone.now()
+    batch_size = getattr(settings, 'INSTRUCTOR_ROLLUP_BATCH_SIZE', 500)
+    profile_ids = list(profile_ids)
+    written = 0
+    for start in range(0, len(profile_ids), batch_size):
+        profiles = list(
+            InstructorProfile.objects.filter(pk__in=profile_ids[start:start + batch_size])
+            .only('pk', 'user_id', *PROFILE_FIELDS)
+        )
+        if profiles:
+            _write(profiles, compute_instructor_metrics(profiles, now), now)
+            written += len(profiles)
+    return written
+
+
+def _write(profiles, metrics, now):
+    with transaction.atomic():
+        existing = {
+            analytics.instructor_id: analytics
+            for analytics in InstructorAnalytics.objects.filter(instructor__in=profiles)
+        }
+        updated, created = [], []
+        for profile in profiles:
+            values = metrics[profile.pk]
+            profile.total_courses_created = values.courses
+            profile.total_students_taught = values.students
+            profile.average_course_rating = values.rating
+
+            analytics = existing.get(profile.pk)
+            if analytics is None:
+                analytics = InstructorAnalytics(instructor=profile)
+                created.append(analytics)
+            else:
+                updated.append(analytics)
+            analytics.active_courses_count = values.active_courses
+            analytics.completed_courses_count = values.courses - values.active_courses
+            analytics.current_active_students = values.active_students
+            analytics.student_completion_rate = values.completion_rate
+            analytics.student_satisfaction_score = values.rating
+            # bulk_update bypasses auto_now.
+            analytics.last_updated = now
+
+        # Profiles keep their updated_at: it marks edits for the next incremental run.
+        InstructorProfile.objects.bulk_update(profiles, PROFILE_FIELDS)
+        if updated:
+            InstructorAnalytics.objects.bulk_update(updated, ANALYTICS_FIELDS)
+        if created:
+            InstructorAnalytics.objects.bulk_create(created)
+
+
+def changed_instructors(since):
+    """Pks of instructor profiles with anything feeding their rollups modified at or after ``since``."""
+    changed_courses = Q(
+        user__taught_courses__in=CourseEnrollment.objects.filter(modified__gte=since).values('course_id')
+    ) | Q(
+        user__taught_courses__in=GeneratedCertificate.objects.filter(modified_date__gte=since).values('course_id')
+    ) | Q(user__taught_courses__modified__gte=since)
+    return list(
+        InstructorProfile.objects.filter(
+            changed_courses
+            | Q(ratings__updated_at__gte=since)
+            | Q(updated_at__gte=since)
+            | Q(analytics__isnull=True)
+        ).values_list('pk', flat=True).distinct()
+    )
+
+
+def run_instructor_rollup(full=False):
+    """
+    Refresh the rollups of every instructor changed since the previous run
+    (or of all instructors when ``full`` or on the first run) and record the
+    run. Returns the ``InstructorRollupRun``.
+    """
+    started_at = timezone.now()
+    started = time.monotonic()
+    previous = InstructorRollupRun.objects.order_by('-started_at').first()
+    if previous is None:
+        full = True
+
+    if full:
+        profile_ids = list(InstructorProfile.objects.order_by('pk').values_list('pk', flat=True))
+    else:
+        overlap = timedelta(seconds=getattr(settings, 'INSTRUCTOR_ROLLUP_OVERLAP', 60))
+        profile_ids = changed_instructors(previous.high_water_mark - overlap)
+
+    updated = refresh_instructor_analytics(profile_ids, now=started_at)
+    return InstructorRollupRun.objects.create(
+        started_at=started_at,
+        finished_at=timezone.now(),
+        duration=timedelta(seconds=time.monotonic() - started),
+        high_water_mark=started_at,
+        full=full,
+        instructors_updated=updated,
+    )
@@ -0,0 +1,88 @@
+"""
+Signal handlers for the instructors app.
+
+Incremental rollups find work by modification timestamps. Deletions and
+course staff changes leave no newer row behind, so they touch the
+affected instructors' profiles instead.
+
+Deleting a course cascades to every enrollment, certificate and rating in
+it, one ``post_delete`` each, so those touches are collected per thread and
+applied with a single UPDATE when the transaction commits.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.courses.models import Course, CourseEnrollment, GeneratedCertificate
+
+from .models import InstructorProfile, InstructorRating, InstructorRatingAggregate
+
+
+_pending = threading.local()
+
+
+def touch_instructors(**lookup):
+    InstructorProfile.objects.filter(**lookup).update(updated_at=timezone.now())
+
+
+def touch_on_commit(profile_ids=(), course_ids=()):
+    """
+    Touch instructor profiles and the instructors of courses once the
+    current transaction commits.
+    """
+    _pending.__dict__.setdefault('profile_ids', set()).update(profile_ids)
+    _pending.__dict__.setdefault('course_ids', set()).update(course_ids)
+    # Every call registers a flush so none is lost to a rolled-back
+    # transaction; the first one to run takes everything pending.
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    profile_ids = _pending.__dict__.pop('profile_ids', ())
+    course_ids = _pending.__dict__.pop('course_ids', ())
+    if profile_ids or course_ids:
+        lookup = Q(pk__in=profile_ids) | Q(pk__in=InstructorProfile.objects.filter(
+            user__taught_courses__in=course_ids
+        ).values('pk'))
+        InstructorProfile.objects.filter(lookup).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+@receiver(post_delete, sender=GeneratedCertificate)
+def course_row_deleted(sender, instance, **kwargs):
+    touch_on_commit(course_ids=[instance.course_id])
+
+
+@receiver(post_delete, sender=InstructorRating)
+def rating_deleted(sender, instance, **kwargs):
+    # Runs for instance, queryset and cascading deletes alike, inside the
+    # deletion's transaction.
+    InstructorRatingAggregate.apply(*instance._aggregate_values(), sign=-1)
+    touch_on_commit(profile_ids=[instance.instructor_id])
+
+
+@receiver(pre_delete, sender=Course)
+def course_deleting(sender, instance, **kwargs):
+    # The staff links are gone by the time the cascade's post_delete
+    # handlers run, so resolve the course's instructors now.
+    touch_on_commit(profile_ids=InstructorProfile.objects.filter(
+        user__taught_courses=instance.pk
+    ).values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Course.instructors.through)
+def course_instructors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    if not reverse:
+        # instance is a Course; pk_set holds user pks.
+        if action == 'pre_clear':
+            touch_instructors(user__taught_courses=instance.pk)
+        else:
+            touch_instructors(user_id__in=pk_set)
+    else:
+        touch_instructors(user_id=instance.pk)
@@ -0,0 +1,205 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.courses.models import Course, CourseEnrollment, CourseMode, GeneratedCertificate
+from . import signals
+from .models import (
+    InstructorAnalytics, InstructorProfile, InstructorRating, InstructorRatingAggregate, InstructorRollupRun,
+)
+from .ratings import instructor_rating_summary
+from .rollups import run_instructor_rollup
+
+
+def make_course(course_id, instructors=(), **kwargs):
+    org, number, run = course_id.split(':', 1)[1].split('+')
+    course = Course.objects.create(course_id=course_id, org=org, course=number, run=run,
+                                   display_name=number, **kwargs)
+    course.instructors.add(*instructors)
+    return course
+
+
+def make_instructor(username):
+    user = User.objects.create_user(username=username, password='test')
+    return InstructorProfile.objects.create(user=user)
+
+
+@override_settings(INSTRUCTOR_ROLLUP_OVERLAP=0)
+class InstructorRollupTest(TestCase):
+    def setUp(self):
+        # Earlier tests roll back without running on_commit hooks, which
+        # leaves their touches pending on this thread.
+        signals._pending.__dict__.clear()
+        now = timezone.now()
+        self.ada = make_instructor('ada')
+        self.alan = make_instructor('alan')
+        self.running = make_course('course-v1:T+Run+2024', [self.ada.user], end=now + timedelta(days=30))
+        self.ended = make_course('course-v1:T+Old+2023', [self.ada.user], end=now - timedelta(days=30))
+        self.other = make_course('course-v1:T+Alan+2024', [self.alan.user])
+        self.learners = [User.objects.create_user(username=f'learner{i}', password='test') for i in range(3)]
+
+    def enroll(self, user, course, is_active=True):
+        mode, _ = CourseMode.objects.get_or_create(
+            course_id=course.course_id, mode_slug='audit', defaults={'mode_display_name': 'Audit'}
+        )
+        return CourseEnrollment.objects.create(user=user, course=course, mode=mode, is_active=is_active)
+
+    def test_full_rollup(self):
+        self.enroll(self.learners[0], self.running)
+        self.enroll(self.learners[1], self.running)
+        self.enroll(self.learners[0], self.ended, is_active=False)
+        GeneratedCertificate.objects.create(
+            user=self.learners[0], course=self.ended, mode='audit', status='downloadable'
+        )
+
+        run = run_instructor_rollup()
+
+        self.assertTrue(run.full)
+        self.assertEqual(run.instructors_updated, 2)
+        self.ada.refresh_from_db()
+        self.assertEqual((self.ada.total_courses_created, self.ada.total_students_taught), (2, 2))
+        analytics = InstructorAnalytics.objects.get(instructor=self.ada)
+        self.assertEqual((analytics.active_courses_count, analytics.completed_courses_count), (1, 1))
+        self.assertEqual(analytics.current_active_students, 2)
+        self.assertEqual(analytics.student_completion_rate, Decimal('33.33'))
+        self.assertEqual(InstructorAnalytics.objects.get(instructor=self.alan).active_courses_count, 1)
+
+    def test_incremental_rollup_revisits_only_changed_instructors(self):
+        run_instructor_rollup()
+        self.assertEqual(run_instructor_rollup().instructors_updated, 0)
+
+        self.enroll(self.learners[2], self.other)
+        run = run_instructor_rollup()
+
+        self.assertFalse(run.full)
+        self.assertEqual(run.instructors_updated, 1)
+        self.assertEqual(InstructorAnalytics.objects.get(instructor=self.alan).current_active_students, 1)
+        self.assertEqual(InstructorRollupRun.objects.count(), 3)
+
+    def test_deletions_touch_instructors_in_one_update(self):
+        for learner in self.learners:
+            self.enroll(learner, self.running)
+        run_instructor_rollup()
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                CourseEnrollment.objects.filter(course=self.running).delete()
+        touches = [q for q in queries if q['sql'].startswith('UPDATE "instructors_instructorprofile"')]
+        self.assertEqual(len(touches), 1)
+
+        run = run_instructor_rollup()
+        self.assertEqual(run.instructors_updated, 1)
+        self.assertEqual(InstructorAnalytics.objects.get(instructor=self.ada).current_active_students, 0)
+
+    def test_deleted_course_touches_its_instructors(self):
+        self.enroll(self.learners[0], self.other)
+        run_instructor_rollup()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+
+        self.assertEqual(run_instructor_rollup().instructors_updated, 1)
+        self.alan.refresh_from_db()
+        self.assertEqual((self.alan.total_courses_created, self.alan.total_students_taught), (0, 0))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('rollup_instructor_analytics', '--full', stdout=out)
+        self.assertIn('Full rollup updated 2 instructors', out.getvalue())
+
+
+class InstructorRatingAggregateTest(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor('grace')
+        self.course = make_course('course-v1:T+Cob+2024', [self.instructor.user])
+        self.other = make_course('course-v1:T+Cob2+2024', [self.instructor.user])
+        self.learners = [User.objects.create_user(username=f'rater{i}', password='test') for i in range(3)]
+
+    def rate(self, student, course, overall, recommend=True):
+        return InstructorRating.objects.create(
+            instructor=self.instructor, student=student, course=course, overall_rating=overall,
+            teaching_quality=overall, responsiveness=3, course_organization=4, would_recommend=recommend,
+        )
+
+    def test_aggregates_follow_save_and_delete(self):
+        first = self.rate(self.learners[0], self.course, 5)
+        self.rate(self.learners[1], self.course, 3, recommend=False)
+        self.rate(self.learners[2], self.other, 4)
+
+        summary = instructor_rating_summary(self.instructor.pk)
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['averages']['overall_rating'], 4.0)
+        self.assertEqual(summary['recommend_percent'], 66.7)
+        self.assertEqual(summary['histogram'], {1: 0, 2: 0, 3: 1, 4: 1, 5: 1})
+
+        first.overall_rating = 1
+        first.save()
+        self.assertEqual(instructor_rating_summary(self.instructor.pk, self.course.pk)['histogram'][1], 1)
+
+        first.delete()
+        course_summary = instructor_rating_summary(self.instructor.pk, self.course.pk)
+        self.assertEqual(course_summary['count'], 1)
+        self.assertEqual(course_summary['averages']['overall_rating'], 3.0)
+        self.assertEqual(instructor_rating_summary(self.instructor.pk)['count'], 2)
+
+    def test_queryset_and_cascading_deletes_update_aggregates(self):
+        for learner in self.learners:
+            self.rate(learner, self.course, 5)
+        self.rate(self.learners[0], self.other, 1)
+
+        InstructorRating.objects.filter(student=self.learners[0], course=self.course).delete()
+        self.assertEqual(instructor_rating_summary(self.instructor.pk)['count'], 3)
+        self.assertEqual(instructor_rating_summary(self.instructor.pk, self.course.pk)['count'], 2)
+
+        other_pk = self.other.pk
+        self.learners[1].delete()
+        self.other.delete()
+        summary = instructor_rating_summary(self.instructor.pk)
+        self.assertEqual((summary['count'], summary['histogram'][1]), (1, 0))
+        self.assertFalse(InstructorRatingAggregate.objects.filter(course_id=other_pk).exists())
+
+        self.instructor.delete()
+        self.assertFalse(InstructorRatingAggregate.objects.exists())
+
+    def test_rebuild_repairs_bulk_writes(self):
+        for learner in self.learners[:2]:
+            self.rate(learner, self.course, 5)
+        # bulk_create skips InstructorRating.save.
+        InstructorRating.objects.bulk_create([InstructorRating(
+            instructor=self.instructor, student=self.learners[2], course=self.course, overall_rating=5,
+            teaching_quality=5, responsiveness=3, course_organization=4,
+        )])
+        self.assertEqual(instructor_rating_summary(self.instructor.pk)['count'], 2)
+
+        out = StringIO()
+        call_command('rebuild_rating_aggregates', stdout=out)
+
+        self.assertIn('Rebuilt 2 rating aggregates', out.getvalue())
+        self.assertEqual(instructor_rating_summary(self.instructor.pk)['count'], 3)
+        self.assertEqual(instructor_rating_summary(self.instructor.pk, self.course.pk)['count'], 3)
+
+    def test_ratings_endpoint(self):
+        self.rate(self.learners[0], self.course, 4)
+        self.rate(self.learners[1], self.other, 2)
+
+        response = self.client.get(f'/instructors/api/{self.instructor.pk}/ratings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual([course['course_id'] for course in response.json()['courses']],
+                         [self.course.course_id, self.other.course_id])
+
+        response = self.client.get(
+            f'/instructors/api/{self.instructor.pk}/ratings/', {'course': self.other.course_id}
+        )
+        self.assertEqual(response.json()['averages']['overall_rating'], 2.0)
+
+        self.instructor.public_profile = False
+        self.instructor.save()
+        self.assertEqual(self.client.get(f'/instructors/api/{self.instructor.pk}/ratings/').status_code, 404)
@@ -3,6 +3,7 @@ URL configuration for instructors app.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import views
 
 app_name = 'instructors'
 
@@ -11,5 +12,6 @@ router = DefaultRouter()
 
 urlpatterns = [
     # API views
+    path('api/<int:instructor_id>/ratings/', views.instructor_ratings, name='ratings'),
     path('api/', include(router.urls)),
 ]
@@ -0,0 +1,40 @@
+"""
+Instructor views for Modern edX LMS.
+"""
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from apps.courses.models import Course
+
+from .models import InstructorProfile
+from .ratings import course_rating_summaries, instructor_rating_summary
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def instructor_ratings(request, instructor_id):
+    """
+    Rating summary and histogram for an instructor, with a breakdown per
+    course. ``?course=<course_id>`` narrows the response to one course.
+    """
+    profile = get_object_or_404(InstructorProfile.objects.only('pk', 'public_profile'), pk=instructor_id)
+    if not profile.public_profile and not request.user.is_staff:
+        raise NotFound()
+
+    course_id = request.query_params.get('course')
+    if course_id:
+        course = get_object_or_404(Course.objects.only('pk', 'course_id'), course_id=course_id)
+        return Response(dict(
+            instructor_rating_summary(profile.pk, course.pk),
+            instructor_id=profile.pk,
+            course_id=course.course_id,
+        ))
+
+    return Response(dict(
+        instructor_rating_summary(profile.pk),
+        instructor_id=profile.pk,
+        courses=course_rating_summaries(profile.pk),
+    ))
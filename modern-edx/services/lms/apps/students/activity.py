@@ -0,0 +1,457 @@
+"""
+Learning activity event ingestion for Modern edX LMS.
+
+Learner activity events are validated and appended to an append-only event
+log (a Redis stream, or local segment files when Redis is not available)
+without touching ``LearningAnalytics``. The ``fold_learning_events``
+worker reads the log in batches, sums each learner's events in memory and
+applies them with one ``F()`` increment ``UPDATE`` per learner. The most
+active weekday and hour come from the ``LearningActivityBucket``
+histogram, which is updated incrementally as well.
+
+Delivery is at-least-once: a worker that dies between committing a batch
+and acknowledging it will fold that batch again. Malformed events and
+events of learners deleted since they were logged are dropped with a
+warning rather than failing (and so re-reading) the whole batch.
+"""
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .dashboard import invalidate_user_dashboard
+from .models import LearningActivityBucket, LearningAnalytics
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Event type -> (LearningAnalytics duration field, counter field)
+EVENT_TYPES = {
+    'session': ('total_time_spent', 'sessions_count'),
+    'video': ('video_watch_time', None),
+    'reading': ('reading_time', None),
+    'forum_post': (None, 'forum_engagement_score'),
+    'peer_interaction': (None, 'peer_interaction_count'),
+}
+MAX_EVENT_DURATION = 24 * 60 * 60
+
+
+class InvalidEvent(ValueError):
+    pass
+
+
+def normalize_event(user_id, event):
+    """
+    Validate a raw activity event and return its log representation.
+
+    Events look like ``{"type": "video", "duration": 95, "timestamp": "..."}``;
+    ``duration`` is in seconds and ``timestamp`` defaults to now.
+    """
+    if not isinstance(event, dict):
+        raise InvalidEvent('Event must be an object.')
+    event_type = event.get('type')
+    if event_type not in EVENT_TYPES:
+        raise InvalidEvent(f'Unknown event type: {event_type!r}.')
+
+    try:
+        duration = float(event.get('duration', 0) or 0)
+    except (TypeError, ValueError):
+        raise InvalidEvent('duration must be a number of seconds.')
+    if not 0 <= duration <= MAX_EVENT_DURATION:
+        raise InvalidEvent(f'duration must be between 0 and {MAX_EVENT_DURATION} seconds.')
+
+    timestamp = event.get('timestamp')
+    if timestamp:
+        when = parse_datetime(str(timestamp))
+        if when is None:
+            raise InvalidEvent('timestamp must be an ISO 8601 datetime.')
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when, dt_timezone.utc)
+    else:
+        when = timezone.now()
+
+    return {'u': user_id, 't': event_type, 'd': duration, 'ts': when.timestamp()}
+
+
+# Event logs
+#
+# Both logs expose append(events), read_batch(max_events) -> (token, events)
+# and ack(token).
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FileEventLog:
+    """
+    Append-only NDJSON segments in a local directory.
+
+    Producers append to ``current.log`` under an exclusive lock; a worker
+    rotates it to a ``batch-*.log`` segment under the same lock, claims a
+    segment by renaming it to ``claimed-<pid>-batch-*.log`` and deletes it
+    once its events are folded. The rename lets several workers on one host
+    share the directory without folding a segment twice; segments claimed
+    by workers that have since died are released again.
+
+    The directory is host-local: each host writing to it needs its own fold
+    worker. Use the Redis stream when events should be folded centrally.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._current = self.directory / 'current.log'
+        self._lock_path = self.directory / '.lock'
+
+    def _locked(self):
+        handle = open(self._lock_path, 'a')
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def append(self, events):
+        payload = ''.join(json.dumps(event) + '\n' for event in events)
+        lock = self._locked()
+        try:
+            with open(self._current, 'a', encoding='utf-8') as handle:
+                handle.write(payload)
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            lock.close()
+
+    def _rotate(self):
+        lock = self._locked()
+        try:
+            if self._current.exists() and self._current.stat().st_size:
+                self._current.rename(self.directory / f'batch-{time.time_ns()}-{uuid.uuid4().hex[:8]}.log')
+        finally:
+            lock.close()
+
+    def _release_dead_claims(self):
+        for claimed in self.directory.glob('claimed-*.log'):
+            _, pid, name = claimed.name.split('-', 2)
+            if not _pid_alive(int(pid)):
+                try:
+                    claimed.rename(self.directory / name)
+                except FileNotFoundError:
+                    pass
+
+    def _claim(self):
+        """Claim the oldest segment, or return one this process claimed before and did not ack."""
+        own = sorted(self.directory.glob(f'claimed-{os.getpid()}-batch-*.log'))
+        if own:
+            return own[0]
+        self._release_dead_claims()
+        for attempt in range(2):
+            for segment in sorted(self.directory.glob('batch-*.log')):
+                claimed = self.directory / f'claimed-{os.getpid()}-{segment.name}'
+                try:
+                    segment.rename(claimed)
+                except FileNotFoundError:
+                    continue  # Claimed by another worker first.
+                return claimed
+            if not attempt:
+                self._rotate()
+        return None
+
+    def read_batch(self, max_events=None):
+        """Claim and return the oldest unfolded segment; ``max_events`` is advisory here."""
+        segment = self._claim()
+        if segment is None:
+            return None, []
+        events = []
+        with open(segment, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Skipping corrupt learning event in %s", segment)
+        return segment, events
+
+    def ack(self, token):
+        try:
+            token.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RedisStreamEventLog:
+    """Redis stream consumed through a consumer group."""
+
+    GROUP = 'learning-analytics-fold'
+
+    def __init__(self, url, stream, maxlen=None, claim_idle_ms=60000):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.stream = stream
+        self.maxlen = maxlen
+        self.claim_idle_ms = claim_idle_ms
+        self.consumer = f'{os.uname().nodename}-{os.getpid()}'
+        self._group_ready = False
+
+    def append(self, events):
+        pipe = self.client.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(self.stream, {'e': json.dumps(event)}, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        import redis
+        try:
+            self.client.xgroup_create(self.stream, self.GROUP, id='0', mkstream=True)
+        except redis.ResponseError as exc:
+            if 'BUSYGROUP' not in str(exc):
+                raise
+        self._group_ready = True
+
+    def read_batch(self, max_events=1000):
+        self._ensure_group()
+        # Entries left pending by a dead worker are picked up first.
+        _, entries, *_ = self.client.xautoclaim(
+            self.stream, self.GROUP, self.consumer, self.claim_idle_ms, '0-0', count=max_events
+        )
+        if not entries:
+            response = self.client.xreadgroup(
+                self.GROUP, self.consumer, {self.stream: '>'}, count=max_events
+            )
+            entries = response[0][1] if response else []
+        ids, events = [], []
+        for entry_id, fields in entries:
+            ids.append(entry_id)
+            if not fields:
+                continue
+            try:
+                events.append(json.loads(fields[b'e']))
+            except (KeyError, ValueError):
+                logger.warning("Skipping corrupt learning event %s", entry_id)
+        return (ids or None), events
+
+    def ack(self, token):
+        if token:
+            pipe = self.client.pipeline()
+            pipe.xack(self.stream, self.GROUP, *token)
+            pipe.xdel(self.stream, *token)
+            pipe.execute()
+
+
+_event_log = None
+
+
+def get_event_log():
+    """Event log selected by ``LEARNING_EVENT_LOG`` ('redis' or 'file')."""
+    global _event_log
+    if _event_log is None:
+        if getattr(settings, 'LEARNING_EVENT_LOG', 'file') == 'redis':
+            _event_log = RedisStreamEventLog(
+                settings.LEARNING_EVENT_REDIS_URL,
+                getattr(settings, 'LEARNING_EVENT_STREAM', 'learning-events'),
+                maxlen=getattr(settings, 'LEARNING_EVENT_STREAM_MAXLEN', None),
+            )
+        else:
+            _event_log = FileEventLog(settings.LEARNING_EVENT_LOG_DIR)
+    return _event_log
+
+
+def record_learning_events(user_id, events):
+    """
+    Validate ``events`` and append the valid ones to the event log.
+
+    Returns ``(accepted, errors)`` where ``errors`` lists ``(index, message)``.
+    """
+    accepted, errors = [], []
+    for index, event in enumerate(events):
+        try:
+            accepted.append(normalize_event(user_id, event))
+        except InvalidEvent as exc:
+            errors.append((index, str(exc)))
+    if accepted:
+        get_event_log().append(accepted)
+    return len(accepted), errors
+
+
+# Folding
+
+@dataclass
+class UserDelta:
+    durations: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    buckets: Dict[Tuple[int, int], List[float]] = field(default_factory=dict)
+
+
+@dataclass
+class FoldResult:
+    events: int
+    users: int
+    elapsed_seconds: float
+    skipped: int = 0
+
+    @property
+    def events_per_second(self):
+        if not self.elapsed_seconds:
+            return float(self.events)
+        return self.events / self.elapsed_seconds
+
+
+def _parse(event):
+    """``(user_id, event type, duration, datetime)`` of a logged event."""
+    if not isinstance(event, dict):
+        raise InvalidEvent('Event must be an object.')
+    try:
+        user_id = int(event['u'])
+        duration = float(event['d'])
+        when = datetime.fromtimestamp(float(event['ts']), tz=dt_timezone.utc)
+    except (KeyError, TypeError, ValueError, OverflowError, OSError) as exc:
+        raise InvalidEvent(f'Malformed event: {exc!r}.')
+    return user_id, event.get('t'), duration, when
+
+
+def _collect(events):
+    """Per-learner deltas of ``events`` and the number of malformed events skipped."""
+    deltas, skipped = {}, 0
+    for event in events:
+        try:
+            user_id, event_type, duration, when = _parse(event)
+        except InvalidEvent as exc:
+            logger.warning("Skipping learning event %r: %s", event, exc)
+            skipped += 1
+            continue
+        duration_field, counter_field = EVENT_TYPES.get(event_type, (None, None))
+        delta = deltas.setdefault(user_id, UserDelta())
+        if duration_field:
+            delta.durations[duration_field] = delta.durations.get(duration_field, 0.0) + duration
+        if counter_field:
+            delta.counters[counter_field] = delta.counters.get(counter_field, 0) + 1
+        bucket = delta.buckets.setdefault((when.weekday(), when.hour), [0.0, 0])
+        bucket[0] += duration
+        bucket[1] += 1
+    return deltas, skipped
+
+
+def _most_active(histogram):
+    """``(day name, hour as time)`` with the most activity, or ``('', None)``."""
+    if not histogram:
+        return '', None
+    # Time spent decides; event counts break ties between untimed events.
+    by_day, by_hour = {}, {}
+    for (day, hour), (seconds, events) in histogram.items():
+        by_day[day] = [a + b for a, b in zip(by_day.get(day, (0, 0)), (seconds, events))]
+        by_hour[hour] = [a + b for a, b in zip(by_hour.get(hour, (0, 0)), (seconds, events))]
+    day = max(sorted(by_day), key=lambda key: by_day[key])
+    hour = max(sorted(by_hour), key=lambda key: by_hour[key])
+    return DAY_NAMES[day], dt_time(hour=hour)
+
+
+def fold_events(events):
+    """Apply a batch of logged events to ``LearningAnalytics`` in one transaction."""
+    started = time.monotonic()
+    deltas, skipped = _collect(events)
+    if not deltas:
+        return FoldResult(events=0, users=0, elapsed_seconds=time.monotonic() - started, skipped=skipped)
+
+    with transaction.atomic():
+        # Lock the learners so none is deleted before the batch commits.
+        existing = set(
+            User.objects.select_for_update().filter(pk__in=list(deltas)).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        for user_id in set(deltas) - existing:
+            logger.warning("Skipping learning events of deleted user %s", user_id)
+            delta = deltas.pop(user_id)
+            skipped += sum(count for _, count in delta.buckets.values())
+        if not deltas:
+            return FoldResult(events=0, users=0, elapsed_seconds=time.monotonic() - started, skipped=skipped)
+        user_ids = list(deltas)
+
+        LearningAnalytics.objects.bulk_create(
+            [LearningAnalytics(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+        )
+        now = timezone.now()
+        for user_id, delta in deltas.items():
+            updates = {
+                name: F(name) + timedelta(seconds=seconds)
+                for name, seconds in delta.durations.items()
+            }
+            updates.update({name: F(name) + count for name, count in delta.counters.items()})
+            if updates:
+                LearningAnalytics.objects.filter(user_id=user_id).update(last_updated=now, **updates)
+
+        histograms = {user_id: {} for user_id in user_ids}
+        existing = {}
+        for bucket in LearningActivityBucket.objects.select_for_update().filter(user_id__in=user_ids):
+            existing[(bucket.user_id, bucket.day_of_week, bucket.hour)] = bucket
+            histograms[bucket.user_id][(bucket.day_of_week, bucket.hour)] = [bucket.seconds, bucket.events]
+
+        changed, created = [], []
+        for user_id, delta in deltas.items():
+            for (day, hour), (seconds, count) in delta.buckets.items():
+                entry = histograms[user_id].setdefault((day, hour), [0, 0])
+                entry[0] += round(seconds)
+                entry[1] += count
+                bucket = existing.get((user_id, day, hour))
+                if bucket is None:
+                    created.append(LearningActivityBucket(
+                        user_id=user_id, day_of_week=day, hour=hour,
+                        seconds=entry[0], events=entry[1],
+                    ))
+                else:
+                    bucket.seconds, bucket.events = entry
+                    changed.append(bucket)
+        LearningActivityBucket.objects.bulk_update(changed, ['seconds', 'events'])
+        LearningActivityBucket.objects.bulk_create(created)
+
+        # Derived fields, computed from the freshly incremented totals.
+        analytics = list(
+            LearningAnalytics.objects.filter(user_id__in=user_ids)
+            .only('id', 'user_id', 'total_time_spent', 'sessions_count')
+        )
+        for row in analytics:
+            if row.sessions_count:
+                row.average_session_duration = row.total_time_spent / row.sessions_count
+            row.most_active_day_of_week, row.most_active_time_of_day = _most_active(
+                histograms[row.user_id]
+            )
+        LearningAnalytics.objects.bulk_update(
+            analytics,
+            ['average_session_duration', 'most_active_day_of_week', 'most_active_time_of_day'],
+        )
+        transaction.on_commit(lambda: invalidate_user_dashboard(*user_ids))
+
+    return FoldResult(
+        events=len(events) - skipped, users=len(user_ids),
+        elapsed_seconds=time.monotonic() - started, skipped=skipped,
+    )
+
+
+def fold_pending_events(event_log=None, max_events=1000):
+    """Fold one batch from the log; returns ``None`` when the log is empty."""
+    event_log = event_log or get_event_log()
+    token, events = event_log.read_batch(max_events)
+    if token is None:
+        return None
+    result = fold_events(events)
+    event_log.ack(token)
+    return result
@@ -4,3 +4,6 @@ class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.students'
     verbose_name = 'Students'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,395 @@
+"""
+Student dashboard assembly for Modern edX LMS.
+
+``get_student_dashboard`` builds everything the dashboard shows - profile,
+recent achievements, learning analytics, per-enrollment progress and
+upcoming deadlines - in a fixed number of batched queries (eight with
+enrollments, three without) and never writes: learners without a profile
+or analytics row get unsaved defaults instead of ``get_or_create``.
+
+Dashboards are cached per user. The entry is keyed on a per-user version
+token, bumped when the learner's own rows change, and records the version
+token of every course it was built from, so editing a course's deadlines
+only invalidates the dashboards of learners enrolled in it. See
+``apps.students.signals`` for the invalidation hooks.
+
+``aget_student_dashboard`` is the same service for async views; it awaits
+its independent reads together through the async ORM. On Django 4.2 those
+reads still run one after another on the request's thread-sensitive
+executor, so the win is that the event loop serves other requests while
+they wait, not a faster single dashboard.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.assessments.models import Assessment, GradeBook
+from apps.courses.models import CourseEnrollment, Sequential, StudentModule, XBlock
+
+from .models import Achievement, LearningAnalytics, StudentProfile
+
+User = get_user_model()
+
+RECENT_ACHIEVEMENTS = 5
+
+
+@dataclass
+class EnrollmentProgress:
+    course_pk: int
+    course_id: str
+    display_name: str
+    mode: str
+    enrolled_at: datetime
+    modules_completed: int
+    modules_total: int
+    current_grade: Optional[Decimal] = None
+    letter_grade: str = ''
+
+    @property
+    def percent_complete(self):
+        if not self.modules_total:
+            return 0.0
+        return round(100.0 * self.modules_completed / self.modules_total, 1)
+
+
+@dataclass
+class Deadline:
+    kind: str  # 'assessment' or 'subsection'
+    course_id: str
+    title: str
+    due: datetime
+    reference: str  # assessment id or sequential location
+
+
+@dataclass
+class StudentDashboard:
+    user_id: int
+    profile: StudentProfile
+    achievements: List[Achievement]
+    public_achievements: List[Achievement]
+    analytics: LearningAnalytics
+    course_progress: List[EnrollmentProgress]
+    upcoming_deadlines: List[Deadline]
+    course_versions: Dict[int, object] = field(default_factory=dict, repr=False)
+
+    def pending_deadlines(self, now=None):
+        """Deadlines still ahead; cached dashboards may outlive some of them."""
+        now = now or timezone.now()
+        return [deadline for deadline in self.upcoming_deadlines if deadline.due >= now]
+
+
+def _user_version_key(user_id):
+    return f'student_dashboard:user:{user_id}'
+
+
+def _course_version_key(course_pk):
+    return f'student_dashboard:course:{course_pk}'
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user_dashboard(*user_ids):
+    cache.set_many({_user_version_key(user_id): time.time_ns() for user_id in user_ids}, None)
+
+
+def invalidate_course_dashboards(*course_pks):
+    """Invalidate the dashboards of every learner enrolled in ``course_pks``."""
+    cache.set_many({_course_version_key(pk): time.time_ns() for pk in course_pks}, None)
+
+
+def _visible_xblocks(course_pks):
+    # Same visibility rule as apps.courses.progress: a block hidden at any
+    # level of its outline is not part of the learner's course.
+    return XBlock.objects.filter(
+        vertical__sequential__chapter__course_id__in=course_pks,
+        visible_to_staff_only=False,
+        vertical__visible_to_staff_only=False,
+        vertical__sequential__visible_to_staff_only=False,
+        vertical__sequential__chapter__visible_to_staff_only=False,
+    )
+
+
+def _progress_querysets(user_id, course_pks):
+    visible = _visible_xblocks(course_pks)
+    completed = Q(done='completed', module_id__in=visible.values('location'))
+    modules = (
+        StudentModule.objects.filter(student_id=user_id, course_id__in=course_pks)
+        .values('course_id')
+        .annotate(completed=Count('id', filter=completed))
+        .order_by()
+    )
+    totals = (
+        visible
+        .values('vertical__sequential__chapter__course_id')
+        .annotate(total=Count('id'))
+        .order_by()
+        .values_list('vertical__sequential__chapter__course_id', 'total')
+    )
+    grades = (
+        GradeBook.objects.filter(student_id=user_id, course_id__in=course_pks)
+        .values('course_id', 'current_grade', 'letter_grade')
+    )
+    return modules, totals, grades
+
+
+def _assemble_progress(enrollments, module_rows, total_rows, grade_rows):
+    modules = {row['course_id']: row for row in module_rows}
+    totals = dict(total_rows)
+    grades = {row['course_id']: row for row in grade_rows}
+
+    progress = []
+    for enrollment in enrollments:
+        course = enrollment.course
+        grade = grades.get(course.pk, {})
+        progress.append(EnrollmentProgress(
+            course_pk=course.pk,
+            course_id=course.course_id,
+            display_name=course.display_name,
+            mode=enrollment.mode.mode_slug,
+            enrolled_at=enrollment.created,
+            modules_completed=modules.get(course.pk, {}).get('completed', 0),
+            modules_total=totals.get(course.pk, 0),
+            current_grade=grade.get('current_grade'),
+            letter_grade=grade.get('letter_grade', ''),
+        ))
+    return progress
+
+
+def _load_progress(user_id, enrollments):
+    querysets = _progress_querysets(user_id, [enrollment.course_id for enrollment in enrollments])
+    return _assemble_progress(enrollments, *(list(queryset) for queryset in querysets))
+
+
+def _deadline_querysets(course_pks, now, limit):
+    assessments = Assessment.objects.filter(
+        course_id__in=course_pks, is_published=True, due_date__gte=now
+    ).order_by('due_date').values('id', 'title', 'due_date', 'course__course_id')[:limit]
+    subsections = Sequential.objects.filter(
+        chapter__course_id__in=course_pks, due__gte=now, visible_to_staff_only=False
+    ).order_by('due').values('location', 'display_name', 'due', 'chapter__course__course_id')[:limit]
+    return assessments, subsections
+
+
+def _assemble_deadlines(assessment_rows, subsection_rows, limit):
+    deadlines = [
+        Deadline('assessment', row['course__course_id'], row['title'], row['due_date'], str(row['id']))
+        for row in assessment_rows
+    ]
+    deadlines += [
+        Deadline('subsection', row['chapter__course__course_id'], row['display_name'], row['due'],
+                 row['location'])
+        for row in subsection_rows
+    ]
+    deadlines.sort(key=lambda deadline: deadline.due)
+    return deadlines[:limit]
+
+
+def _load_deadlines(course_pks, now, limit):
+    querysets = _deadline_querysets(course_pks, now, limit)
+    return _assemble_deadlines(*(list(queryset) for queryset in querysets), limit)
+
+
+def _user_queryset():
+    return User.objects.select_related('student_profile', 'learning_analytics')
+
+
+def _profile_and_analytics(user):
+    try:
+        profile = user.student_profile
+    except StudentProfile.DoesNotExist:
+        profile = StudentProfile(user=user)
+    try:
+        analytics = user.learning_analytics
+    except LearningAnalytics.DoesNotExist:
+        analytics = LearningAnalytics(user=user)
+    return profile, analytics
+
+
+def _achievements_queryset(user_id):
+    """
+    The learner's latest achievements together with their latest public ones
+    (all that other viewers may see), in one query; see ``_split_achievements``.
+    """
+    achievements = Achievement.objects.filter(user_id=user_id)
+    recent = achievements.values('pk')[:RECENT_ACHIEVEMENTS]
+    public = achievements.filter(is_public=True).values('pk')[:RECENT_ACHIEVEMENTS]
+    return achievements.filter(Q(pk__in=recent) | Q(pk__in=public))
+
+
+def _split_achievements(achievements):
+    """``(latest, latest public)`` out of the newest-first ``_achievements_queryset`` rows."""
+    public = [achievement for achievement in achievements if achievement.is_public]
+    return achievements[:RECENT_ACHIEVEMENTS], public[:RECENT_ACHIEVEMENTS]
+
+
+def _enrollments_queryset(user_id):
+    return (
+        CourseEnrollment.objects.filter(user_id=user_id, is_active=True)
+        .select_related('course', 'mode')
+        .only('id', 'created', 'course__id', 'course__course_id', 'course__display_name',
+              'mode__id', 'mode__mode_slug')
+        .order_by('-created')
+    )
+
+
+def build_student_dashboard(user_id, course_version=None):
+    """
+    Assemble the dashboard from the database without writing anything.
+
+    ``course_version(course_pk)``, when given, is called for each enrolled
+    course before its progress and deadlines are read.
+    """
+    user = _user_queryset().get(pk=user_id)
+    profile, analytics = _profile_and_analytics(user)
+    achievements, public_achievements = _split_achievements(list(_achievements_queryset(user_id)))
+    enrollments = list(_enrollments_queryset(user_id))
+
+    course_versions = {}
+    if course_version is not None:
+        course_versions = {
+            enrollment.course_id: course_version(enrollment.course_id) for enrollment in enrollments
+        }
+
+    progress, deadlines = [], []
+    if enrollments:
+        progress = _load_progress(user_id, enrollments)
+        deadlines = _load_deadlines(
+            [enrollment.course_id for enrollment in enrollments],
+            timezone.now(),
+            getattr(settings, 'STUDENT_DASHBOARD_DEADLINES', 10),
+        )
+
+    return StudentDashboard(
+        user_id=user_id,
+        profile=profile,
+        achievements=achievements,
+        public_achievements=public_achievements,
+        analytics=analytics,
+        course_progress=progress,
+        upcoming_deadlines=deadlines,
+        course_versions=course_versions,
+    )
+
+
+def get_student_dashboard(user_id):
+    """
+    Return the learner's dashboard, from cache when nothing it depends on
+    has changed.
+    """
+    user_version = _version(_user_version_key(user_id))
+    if user_version is None:
+        # No shared cache to hold version tokens (e.g. DummyCache).
+        return build_student_dashboard(user_id)
+
+    key = f'student_dashboard:{user_id}:{user_version}'
+    dashboard = cache.get(key)
+    if dashboard is not None:
+        course_keys = {_course_version_key(pk): pk for pk in dashboard.course_versions}
+        current = cache.get_many(list(course_keys))
+        if all(
+            current.get(course_key) == dashboard.course_versions[pk]
+            for course_key, pk in course_keys.items()
+        ):
+            return dashboard
+
+    dashboard = build_student_dashboard(
+        user_id, course_version=lambda course_pk: _version(_course_version_key(course_pk))
+    )
+    cache.set(key, dashboard, getattr(settings, 'STUDENT_DASHBOARD_CACHE_TIMEOUT', 300))
+    return dashboard
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def _aversion(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+async def abuild_student_dashboard(user_id, course_version=None):
+    """
+    Async ``build_student_dashboard``: the user, achievement and enrollment
+    reads are awaited together, then the five progress and deadline reads.
+
+    ``course_version``, when given, is an async callable.
+    """
+    user, achievements, enrollments = await asyncio.gather(
+        _user_queryset().aget(pk=user_id),
+        _alist(_achievements_queryset(user_id)),
+        _alist(_enrollments_queryset(user_id)),
+    )
+    profile, analytics = _profile_and_analytics(user)
+    achievements, public_achievements = _split_achievements(achievements)
+    course_pks = [enrollment.course_id for enrollment in enrollments]
+
+    course_versions = {}
+    if course_version is not None:
+        versions = await asyncio.gather(*(course_version(pk) for pk in course_pks))
+        course_versions = dict(zip(course_pks, versions))
+
+    progress, deadlines = [], []
+    if enrollments:
+        limit = getattr(settings, 'STUDENT_DASHBOARD_DEADLINES', 10)
+        rows = await asyncio.gather(*(
+            _alist(queryset) for queryset in (
+                *_progress_querysets(user_id, course_pks),
+                *_deadline_querysets(course_pks, timezone.now(), limit),
+            )
+        ))
+        progress = _assemble_progress(enrollments, *rows[:3])
+        deadlines = _assemble_deadlines(*rows[3:], limit)
+
+    return StudentDashboard(
+        user_id=user_id,
+        profile=profile,
+        achievements=achievements,
+        public_achievements=public_achievements,
+        analytics=analytics,
+        course_progress=progress,
+        upcoming_deadlines=deadlines,
+        course_versions=course_versions,
+    )
+
+
+async def aget_student_dashboard(user_id):
+    """Async ``get_student_dashboard``, sharing its cache entries."""
+    user_version = await _aversion(_user_version_key(user_id))
+    if user_version is None:
+        return await abuild_student_dashboard(user_id)
+
+    key = f'student_dashboard:{user_id}:{user_version}'
+    dashboard = await cache.aget(key)
+    if dashboard is not None:
+        course_keys = {_course_version_key(pk): pk for pk in dashboard.course_versions}
+        current = await cache.aget_many(list(course_keys))
+        if all(
+            current.get(course_key) == dashboard.course_versions[pk]
+            for course_key, pk in course_keys.items()
+        ):
+            return dashboard
+
+    dashboard = await abuild_student_dashboard(
+        user_id, course_version=lambda course_pk: _aversion(_course_version_key(course_pk))
+    )
+    await cache.aset(key, dashboard, getattr(settings, 'STUDENT_DASHBOARD_CACHE_TIMEOUT', 300))
+    return dashboard
@@ -0,0 +1,248 @@
+"""
+Request-scoped identity map and batch loaders for learner rows.
+
+``RequestLoaderMiddleware`` gives every request a ``RequestLoaders`` (as
+``request.loaders`` and through ``get_request_loaders()``) holding one
+``ModelLoader`` per model - users, ``StudentProfile`` and
+``LearningAnalytics``. A loader
+keeps every row it has seen for the rest of the request, and keys queued
+with ``want()`` (list serializers queue all their rows' users up front)
+are fetched together with the next miss, so each model costs one query
+per batch however many serializers dereference it.
+
+``LoaderStats`` counts lookups against queries; ``queries_saved`` is the
+number of lookups that would otherwise each have issued a query.
+"""
+import contextvars
+import logging
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import LearningAnalytics, StudentProfile
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_current_loaders = contextvars.ContextVar('request_loaders', default=None)
+
+
+@dataclass
+class LoaderStats:
+    lookups: int = 0
+    hits: int = 0
+    queries: int = 0
+    rows: int = 0
+
+    @property
+    def queries_saved(self):
+        return max(self.lookups - self.queries, 0)
+
+    def to_dict(self):
+        return {
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'queries': self.queries,
+            'rows': self.rows,
+            'queries_saved': self.queries_saved,
+        }
+
+
+class ModelLoader:
+    """Identity map over ``model`` keyed on ``key_field``, batching misses."""
+
+    def __init__(self, model, key_field='pk', stats=None):
+        self.model = model
+        self.key_field = key_field
+        self.stats = stats if stats is not None else LoaderStats()
+        self._rows = {}
+        self._pending = set()
+
+    def _key_of(self, instance):
+        return instance.pk if self.key_field == 'pk' else getattr(instance, self.key_field)
+
+    def prime(self, *instances):
+        """Record rows fetched elsewhere so later lookups reuse them."""
+        for instance in instances:
+            if instance is not None:
+                self._rows.setdefault(self._key_of(instance), instance)
+
+    def want(self, keys):
+        """Queue ``keys`` to be fetched with the next miss."""
+        self._pending.update(key for key in keys if key is not None and key not in self._rows)
+
+    def _fetch(self):
+        keys = self._pending
+        self._pending = set()
+        self.stats.queries += 1
+        for instance in self.model._default_manager.filter(**{f'{self.key_field}__in': keys}):
+            self._rows[self._key_of(instance)] = instance
+            self.stats.rows += 1
+        for key in keys:
+            self._rows.setdefault(key, None)
+
+    def load(self, key):
+        """The row for ``key``, or ``None`` when there is none."""
+        if key is None:
+            return None
+        self.stats.lookups += 1
+        row = self._rows.get(key, _MISSING)
+        if row is not _MISSING:
+            self.stats.hits += 1
+            return row
+        self._pending.add(key)
+        self._fetch()
+        return self._rows[key]
+
+    def load_many(self, keys):
+        keys = list(keys)
+        self.want(keys)
+        return [self.load(key) for key in keys]
+
+
+class RequestLoaders:
+    """The loaders for one request, sharing one ``LoaderStats``."""
+
+    def __init__(self):
+        self.stats = LoaderStats()
+        self.users = ModelLoader(get_user_model(), stats=self.stats)
+        self.student_profiles = ModelLoader(StudentProfile, 'user_id', stats=self.stats)
+        self.learning_analytics = ModelLoader(LearningAnalytics, 'user_id', stats=self.stats)
+
+    def prime(self, *instances):
+        """Route ``instances`` to the loader for their model (others are ignored)."""
+        for instance in instances:
+            if instance is None or instance.pk is None:
+                continue
+            for loader in (self.users, self.student_profiles, self.learning_analytics):
+                if isinstance(instance, loader.model):
+                    loader.prime(instance)
+                    break
+
+    def want_users(self, user_ids):
+        self.users.want(user_ids)
+
+    def user_for(self, instance, field='user'):
+        """
+        ``instance.<field>`` through the user loader: reuses a user already
+        attached to ``instance`` or fetched earlier in the request.
+        """
+        descriptor = instance._meta.get_field(field)
+        if descriptor.is_cached(instance):
+            user = getattr(instance, field)
+            self.users.prime(user)
+            return user
+        user = self.users.load(getattr(instance, descriptor.attname))
+        if user is not None:
+            descriptor.set_cached_value(instance, user)
+        return user
+
+
+def get_request_loaders():
+    """The current request's ``RequestLoaders``, or ``None`` outside one."""
+    return _current_loaders.get()
+
+
+def load_user(instance, field='user'):
+    """``instance.<field>``, through the request's loaders when there are any."""
+    loaders = get_request_loaders()
+    if loaders is None:
+        return getattr(instance, field)
+    return loaders.user_for(instance, field)
+
+
+def _load_related(loader_name, model, user_id, known=None):
+    loaders = get_request_loaders()
+    if loaders is None:
+        if known is not None:
+            return known
+        return model._default_manager.filter(user_id=user_id).first()
+    loader = getattr(loaders, loader_name)
+    if known is not None:
+        loader.prime(known)
+    return loader.load(user_id)
+
+
+def load_student_profile(user_id, known=None):
+    """
+    The learner's ``StudentProfile``, or ``None``.
+
+    ``known`` is a copy the caller already holds (e.g. from a cached
+    dashboard). Outside a request it is returned as is; inside one, a row
+    loaded earlier in the request wins, so every serializer sees the same
+    instance.
+    """
+    return _load_related('student_profiles', StudentProfile, user_id, known)
+
+
+def load_learning_analytics(user_id, known=None):
+    """The learner's ``LearningAnalytics``, or ``None``; ``known`` as for ``load_student_profile``."""
+    return _load_related('learning_analytics', LearningAnalytics, user_id, known)
+
+
+def prime(*instances):
+    """Hand rows fetched outside the loaders to the current request's loaders."""
+    loaders = get_request_loaders()
+    if loaders is not None:
+        loaders.prime(*instances)
+
+
+def want_users(instances, field='user'):
+    """Queue the users of ``instances`` so they are fetched in one query."""
+    loaders = get_request_loaders()
+    if loaders is None:
+        return
+    attname = instances[0]._meta.get_field(field).attname if instances else None
+    loaders.want_users(getattr(instance, attname) for instance in instances)
+
+
+class RequestLoaderMiddleware:
+    """
+    Install a fresh ``RequestLoaders`` for each request and report how
+    many queries it saved (logged at debug level, and as an
+    ``X-Loader-Stats`` header when ``REQUEST_LOADER_STATS_HEADER`` is on).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        loaders = request.loaders = RequestLoaders()
+        token = _current_loaders.set(loaders)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_loaders.reset(token)
+        return self._report(request, response, loaders)
+
+    async def __acall__(self, request):
+        loaders = request.loaders = RequestLoaders()
+        token = _current_loaders.set(loaders)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_loaders.reset(token)
+        return self._report(request, response, loaders)
+
+    def _report(self, request, response, loaders):
+        stats = loaders.stats
+        if stats.lookups:
+            logger.debug(
+                "%s %s: %d loader lookups, %d queries, %d saved",
+                request.method, request.path, stats.lookups, stats.queries, stats.queries_saved,
+            )
+            if getattr(settings, 'REQUEST_LOADER_STATS_HEADER', settings.DEBUG):
+                response['X-Loader-Stats'] = (
+                    f'lookups={stats.lookups}; queries={stats.queries}; saved={stats.queries_saved}'
+                )
+        return response
@@ -0,0 +1,35 @@
+"""
+Fold logged learning activity events into LearningAnalytics.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.students.activity import fold_pending_events, get_event_log
+
+
+class Command(BaseCommand):
+    help = 'Fold buffered learning activity events into per-learner analytics.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the log once and exit instead of polling.')
+        parser.add_argument('--interval', type=float, default=settings.LEARNING_EVENT_FOLD_INTERVAL,
+                            help='Seconds to wait when the log is empty.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        event_log = get_event_log()
+        while True:
+            result = fold_pending_events(event_log, max_events=options['batch_size'])
+            if result is not None:
+                self.stdout.write(
+                    f'Folded {result.events} events for {result.users} learners '
+                    f'({result.events_per_second:.0f} events/s)'
+                    + (f', skipped {result.skipped}' if result.skipped else '')
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
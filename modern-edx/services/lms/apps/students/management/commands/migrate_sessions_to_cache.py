@@ -0,0 +1,31 @@
+"""
+Copy database sessions into the Redis session store.
+
+Run once when switching SESSION_ENGINE to apps.students.sessions so
+logged-in learners keep their sessions.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.students.sessions import copy_database_sessions
+
+
+class Command(BaseCommand):
+    help = 'Copy unexpired django_session rows into the session cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Replace sessions that are already in the cache.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        copied, skipped = copy_database_sessions(
+            batch_size=options['batch_size'], overwrite=options['overwrite']
+        )
+        elapsed = time.monotonic() - started
+        rate = (copied + skipped) / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied {copied} sessions ({skipped} skipped) in {elapsed:.2f}s - {rate:.0f} sessions/s'
+        ))
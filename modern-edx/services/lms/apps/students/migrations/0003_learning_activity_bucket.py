@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('students', '0002_alter_learninganalytics_average_session_duration_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearningActivityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.PositiveSmallIntegerField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('seconds', models.BigIntegerField(default=0)),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_buckets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Learning Activity Bucket',
+                'verbose_name_plural': 'Learning Activity Buckets',
+                'db_table': 'students_learning_activity_bucket',
+                'unique_together': {('user', 'day_of_week', 'hour')},
+            },
+        ),
+    ]
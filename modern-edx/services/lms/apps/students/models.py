@@ -255,8 +255,37 @@ class LearningAnalytics(models.Model):
     def update_metrics(self, session_data):
         """
         Update analytics based on learning session data.
-        This would be called by learning activity tracking.
+
+        The event is appended to the learning event log and folded into
+        these metrics by the ``fold_learning_events`` worker.
         """
-        # Implementation would update various metrics
-        # based on the session data provided
-        pass
+        from .activity import record_learning_events
+        record_learning_events(self.user_id, [session_data])
+
+
+class LearningActivityBucket(models.Model):
+    """
+    Per-learner histogram of activity by weekday and hour (UTC).
+
+    At most 168 rows per learner; ``most_active_day_of_week`` and
+    ``most_active_time_of_day`` are derived from them without rescanning
+    past events.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='activity_buckets'
+    )
+    day_of_week = models.PositiveSmallIntegerField()  # Monday is 0
+    hour = models.PositiveSmallIntegerField()
+    seconds = models.BigIntegerField(default=0)
+    events = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('Learning Activity Bucket')
+        verbose_name_plural = _('Learning Activity Buckets')
+        db_table = 'students_learning_activity_bucket'
+        unique_together = ['user', 'day_of_week', 'hour']
+    
+    def __str__(self):
+        return f"{self.user_id} day {self.day_of_week} hour {self.hour}: {self.seconds}s"
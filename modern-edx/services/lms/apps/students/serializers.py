@@ -4,6 +4,8 @@ DRF serializers for students app.
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from .dashboard import StudentDashboard, get_student_dashboard
+from .loaders import load_learning_analytics, load_student_profile, load_user, prime, want_users
 from .models import StudentProfile, Achievement, LearningAnalytics
 
 
@@ -27,11 +29,31 @@ class StudentUserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'username', 'email']
 
 
+class LoadedUserSerializer(StudentUserSerializer):
+    """``StudentUserSerializer`` for ``instance.user``, fetched through the request loaders."""
+
+    def get_attribute(self, instance):
+        return load_user(instance)
+
+
+class UserLoaderListSerializer(serializers.ListSerializer):
+    """
+    Queues every row's user before serializing, so they load in one query,
+    and hands the rows themselves to the request's loaders.
+    """
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        prime(*rows)
+        want_users(rows)
+        return super().to_representation(rows)
+
+
 class StudentProfileSerializer(serializers.ModelSerializer):
     """
     Serializer for StudentProfile model.
     """
-    user = StudentUserSerializer(read_only=True)
+    user = LoadedUserSerializer(read_only=True)
     interests_list = serializers.StringRelatedField(
         source='get_interests_list', 
         read_only=True
@@ -40,6 +62,7 @@ class StudentProfileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = StudentProfile
+        list_serializer_class = UserLoaderListSerializer
         fields = [
             'id', 'user', 'academic_level', 'major', 'year_of_study',
             'graduation_year', 'interests', 'interests_list', 'learning_goals',
@@ -101,7 +124,7 @@ class AchievementSerializer(serializers.ModelSerializer):
     """
     Serializer for Achievement model.
     """
-    user = StudentUserSerializer(read_only=True)
+    user = LoadedUserSerializer(read_only=True)
     earned_date_formatted = serializers.DateTimeField(
         source='earned_date',
         format='%B %d, %Y',
@@ -110,6 +133,7 @@ class AchievementSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Achievement
+        list_serializer_class = UserLoaderListSerializer
         fields = [
             'id', 'user', 'course', 'badge_type', 'title', 'description',
             'points', 'badge_image_url', 'badge_color', 'criteria_met',
@@ -124,12 +148,13 @@ class LearningAnalyticsSerializer(serializers.ModelSerializer):
     """
     Serializer for LearningAnalytics model.
     """
-    user = StudentUserSerializer(read_only=True)
+    user = LoadedUserSerializer(read_only=True)
     total_time_spent_hours = serializers.SerializerMethodField()
     average_session_duration_minutes = serializers.SerializerMethodField()
     
     class Meta:
         model = LearningAnalytics
+        list_serializer_class = UserLoaderListSerializer
         fields = [
             'id', 'user', 'total_time_spent', 'total_time_spent_hours',
             'average_session_duration', 'average_session_duration_minutes',
@@ -167,33 +192,58 @@ class StudentDashboardSerializer(serializers.Serializer):
     def to_representation(self, instance):
         """
         Custom representation for dashboard data.
+
+        ``instance`` is a ``StudentDashboard`` or a user, whose (cached)
+        dashboard is then loaded.
         """
-        user = instance
+        dashboard = instance
+        if not isinstance(instance, StudentDashboard):
+            prime(instance)
+            dashboard = get_student_dashboard(instance.pk)
+        # The dashboard holds unsaved placeholders for rows that don't exist yet.
+        profile = analytics = None
+        if dashboard.profile.pk is not None:
+            profile = load_student_profile(dashboard.user_id, known=dashboard.profile)
+        if dashboard.analytics.pk is not None:
+            analytics = load_learning_analytics(dashboard.user_id, known=dashboard.analytics)
         data = {}
         
-        try:
-            data['profile'] = StudentProfileSerializer(
-                user.student_profile
-            ).data
-        except StudentProfile.DoesNotExist:
-            data['profile'] = None
+        data['profile'] = None
+        if profile is not None:
+            data['profile'] = StudentProfileSerializer(profile).data
         
         data['recent_achievements'] = AchievementSerializer(
-            user.achievements.filter(is_public=True)[:5],
+            dashboard.public_achievements,
             many=True
         ).data
         
-        try:
-            data['analytics'] = LearningAnalyticsSerializer(
-                user.learning_analytics
-            ).data
-        except LearningAnalytics.DoesNotExist:
-            data['analytics'] = None
+        data['analytics'] = None
+        if analytics is not None:
+            data['analytics'] = LearningAnalyticsSerializer(analytics).data
         
-        # Placeholder for course progress and deadlines
-        # These would be populated from course enrollment data
-        data['course_progress'] = {}
-        data['upcoming_deadlines'] = []
+        data['course_progress'] = {
+            progress.course_id: {
+                'display_name': progress.display_name,
+                'mode': progress.mode,
+                'enrolled_at': progress.enrolled_at,
+                'modules_completed': progress.modules_completed,
+                'modules_total': progress.modules_total,
+                'percent_complete': progress.percent_complete,
+                'current_grade': progress.current_grade,
+                'letter_grade': progress.letter_grade,
+            }
+            for progress in dashboard.course_progress
+        }
+        data['upcoming_deadlines'] = [
+            {
+                'kind': deadline.kind,
+                'course_id': deadline.course_id,
+                'title': deadline.title,
+                'due': deadline.due,
+                'reference': deadline.reference,
+            }
+            for deadline in dashboard.pending_deadlines()
+        ]
         
         return data
 
@@ -207,6 +257,7 @@ class StudentPublicProfileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = StudentProfile
+        list_serializer_class = UserLoaderListSerializer
         fields = [
             'user', 'academic_level', 'major', 'interests_list',
             'total_courses_completed', 'total_certificates_earned',
@@ -215,15 +266,18 @@ class StudentPublicProfileSerializer(serializers.ModelSerializer):
     
     def get_user(self, obj):
         """Return limited user information for public profile."""
+        user = load_user(obj)
         return {
-            'display_name': obj.user.get_display_name(),
-            'profile_picture': obj.user.profile_picture.url if obj.user.profile_picture else None,
-            'bio': obj.user.bio if obj.public_profile else None
+            'display_name': user.get_display_name(),
+            'profile_picture': user.profile_picture.url if user.profile_picture else None,
+            'bio': user.bio if obj.public_profile else None
         }
     
     def get_public_achievements(self, obj):
         """Return public achievements."""
-        achievements = obj.user.achievements.filter(
+        # Filtered by user_id: the user itself comes from the loaders.
+        achievements = Achievement.objects.filter(
+            user_id=obj.user_id,
             is_public=True,
             is_featured=True
         )[:3]
@@ -0,0 +1,236 @@
+"""
+Redis-backed sessions with a per-process hot cache.
+
+Enabled with ``SESSION_ENGINE = 'apps.students.sessions'``. Session data
+lives in the ``SESSION_CACHE_ALIAS`` cache (Redis), fronted by a small
+per-process LRU whose entries expire after
+``SESSION_LOCAL_CACHE_TIMEOUT`` seconds, so bursts of requests on one
+session don't reach Redis at all. Saves that would write back the data
+exactly as it was loaded are skipped.
+
+The local LRU only holds anonymous sessions. Other workers never hear of
+a logout, ``flush()`` or ``cycle_key()``, so a locally cached
+authenticated session would stay logged in there until its entry
+expired; authenticated sessions are always read from Redis.
+
+With ``SESSION_DB_FALLBACK`` on, sessions are also written through to
+the ``django_session`` table. They are then read from there when Redis
+misses (eviction, restart) or is unreachable, and copied back into
+Redis. The ``migrate_sessions_to_cache`` command copies existing
+database sessions into Redis when switching over.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'lms.sessions:'
+
+
+class _LocalSessionCache:
+    """Small thread-safe LRU of session data with a per-entry lifetime."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        # Callers mutate session data in place; never hand out the cached dict.
+        return copy.deepcopy(data)
+
+    def set(self, key, data):
+        if self.max_size <= 0 or self.timeout <= 0:
+            return
+        data = copy.deepcopy(data)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, data)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = _LocalSessionCache(
+    getattr(settings, 'SESSION_LOCAL_CACHE_SIZE', 10000),
+    getattr(settings, 'SESSION_LOCAL_CACHE_TIMEOUT', 5),
+)
+
+
+def _cache_locally(key, data):
+    if SESSION_KEY in data:
+        _local_cache.discard(key)
+    else:
+        _local_cache.set(key, data)
+
+
+def db_fallback_enabled():
+    return getattr(settings, 'SESSION_DB_FALLBACK', True)
+
+
+class SessionStore(DBStore):
+    """Session store keeping data in Redis, optionally backed by the database."""
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        self._loaded = None
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _cache_get(self, key):
+        try:
+            return self._cache.get(key)
+        except Exception:
+            if not db_fallback_enabled():
+                raise
+            logger.warning("Session cache unavailable, reading %s from the database", key, exc_info=True)
+            return None
+
+    def _cache_write(self, method, key, data, timeout):
+        try:
+            return getattr(self._cache, method)(key, data, timeout)
+        except Exception:
+            if not db_fallback_enabled():
+                raise
+            logger.warning("Session cache unavailable, %s kept in the database only", key, exc_info=True)
+            return True
+
+    def load(self):
+        key = self.cache_key
+        data = _local_cache.get(key)
+        if data is None:
+            data = self._cache_get(key)
+            if data is None and db_fallback_enabled():
+                s = self._get_session_from_db()
+                if s:
+                    data = self.decode(s.session_data)
+                    self._cache_write('set', key, data, self.get_expiry_age(expiry=s.expire_date))
+            if data is None:
+                self._session_key = None
+                self._loaded = None
+                return {}
+            _cache_locally(key, data)
+        self._loaded = copy.deepcopy(data)
+        return data
+
+    def exists(self, session_key):
+        if not session_key:
+            return False
+        key = self.cache_key_prefix + session_key
+        if _local_cache.get(key) is not None or self._cache_get(key) is not None:
+            return True
+        return db_fallback_enabled() and super().exists(session_key)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if (
+            not must_create
+            and self._loaded is not None
+            and data == self._loaded
+            and not settings.SESSION_SAVE_EVERY_REQUEST
+        ):
+            return
+
+        key = self.cache_key
+        timeout = self.get_expiry_age()
+        if db_fallback_enabled():
+            super().save(must_create)
+            self._cache_write('set', key, data, timeout)
+        elif must_create:
+            if not self._cache_write('add', key, data, timeout):
+                raise CreateError
+        else:
+            self._cache_write('set', key, data, timeout)
+        _cache_locally(key, data)
+        self._loaded = copy.deepcopy(data)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        if db_fallback_enabled():
+            super().delete(session_key)
+        key = self.cache_key_prefix + session_key
+        _local_cache.discard(key)
+        try:
+            self._cache.delete(key)
+        except Exception:
+            if not db_fallback_enabled():
+                raise
+            logger.warning("Session cache unavailable, could not delete %s", key, exc_info=True)
+
+    def flush(self):
+        """Remove the current session data and regenerate the key."""
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+        self._loaded = None
+
+    @classmethod
+    def clear_expired(cls):
+        # Redis expires its own keys; only the database copy needs pruning.
+        if db_fallback_enabled():
+            super().clear_expired()
+
+
+def copy_database_sessions(batch_size=1000, overwrite=False):
+    """
+    Copy unexpired ``django_session`` rows into the session cache, keeping
+    their remaining lifetime. Sessions already in the cache are left alone
+    unless ``overwrite``. Returns ``(copied, skipped)``.
+    """
+    from django.contrib.sessions.models import Session
+
+    cache = caches[settings.SESSION_CACHE_ALIAS]
+    store = SessionStore()
+    write = cache.set if overwrite else cache.add
+    copied = skipped = 0
+    now = timezone.now()
+    rows = Session.objects.filter(expire_date__gt=now).order_by().values_list(
+        'session_key', 'session_data', 'expire_date'
+    )
+    for session_key, session_data, expire_date in rows.iterator(chunk_size=batch_size):
+        timeout = int((expire_date - now).total_seconds())
+        data = store.decode(session_data)
+        if timeout <= 0 or not data:
+            skipped += 1
+        elif write(KEY_PREFIX + session_key, data, timeout) is False:
+            skipped += 1
+        else:
+            copied += 1
+    return copied, skipped
@@ -0,0 +1,80 @@
+"""
+Signal handlers for the students app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.assessments.models import Assessment, GradeBook
+from apps.assessments.signals import gradebooks_bulk_updated
+from apps.courses.models import Chapter, Course, CourseEnrollment, Sequential, StudentModule
+from apps.courses.signals import enrollments_bulk_changed, student_modules_flushed
+
+from .dashboard import invalidate_course_dashboards, invalidate_user_dashboard
+from .models import Achievement, LearningAnalytics, StudentProfile
+
+
+def _invalidate_users_on_commit(*user_ids):
+    # A dashboard rebuilt before the write commits would be cached under the
+    # new version with the old rows, so bump the versions afterwards.
+    transaction.on_commit(lambda: invalidate_user_dashboard(*user_ids))
+
+
+def _invalidate_courses_on_commit(*course_pks):
+    transaction.on_commit(lambda: invalidate_course_dashboards(*course_pks))
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=LearningAnalytics)
+@receiver(post_save, sender=Achievement)
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_delete, sender=LearningAnalytics)
+@receiver(post_delete, sender=Achievement)
+@receiver(post_delete, sender=CourseEnrollment)
+def learner_row_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_users_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=StudentModule)
+@receiver(post_save, sender=GradeBook)
+def learner_progress_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_users_on_commit(instance.student_id)
+
+
+@receiver(student_modules_flushed)
+def learner_modules_flushed(sender, keys, **kwargs):
+    _invalidate_users_on_commit(*{student_id for student_id, _, _ in keys})
+
+
+@receiver(enrollments_bulk_changed)
+def learner_enrollments_bulk_changed(sender, user_ids, **kwargs):
+    _invalidate_users_on_commit(*user_ids)
+
+
+@receiver(gradebooks_bulk_updated)
+def learner_grades_bulk_updated(sender, student_ids, **kwargs):
+    _invalidate_users_on_commit(*student_ids)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Assessment)
+@receiver(post_delete, sender=Assessment)
+def course_deadlines_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_courses_on_commit(instance.pk if sender is Course else instance.course_id)
+
+
+@receiver(post_save, sender=Sequential)
+@receiver(post_delete, sender=Sequential)
+def subsection_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    course_pk = Chapter.objects.filter(pk=instance.chapter_id).values_list('course_id', flat=True).first()
+    if course_pk is not None:
+        _invalidate_courses_on_commit(course_pk)
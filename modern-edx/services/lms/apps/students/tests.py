@@ -1,7 +1,21 @@
 """
 Tests for students app.
 """
-from django.test import TestCase
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -9,7 +23,21 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from datetime import timedelta
 
+from apps.assessments.models import Assessment
+from apps.courses.models import (
+    Chapter, Course, CourseEnrollment, CourseMode, Sequential, StudentModule, Vertical, XBlock,
+)
+
+from lms.profiling import QueryBudgetTestMixin
+
+from . import sessions
+from .activity import FileEventLog, fold_events, fold_pending_events, record_learning_events
+from .dashboard import aget_student_dashboard, get_student_dashboard
+from .loaders import (
+    ModelLoader, RequestLoaderMiddleware, load_learning_analytics, load_student_profile, load_user, want_users,
+)
 from .models import StudentProfile, Achievement, LearningAnalytics
+from .views import dashboard_async
 
 
 User = get_user_model()
@@ -417,3 +445,414 @@ class StudentPermissionTests(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('major', response.data)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class StudentDashboardServiceTests(QueryBudgetTestMixin, TestCase):
+    """Test cases for the cached dashboard service."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='teststudent',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.course = Course.objects.create(
+            course_id='course-v1:Test+CS101+2024',
+            display_name='Intro to CS',
+            org='Test', course='CS101', run='2024'
+        )
+        mode = CourseMode.objects.create(
+            course_id=self.course.course_id, mode_slug='audit', mode_display_name='Audit'
+        )
+        CourseEnrollment.objects.create(user=self.user, course=self.course, mode=mode)
+        now = timezone.now()
+        self.assessment = Assessment.objects.create(
+            course=self.course, title='Midterm', assessment_type='exam',
+            difficulty='beginner', start_date=now, due_date=now + timedelta(days=3),
+            is_published=True
+        )
+    
+    def test_read_path_has_no_side_effects(self):
+        """Test the dashboard never creates profile or analytics rows."""
+        dashboard = get_student_dashboard(self.user.pk)
+        
+        self.assertIsNone(dashboard.profile.pk)
+        self.assertIsNone(dashboard.analytics.pk)
+        self.assertFalse(StudentProfile.objects.filter(user=self.user).exists())
+        self.assertFalse(LearningAnalytics.objects.filter(user=self.user).exists())
+    
+    def test_bounded_queries_and_cache_hit(self):
+        """Test the dashboard is built in batched queries and then cached."""
+        with self.assertNumQueries(8):
+            dashboard = get_student_dashboard(self.user.pk)
+        self.assertEqual(len(dashboard.course_progress), 1)
+        self.assertEqual([d.title for d in dashboard.upcoming_deadlines], ['Midterm'])
+        
+        with self.assertNumQueries(0):
+            get_student_dashboard(self.user.pk)
+    
+    def test_targeted_invalidation(self):
+        """Test learner and course changes invalidate the cached dashboard."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        get_student_dashboard(self.user.pk)
+        get_student_dashboard(other.pk)
+        
+        self.assessment.title = 'Final'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assessment.save()
+        dashboard = get_student_dashboard(self.user.pk)
+        self.assertEqual(dashboard.upcoming_deadlines[0].title, 'Final')
+        with self.assertNumQueries(0):
+            get_student_dashboard(other.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentProfile.objects.create(user=self.user, major='Physics')
+        self.assertEqual(get_student_dashboard(self.user.pk).profile.major, 'Physics')
+    
+    def test_invalidation_waits_for_commit(self):
+        """Test a dashboard rebuilt mid-transaction is still invalidated by the commit."""
+        get_student_dashboard(self.user.pk)
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            StudentProfile.objects.create(user=self.user, major='Physics')
+            with self.assertNumQueries(0):
+                get_student_dashboard(self.user.pk)
+        
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_student_dashboard(self.user.pk).profile.major, 'Physics')
+    
+    def test_progress_ignores_staff_only_blocks(self):
+        """Test blocks hidden at any outline level count toward neither total nor completed."""
+        prefix = 'course-v1:Test+CS101+2024'
+        locations = []
+        for c, hide_chapter in enumerate([False, True]):
+            chapter = Chapter.objects.create(
+                course=self.course, display_name=f'Chapter {c}', url_name=f'ch{c}',
+                location=f'block-v1:{prefix}+type@chapter+block@ch{c}', order=c,
+                visible_to_staff_only=hide_chapter,
+            )
+            for s, hide_sequential in enumerate([False, True]):
+                sequential = Sequential.objects.create(
+                    chapter=chapter, display_name=f'Sequential {c}.{s}', url_name=f'seq{c}{s}',
+                    location=f'block-v1:{prefix}+type@sequential+block@seq{c}{s}', order=s,
+                    visible_to_staff_only=hide_sequential,
+                )
+                for v, hide_vertical in enumerate([False, True]):
+                    vertical = Vertical.objects.create(
+                        sequential=sequential, display_name=f'Unit {c}.{s}.{v}', url_name=f'vert{c}{s}{v}',
+                        location=f'block-v1:{prefix}+type@vertical+block@vert{c}{s}{v}', order=v,
+                        visible_to_staff_only=hide_vertical,
+                    )
+                    for p, hide_block in enumerate([False, True]):
+                        location = f'block-v1:{prefix}+type@problem+block@prob{c}{s}{v}{p}'
+                        XBlock.objects.create(
+                            vertical=vertical, category='problem', display_name=f'Problem {location}',
+                            url_name=f'prob{c}{s}{v}{p}', location=location, order=p,
+                            visible_to_staff_only=hide_block,
+                        )
+                        locations.append(location)
+        for location in locations:
+            StudentModule.objects.create(
+                student=self.user, course=self.course, module_id=location, done='completed'
+            )
+        
+        progress, = get_student_dashboard(self.user.pk).course_progress
+        self.assertEqual((progress.modules_completed, progress.modules_total), (1, 1))
+    
+    def test_dashboard_view_within_query_budget(self):
+        """Test the dashboard page stays within its declared query budget."""
+        self.client.login(username='teststudent', password='testpass123')
+        response = self.client.get(reverse('students:dashboard'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+    
+    def test_recent_public_achievements_not_crowded_out(self):
+        """Test private achievements don't push public ones off the API dashboard."""
+        now = timezone.now()
+        titles = ['Public 0', 'Public 1', 'Private 0', 'Private 1', 'Private 2', 'Private 3', 'Private 4']
+        for age, title in enumerate(reversed(titles)):
+            achievement = Achievement.objects.create(
+                user=self.user, title=title, badge_type='completion', description='-',
+                is_public=title.startswith('Public')
+            )
+            Achievement.objects.filter(pk=achievement.pk).update(earned_date=now - timedelta(minutes=age))
+        
+        dashboard = get_student_dashboard(self.user.pk)
+        self.assertEqual([a.title for a in dashboard.achievements], titles[-1:-6:-1])
+        self.assertEqual([a.title for a in dashboard.public_achievements], ['Public 1', 'Public 0'])
+    
+    async def test_async_dashboard_matches_sync(self):
+        """Test the async service builds the same dashboard and shares its cache entries."""
+        built = await aget_student_dashboard(self.user.pk)
+        
+        self.assertEqual(len(built.course_progress), 1)
+        self.assertEqual([d.title for d in built.upcoming_deadlines], ['Midterm'])
+        cached = await sync_to_async(get_student_dashboard)(self.user.pk)
+        self.assertEqual(cached.course_versions, built.course_versions)
+        self.assertEqual(cached.course_progress, built.course_progress)
+        
+        def save_assessment():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assessment.save()
+        
+        await sync_to_async(save_assessment)()
+        rebuilt = await aget_student_dashboard(self.user.pk)
+        self.assertNotEqual(rebuilt.course_versions, built.course_versions)
+    
+    async def test_async_dashboard_view(self):
+        """Test the async view renders for learners and redirects anonymous users."""
+        factory = AsyncRequestFactory()
+        request = factory.get('/students/dashboard/')
+        request.user = AnonymousUser()
+        response = await dashboard_async(request)
+        self.assertEqual(response.status_code, 302)
+        
+        request = factory.get('/students/dashboard/')
+        request.user = self.user
+        response = await dashboard_async(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Welcome back, teststudent!')
+
+
+class LearningEventFoldTests(TestCase):
+    """Test cases for folding activity events into LearningAnalytics."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='teststudent',
+            email='test@example.com',
+            password='testpass123'
+        )
+    
+    def test_fold_increments_metrics(self):
+        """Test events are folded into totals and activity histograms."""
+        accepted, errors = record_learning_events(self.user.pk, [
+            {'type': 'session', 'duration': 600, 'timestamp': '2024-01-15T14:05:00Z'},
+            {'type': 'session', 'duration': 1200, 'timestamp': '2024-01-15T14:55:00Z'},
+            {'type': 'video', 'duration': 300, 'timestamp': '2024-01-16T09:00:00Z'},
+            {'type': 'unknown'},
+        ])
+        self.assertEqual(accepted, 3)
+        self.assertEqual(len(errors), 1)
+        
+        result = fold_pending_events()
+        self.assertEqual(result.events, 3)
+        
+        analytics = LearningAnalytics.objects.get(user=self.user)
+        self.assertEqual(analytics.sessions_count, 2)
+        self.assertEqual(analytics.total_time_spent, timedelta(minutes=30))
+        self.assertEqual(analytics.average_session_duration, timedelta(minutes=15))
+        self.assertEqual(analytics.video_watch_time, timedelta(minutes=5))
+        self.assertEqual(analytics.most_active_day_of_week, 'Monday')
+        self.assertEqual(analytics.most_active_time_of_day.hour, 14)
+        self.assertIsNone(fold_pending_events())
+    
+    def test_fold_skips_malformed_events_and_deleted_users(self):
+        """Test bad events are dropped instead of failing the whole batch."""
+        gone = User.objects.create_user(username='gone', password='testpass123')
+        gone_pk = gone.pk
+        gone.delete()
+        event = {'u': self.user.pk, 't': 'video', 'd': 60.0, 'ts': 1705327500.0}
+        
+        result = fold_events([
+            event, {'u': self.user.pk, 't': 'video'}, 'not an event', {**event, 'ts': 'soon'},
+            {**event, 'u': gone_pk},
+        ])
+        
+        self.assertEqual((result.events, result.users, result.skipped), (1, 1, 4))
+        self.assertEqual(LearningAnalytics.objects.get(user=self.user).video_watch_time, timedelta(minutes=1))
+        self.assertFalse(LearningAnalytics.objects.filter(user_id=gone_pk).exists())
+    
+    def test_file_segments_claimed_by_one_worker(self):
+        """Test a segment claimed by a live worker is left alone and a dead worker's is released."""
+        directory = Path(tempfile.mkdtemp(prefix='learning-events-'))
+        self.addCleanup(shutil.rmtree, directory)
+        event_log = FileEventLog(directory)
+        event_log.append([{'u': self.user.pk, 't': 'video', 'd': 1.0, 'ts': 0.0}])
+        
+        token, events = event_log.read_batch()
+        self.assertEqual(len(events), 1)
+        self.assertTrue(token.name.startswith(f'claimed-{os.getpid()}-batch-'))
+        segment = token.name.split('-', 2)[2]
+        
+        # Held by another live worker on this host.
+        token.rename(directory / f'claimed-{os.getppid()}-{segment}')
+        self.assertEqual(event_log.read_batch(), (None, []))
+        
+        dead = subprocess.Popen(['true'])
+        dead.wait()
+        (directory / f'claimed-{os.getppid()}-{segment}').rename(directory / f'claimed-{dead.pid}-{segment}')
+        token, events = event_log.read_batch()
+        self.assertEqual((token.name, len(events)), (f'claimed-{os.getpid()}-{segment}', 1))
+        event_log.ack(token)
+        self.assertEqual(sorted(path.name for path in directory.iterdir()), ['.lock'])
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SessionStoreTests(TestCase):
+    """Test cases for the Redis session engine and its local cache."""
+    
+    def setUp(self):
+        cache.clear()
+        sessions._local_cache.clear()
+        self.addCleanup(sessions._local_cache.clear)
+    
+    def make_session(self, **data):
+        store = sessions.SessionStore()
+        store.update(data)
+        store.save()
+        return store.session_key
+    
+    def test_load_and_save(self):
+        """Test session data round-trips between stores."""
+        session_key = self.make_session(cart=['course-1'])
+        
+        store = sessions.SessionStore(session_key)
+        self.assertEqual(store['cart'], ['course-1'])
+        store['cart'].append('course-2')
+        store.modified = True
+        store.save()
+        
+        sessions._local_cache.clear()
+        self.assertEqual(sessions.SessionStore(session_key)['cart'], ['course-1', 'course-2'])
+    
+    def test_unchanged_session_is_not_written(self):
+        """Test a save that would write back the loaded data is skipped."""
+        session_key = self.make_session(theme='dark')
+        store = sessions.SessionStore(session_key)
+        store.load()
+        
+        with self.assertNumQueries(0):
+            store.save()
+    
+    def test_database_fallback(self):
+        """Test sessions are read from the database on a cache miss or error."""
+        session_key = self.make_session(theme='dark')
+        sessions._local_cache.clear()
+        cache.clear()
+        
+        self.assertEqual(sessions.SessionStore(session_key)['theme'], 'dark')
+        self.assertEqual(cache.get(sessions.KEY_PREFIX + session_key), {'theme': 'dark'})
+        
+        sessions._local_cache.clear()
+        with mock.patch.object(LocMemCache, 'get', side_effect=ConnectionError('down')):
+            self.assertEqual(sessions.SessionStore(session_key)['theme'], 'dark')
+    
+    def test_delete_and_flush(self):
+        """Test deleted and flushed sessions are gone from every layer."""
+        session_key = self.make_session(theme='dark')
+        sessions.SessionStore().delete(session_key)
+        self.assertFalse(sessions.SessionStore().exists(session_key))
+        
+        store = sessions.SessionStore(self.make_session(theme='light'))
+        old_key = store.session_key
+        store.flush()
+        self.assertIsNone(store.session_key)
+        self.assertEqual(sessions.SessionStore(old_key).load(), {})
+    
+    def test_authenticated_sessions_skip_local_cache(self):
+        """Test a logout in one worker is seen at once by the others."""
+        user = User.objects.create_user(username='teststudent', password='testpass123')
+        anonymous_key = self.make_session(theme='dark')
+        session_key = self.make_session(_auth_user_id=str(user.pk))
+        self.assertIsNotNone(sessions._local_cache.get(sessions.KEY_PREFIX + anonymous_key))
+        self.assertIsNone(sessions._local_cache.get(sessions.KEY_PREFIX + session_key))
+        
+        self.assertEqual(sessions.SessionStore(session_key)['_auth_user_id'], str(user.pk))
+        # Another worker logs the user out: its local cache is not this one's.
+        cache.delete(sessions.KEY_PREFIX + session_key)
+        Session.objects.filter(session_key=session_key).delete()
+        self.assertEqual(sessions.SessionStore(session_key).load(), {})
+    
+    def test_copy_database_sessions(self):
+        """Test database sessions are copied into the cache once."""
+        fresh = DBSessionStore()
+        fresh['theme'] = 'dark'
+        fresh.create()
+        present = DBSessionStore()
+        present['theme'] = 'light'
+        present.create()
+        cache.set(sessions.KEY_PREFIX + present.session_key, {'theme': 'cached'})
+        expired = DBSessionStore()
+        expired['theme'] = 'old'
+        expired.create()
+        Session.objects.filter(session_key=expired.session_key).update(
+            expire_date=timezone.now() - timedelta(days=1)
+        )
+        
+        self.assertEqual(sessions.copy_database_sessions(), (1, 1))
+        self.assertEqual(cache.get(sessions.KEY_PREFIX + fresh.session_key), {'theme': 'dark'})
+        self.assertEqual(cache.get(sessions.KEY_PREFIX + present.session_key), {'theme': 'cached'})
+        self.assertIsNone(cache.get(sessions.KEY_PREFIX + expired.session_key))
+        
+        self.assertEqual(sessions.copy_database_sessions(overwrite=True), (2, 0))
+        self.assertEqual(cache.get(sessions.KEY_PREFIX + present.session_key), {'theme': 'light'})
+
+
+class RequestLoaderTests(TestCase):
+    """Test cases for the request-scoped loaders."""
+    
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'learner{i}', password='testpass123') for i in range(3)
+        ]
+        self.achievements = [
+            Achievement.objects.create(user=user, title=f'Badge {i}', badge_type='completion', description='-')
+            for i, user in enumerate(self.users + self.users)
+        ]
+        self.profile = StudentProfile.objects.create(user=self.users[0], major='Physics')
+    
+    def in_request(self, view):
+        """Run ``view`` inside RequestLoaderMiddleware and return the response."""
+        def get_response(request):
+            view(request)
+            return HttpResponse()
+        return RequestLoaderMiddleware(get_response)(RequestFactory().get('/'))
+    
+    def test_model_loader_batches_wanted_keys(self):
+        """Test queued keys load in one query and misses are remembered."""
+        loader = ModelLoader(User)
+        loader.want([user.pk for user in self.users] + [0])
+        
+        with self.assertNumQueries(1):
+            loaded = [loader.load(user.pk) for user in self.users]
+            self.assertIsNone(loader.load(0))
+        self.assertEqual(loaded, self.users)
+        self.assertEqual(loader.stats.to_dict(), {
+            'lookups': 4, 'hits': 3, 'queries': 1, 'rows': 3, 'queries_saved': 3,
+        })
+    
+    @override_settings(REQUEST_LOADER_STATS_HEADER=True)
+    def test_lookups_share_one_query_per_model(self):
+        """Test a request fetches each row once however often it is dereferenced."""
+        achievements = list(Achievement.objects.all())
+        
+        def view(request):
+            with self.assertNumQueries(1):
+                want_users(achievements)
+                for achievement in achievements:
+                    load_user(achievement)
+            with self.assertNumQueries(2):
+                for _ in range(3):
+                    self.assertEqual(load_student_profile(self.users[0].pk).major, 'Physics')
+                    self.assertIsNone(load_learning_analytics(self.users[0].pk))
+        
+        response = self.in_request(view)
+        self.assertEqual(response['X-Loader-Stats'], 'lookups=12; queries=3; saved=9')
+    
+    def test_known_rows(self):
+        """Test rows the caller already holds are reused, and earlier loads win inside a request."""
+        stale = StudentProfile.objects.get(pk=self.profile.pk)
+        stale.major = 'Chemistry'
+        with self.assertNumQueries(0):
+            self.assertIs(load_student_profile(self.users[0].pk, known=stale), stale)
+        
+        def view(request):
+            fresh = load_student_profile(self.users[0].pk)
+            with self.assertNumQueries(0):
+                self.assertIs(load_student_profile(self.users[0].pk, known=stale), fresh)
+        
+        self.in_request(view)
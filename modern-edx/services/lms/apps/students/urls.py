@@ -1,6 +1,7 @@
 """
 URL configuration for students app.
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -12,10 +13,12 @@ router = DefaultRouter()
 
 urlpatterns = [
     # Web views
-    path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/', views.dashboard_async if settings.LMS_ASYNC_VIEWS else views.dashboard,
+         name='dashboard'),
     path('profile/', views.profile_view, name='profile'),
     path('achievements/', views.achievements_view, name='achievements'),
     
     # API views
+    path('api/activity/events/', views.record_activity_events, name='activity-events'),
     path('api/', include(router.urls)),
 ]
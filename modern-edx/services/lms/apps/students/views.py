@@ -1,28 +1,56 @@
 """
 Student views for Modern edX LMS.
 """
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from apps.courses.decorators import async_login_required
+from lms.profiling import query_budget
+
+from .activity import record_learning_events
+from .dashboard import aget_student_dashboard, get_student_dashboard
 from .models import StudentProfile, Achievement, LearningAnalytics
 
 User = get_user_model()
 
+@query_budget(10)
 @login_required
 def dashboard(request):
     """Student dashboard."""
-    profile, created = StudentProfile.objects.get_or_create(user=request.user)
-    achievements = Achievement.objects.filter(user=request.user)[:5]
-    analytics, created = LearningAnalytics.objects.get_or_create(user=request.user)
+    dashboard = get_student_dashboard(request.user.pk)
     
     context = {
         'title': 'Student Dashboard',
-        'profile': profile,
-        'achievements': achievements,
-        'analytics': analytics,
+        'profile': dashboard.profile,
+        'achievements': dashboard.achievements,
+        'analytics': dashboard.analytics,
+        'course_progress': dashboard.course_progress,
+        'upcoming_deadlines': dashboard.pending_deadlines(),
     }
     return render(request, 'students/dashboard.html', context)
 
+@query_budget(10)
+@async_login_required
+async def dashboard_async(request):
+    """Async student dashboard (served when LMS_ASYNC_VIEWS is on)."""
+    dashboard = await aget_student_dashboard(request.user.pk)
+    
+    context = {
+        'title': 'Student Dashboard',
+        'profile': dashboard.profile,
+        'achievements': dashboard.achievements,
+        'analytics': dashboard.analytics,
+        'course_progress': dashboard.course_progress,
+        'upcoming_deadlines': dashboard.pending_deadlines(),
+    }
+    return await sync_to_async(render)(request, 'students/dashboard.html', context)
+
 @login_required
 def profile_view(request):
     """Student profile page."""
@@ -44,3 +72,26 @@ def achievements_view(request):
         'achievements': achievements,
     }
     return render(request, 'students/achievements.html', context)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def record_activity_events(request):
+    """
+    Accept a batch of the learner's activity events for asynchronous folding.
+
+    Body: ``{"events": [{"type": "video", "duration": 95, "timestamp": "..."}]}``.
+    """
+    events = request.data.get('events') if isinstance(request.data, dict) else None
+    if not isinstance(events, list):
+        return Response({'detail': 'events must be a list.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > settings.LEARNING_EVENT_MAX_BATCH:
+        return Response(
+            {'detail': f'At most {settings.LEARNING_EVENT_MAX_BATCH} events per request.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    accepted, errors = record_learning_events(request.user.pk, events)
+    return Response({
+        'accepted': accepted,
+        'rejected': [{'index': index, 'error': error} for index, error in errors],
+    }, status=status.HTTP_202_ACCEPTED)
@@ -3,10 +3,10 @@ Health check URLs for Modern edX LMS.
 """
 from django.urls import path
 from django.http import JsonResponse
-from django.db import connection
-from django.core.cache import cache
-import redis
-from django.conf import settings
+
+from shared.monitoring.health import get_health_monitor
+
+from .profiling import profiling_metrics
 
 def health_check(request):
     """Basic health check endpoint."""
@@ -16,31 +16,39 @@ def health_check(request):
         'version': '1.0.0'
     })
 
+def health_live(request):
+    """Liveness probe: the process is serving requests; dependencies are not checked."""
+    return JsonResponse({'status': 'alive', 'service': 'lms'})
+
+def health_ready(request):
+    """Readiness probe: last background check results with their age (503 when not ready)."""
+    snapshot = get_health_monitor().snapshot()
+    snapshot['status'] = 'ready' if snapshot['ready'] else 'unavailable'
+    snapshot['service'] = 'lms'
+    return JsonResponse(snapshot, status=200 if snapshot['ready'] else 503)
+
 def health_detailed(request):
     """Detailed health check with database and cache status."""
-    status = {'status': 'healthy', 'checks': {}}
-    
-    # Database check
-    try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT 1")
-        status['checks']['database'] = 'healthy'
-    except Exception as e:
-        status['checks']['database'] = f'unhealthy: {str(e)}'
-        status['status'] = 'unhealthy'
-    
-    # Cache check
-    try:
-        cache.set('health_check', 'test', 1)
-        cache.get('health_check')
-        status['checks']['cache'] = 'healthy'
-    except Exception as e:
-        status['checks']['cache'] = f'unhealthy: {str(e)}'
-        status['status'] = 'unhealthy'
-    
+    snapshot = get_health_monitor().snapshot()
+    status = {'status': 'healthy' if snapshot['ready'] else 'unhealthy', 'checks': {}}
+    for name, result in snapshot['checks'].items():
+        if result['status'] == 'ok':
+            status['checks'][name] = 'healthy'
+        else:
+            status['checks'][name] = f"unhealthy: {result.get('detail') or result['status']}"
     return JsonResponse(status)
 
+def health_metrics(request):
+    """Per-view query count, SQL time and cache histograms since process start (staff only)."""
+    # The histograms include SQL fingerprints, which describe the schema.
+    if not request.user.is_staff:
+        return JsonResponse({'detail': 'Staff access required.'}, status=403)
+    return JsonResponse(profiling_metrics())
+
 urlpatterns = [
     path('', health_check, name='health_check'),
+    path('live/', health_live, name='health_live'),
+    path('ready/', health_ready, name='health_ready'),
     path('detailed/', health_detailed, name='health_detailed'),
+    path('metrics/', health_metrics, name='health_metrics'),
 ]
@@ -0,0 +1,36 @@
+"""
+Business counters for Modern edX LMS.
+
+The counters live in the shared metrics registry (``shared.monitoring``,
+bundled next to the service in its image) and are exported at
+``/metrics``; take ``rate(...[1m]) * 60`` for per-minute figures. With
+``METRICS_ENABLED`` off they count nothing.
+
+Business events are counted once their transaction commits, so rolled
+back writes never show up.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from shared.monitoring import REGISTRY
+
+
+class _NullCounter:
+    def inc(self, amount=1, **labels):
+        pass
+
+
+def _counter(name, documentation, labelnames=()):
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        return _NullCounter()
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def inc_on_commit(counter, amount=1):
+    """Increment ``counter`` by ``amount`` after the current transaction commits."""
+    if amount:
+        transaction.on_commit(lambda: counter.inc(amount))
+
+
+ENROLLMENTS = _counter('lms_enrollments_total', 'Course enrollments created or reactivated.')
+ATTEMPTS_GRADED = _counter('lms_attempts_graded_total', 'Assessment attempts scored.')
@@ -0,0 +1,342 @@
+"""
+Per-request database and cache profiling for Modern edX LMS.
+
+``QueryProfilingMiddleware`` records, for every request (sync or async),
+the number of queries, total SQL time, repeated statements (by
+fingerprint: whitespace collapsed, ``IN`` lists folded) and cache
+hits/misses. Each request's ``RequestProfile`` is
+attached to the response as ``response.query_profile``; it is also sent
+as ``X-DB-*``/``X-Cache-*`` headers when ``QUERY_PROFILE_HEADERS`` is on
+(the default under DEBUG) and aggregated per resolved URL name into the
+histograms served to staff at ``/health/metrics/``.
+
+Views declare what they may cost with ``@query_budget(n)``. Requests over
+budget are logged and counted, and ``QueryBudgetTestMixin`` turns the
+budget into a test assertion.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SQL_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+# Set while get_many runs, since backends like LocMemCache implement it with get().
+_in_get_many = contextvars.ContextVar('in_cache_get_many', default=False)
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """Normalize ``sql`` so repeats of one statement compare equal."""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+def query_budget(max_queries):
+    """Declare the most queries a view may issue per request."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def view_query_budget(resolver_match):
+    """The budget declared on the resolved view (or its class), if any."""
+    if resolver_match is None:
+        return None
+    func = resolver_match.func
+    for candidate in (func, getattr(func, 'view_class', None), getattr(func, 'cls', None)):
+        budget = getattr(candidate, 'query_budget', None)
+        if budget is not None:
+            return budget
+    return None
+
+
+@dataclass
+class RequestProfile:
+    queries: int = 0
+    sql_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    @property
+    def sql_time_ms(self):
+        return self.sql_time * 1000.0
+
+    @property
+    def duplicates(self):
+        """``{fingerprint: count}`` for statements issued more than once."""
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    @property
+    def duplicate_queries(self):
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def record_query(self, sql, elapsed):
+        self.queries += 1
+        self.sql_time += elapsed
+        self.fingerprints[fingerprint(sql)] += 1
+
+
+def _record_sql(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def _wrap_connection(sender, connection, **kwargs):
+    # Connections are per thread, and async views query from the executor
+    # thread, so every connection records into the profile of the request
+    # context it runs in instead of being wrapped per request.
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_sql)
+
+
+def _instrument_cache(cache):
+    """Count hits and misses of ``cache`` (this thread's backend instance) in place."""
+    if getattr(cache, '_lms_profiled', False):
+        return
+    get, get_many = cache.get, cache.get_many
+    sentinel = object()
+
+    def profiled_get(key, default=None, version=None):
+        value = get(key, sentinel, version=version)
+        profile = _current_profile.get()
+        if profile is not None and not _in_get_many.get():
+            if value is sentinel:
+                profile.cache_misses += 1
+            else:
+                profile.cache_hits += 1
+        return default if value is sentinel else value
+
+    def profiled_get_many(keys, version=None):
+        keys = list(keys)
+        token = _in_get_many.set(True)
+        try:
+            found = get_many(keys, version=version)
+        finally:
+            _in_get_many.reset(token)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.cache_hits += len(found)
+            profile.cache_misses += len(keys) - len(found)
+        return found
+
+    cache.get, cache.get_many = profiled_get, profiled_get_many
+    cache._lms_profiled = True
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+
+    def to_dict(self):
+        labels = [f'le_{bound}' for bound in self.bounds] + ['le_inf']
+        cumulative, buckets = 0, {}
+        for label, count in zip(labels, self.counts):
+            cumulative += count
+            buckets[label] = cumulative
+        return {'buckets': buckets, 'sum': round(self.total, 3), 'count': cumulative}
+
+
+class _ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = _Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_time_ms = _Histogram(SQL_TIME_BUCKETS_MS)
+        self.max_queries = 0
+        self.duplicate_queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.over_budget = 0
+        self.top_duplicates = Counter()
+
+    def observe(self, profile, over_budget):
+        self.requests += 1
+        self.queries.observe(profile.queries)
+        self.sql_time_ms.observe(profile.sql_time_ms)
+        self.max_queries = max(self.max_queries, profile.queries)
+        self.duplicate_queries += profile.duplicate_queries
+        self.cache_hits += profile.cache_hits
+        self.cache_misses += profile.cache_misses
+        self.over_budget += over_budget
+        for sql, count in profile.duplicates.items():
+            self.top_duplicates[sql] += count - 1
+        if len(self.top_duplicates) > 50:
+            self.top_duplicates = Counter(dict(self.top_duplicates.most_common(20)))
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'queries': self.queries.to_dict(),
+            'sql_time_ms': self.sql_time_ms.to_dict(),
+            'max_queries': self.max_queries,
+            'duplicate_queries': self.duplicate_queries,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'over_budget': self.over_budget,
+            'top_duplicates': [
+                {'sql': sql, 'repeats': count} for sql, count in self.top_duplicates.most_common(5)
+            ],
+        }
+
+
+class ProfileRegistry:
+    """Process-wide per-view aggregates of request profiles."""
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view_name, profile, over_budget=False):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = _ViewStats()
+            stats.observe(profile, over_budget)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = ProfileRegistry()
+
+
+class QueryProfilingMiddleware:
+    """Profile each request; keep it first in MIDDLEWARE so session and auth queries count."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_PROFILING', True):
+            return self.get_response(request)
+
+        profile = self._start()
+        token = _current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'QUERY_PROFILING', True):
+            return await self.get_response(request)
+
+        profile = self._start()
+        token = _current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self._finish(request, response, profile)
+
+    @staticmethod
+    def _start():
+        for alias in settings.CACHES:
+            _instrument_cache(caches[alias])
+        # Connections opened before this module was imported missed connection_created.
+        for connection in connections.all(initialized_only=True):
+            _wrap_connection(None, connection)
+        return RequestProfile()
+
+    def _finish(self, request, response, profile):
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name = resolver_match.view_name if resolver_match else '<unresolved>'
+        budget = view_query_budget(resolver_match)
+        over_budget = budget is not None and profile.queries > budget
+        if over_budget:
+            logger.warning(
+                "%s issued %d queries (budget %d, %d duplicates)",
+                view_name, profile.queries, budget, profile.duplicate_queries,
+            )
+        registry.observe(view_name, profile, over_budget)
+
+        response.query_profile = profile
+        response.query_budget = budget
+        if getattr(settings, 'QUERY_PROFILE_HEADERS', settings.DEBUG):
+            response['X-DB-Queries'] = str(profile.queries)
+            response['X-DB-Time-ms'] = f'{profile.sql_time_ms:.1f}'
+            response['X-DB-Duplicate-Queries'] = str(profile.duplicate_queries)
+            response['X-Cache-Hits'] = str(profile.cache_hits)
+            response['X-Cache-Misses'] = str(profile.cache_misses)
+        return response
+
+
+def profiling_metrics():
+    """Aggregated per-view profiles, for ``/health/metrics/``."""
+    return {
+        'query_count_buckets': list(QUERY_COUNT_BUCKETS),
+        'sql_time_buckets_ms': list(SQL_TIME_BUCKETS_MS),
+        'views': registry.snapshot(),
+    }
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin: ``assertWithinQueryBudget(response)`` fails when the
+    request behind ``response`` issued more queries than its view's
+    ``@query_budget`` (or ``budget``, when given).
+    """
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        profile = getattr(response, 'query_profile', None)
+        if profile is None:
+            self.fail('Response was not profiled; is QueryProfilingMiddleware installed and QUERY_PROFILING on?')
+        budget = budget if budget is not None else getattr(response, 'query_budget', None)
+        if budget is None:
+            self.fail('The view declares no @query_budget and no budget was given.')
+        if profile.queries > budget:
+            repeated = '\n'.join(
+                f'  {count}x {sql}' for sql, count in sorted(profile.duplicates.items(), key=lambda i: -i[1])
+            )
+            self.fail(
+                f'{profile.queries} queries exceed the budget of {budget}'
+                + (f'; repeated statements:\n{repeated}' if repeated else '')
+            )
@@ -39,9 +39,15 @@ LOCAL_APPS = [
     'apps.assessments',
 ]
 
-INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
+# Apps from services/shared, copied next to each service in its image (a required dependency)
+SHARED_APPS = [
+    'shared.authlog',
+]
+
+INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + SHARED_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'lms.profiling.QueryProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -49,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.students.loaders.RequestLoaderMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -98,8 +105,124 @@ CACHES = {
     }
 }
 
-# Session storage - use database for reliability
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Route course detail/progress, my-courses and the dashboard to their async
+# views (run the ASGI application, lms.asgi, when enabling this)
+LMS_ASYNC_VIEWS = config('LMS_ASYNC_VIEWS', default=False, cast=bool)
+
+# Course structure cache (outline tree per course)
+COURSE_STRUCTURE_CACHE_TIMEOUT = config('COURSE_STRUCTURE_CACHE_TIMEOUT', default=3600, cast=int)
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = config('COURSE_STRUCTURE_LOCAL_CACHE_SIZE', default=128, cast=int)
+
+# Per-learner course progress (memoized until the learner's next module write)
+COURSE_PROGRESS_CACHE_TIMEOUT = config('COURSE_PROGRESS_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Course catalog (cached keyset pages)
+COURSE_CATALOG_CACHE_TIMEOUT = config('COURSE_CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+COURSE_CATALOG_PAGE_SIZE = config('COURSE_CATALOG_PAGE_SIZE', default=20, cast=int)
+COURSE_CATALOG_MAX_PAGE_SIZE = config('COURSE_CATALOG_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Course search backend: 'postgres', 'memory' or 'auto' (by database vendor)
+COURSE_SEARCH_BACKEND = config('COURSE_SEARCH_BACKEND', default='auto')
+
+# Sharded enrollment counters (rows per course/mode/is_active)
+ENROLLMENT_COUNTER_SHARDS = config('ENROLLMENT_COUNTER_SHARDS', default=8, cast=int)
+
+# Bulk enrollment (users resolved and inserted per batch)
+BULK_ENROLL_BATCH_SIZE = config('BULK_ENROLL_BATCH_SIZE', default=1000, cast=int)
+
+# Certificate generation (learners per batch, render processes; 0 renders inline)
+CERTIFICATE_PASSING_GRADE = config('CERTIFICATE_PASSING_GRADE', default=60.0, cast=float)
+CERTIFICATE_BATCH_SIZE = config('CERTIFICATE_BATCH_SIZE', default=1000, cast=int)
+CERTIFICATE_RENDER_WORKERS = config('CERTIFICATE_RENDER_WORKERS', default=4, cast=int)
+CERTIFICATE_VERIFY_URL_FORMAT = config('CERTIFICATE_VERIFY_URL_FORMAT', default='/courses/certificates/verify/{uuid}/')
+
+# Certificate verification cache (seconds; misses are cached for unknown UUIDs)
+CERTIFICATE_VERIFY_CACHE_TIMEOUT = config('CERTIFICATE_VERIFY_CACHE_TIMEOUT', default=86400, cast=int)
+CERTIFICATE_VERIFY_MISS_CACHE_TIMEOUT = config('CERTIFICATE_VERIFY_MISS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Prometheus metrics at /metrics (shared.monitoring, bundled into the service image).
+# METRICS_MULTIPROC_DIR must be shared by all gunicorn workers to aggregate them.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_SERVICE = 'lms'
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+METRICS_CELERY_QUEUES = config('METRICS_CELERY_QUEUES', default='celery', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+# /metrics is served to these networks (checked against get_client_ip) or to a matching bearer token
+METRICS_ALLOWED_NETWORKS = config('METRICS_ALLOWED_NETWORKS', default='127.0.0.1/32,::1/128', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+METRICS_BEARER_TOKEN = config('METRICS_BEARER_TOKEN', default='')
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'shared.monitoring.middleware.MetricsMiddleware')
+
+# Health probes (/health/live/, /health/ready/) serve results refreshed in the background
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=10.0, cast=float)
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=2.0, cast=float)
+HEALTH_STALE_AFTER = config('HEALTH_STALE_AFTER', default=30.0, cast=float)
+HEALTH_DEEP_CHECKS = config('HEALTH_DEEP_CHECKS', default=False, cast=bool)
+HEALTH_DEEP_CHECK_INTERVAL = config('HEALTH_DEEP_CHECK_INTERVAL', default=60.0, cast=float)
+
+# Authentication log (shared.authlog): events are buffered ('redis', 'memory' or 'sync')
+# and written in batches; archive_auth_logs applies retention
+AUTH_LOG_BUFFER = config('AUTH_LOG_BUFFER', default='redis')
+AUTH_LOG_REDIS_URL = config('AUTH_LOG_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0'))
+AUTH_LOG_FLUSH_INTERVAL = config('AUTH_LOG_FLUSH_INTERVAL', default=0.25, cast=float)
+AUTH_LOG_BATCH_SIZE = config('AUTH_LOG_BATCH_SIZE', default=500, cast=int)
+AUTH_LOG_MAX_BATCHES_PER_FLUSH = config('AUTH_LOG_MAX_BATCHES_PER_FLUSH', default=20, cast=int)
+AUTH_LOG_RETENTION_DAYS = config('AUTH_LOG_RETENTION_DAYS', default=365, cast=int)
+AUTH_LOG_ARCHIVE_DIR = config('AUTH_LOG_ARCHIVE_DIR', default='')
+
+# Login throttling (shared.authentication.backends.ThrottledModelBackend): sliding
+# windows per client IP, account and (IP, account), as scope -> (attempts, seconds)
+AUTHENTICATION_BACKENDS = ['shared.authentication.backends.ThrottledModelBackend']
+LOGIN_THROTTLE_ENABLED = config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool)
+LOGIN_THROTTLE_BACKEND = config('LOGIN_THROTTLE_BACKEND', default='redis')
+LOGIN_THROTTLE_REDIS_URL = config('LOGIN_THROTTLE_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0'))
+LOGIN_THROTTLE_MEMORY_MAX_KEYS = config('LOGIN_THROTTLE_MEMORY_MAX_KEYS', default=100000, cast=int)
+LOGIN_THROTTLE_RULES = {
+    'ip': (config('LOGIN_THROTTLE_IP_LIMIT', default=50, cast=int), 300),
+    'account': (config('LOGIN_THROTTLE_ACCOUNT_LIMIT', default=10, cast=int), 900),
+    'ip_account': (config('LOGIN_THROTTLE_IP_ACCOUNT_LIMIT', default=5, cast=int), 300),
+}
+
+# Reverse proxies in front of the service; X-Forwarded-For entries beyond them are ignored
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
+# Per-request query/cache profiling (aggregated at /health/metrics/; X-DB-* headers default to DEBUG)
+QUERY_PROFILING = config('QUERY_PROFILING', default=True, cast=bool)
+QUERY_PROFILE_HEADERS = config('QUERY_PROFILE_HEADERS', default=DEBUG, cast=bool)
+
+# Request-scoped user/profile loaders (X-Loader-Stats response header; defaults to DEBUG)
+REQUEST_LOADER_STATS_HEADER = config('REQUEST_LOADER_STATS_HEADER', default=DEBUG, cast=bool)
+
+# Student dashboard cache
+STUDENT_DASHBOARD_CACHE_TIMEOUT = config('STUDENT_DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+STUDENT_DASHBOARD_DEADLINES = config('STUDENT_DASHBOARD_DEADLINES', default=10, cast=int)
+
+# Learning activity event log ('file' segments or a 'redis' stream)
+LEARNING_EVENT_LOG = config('LEARNING_EVENT_LOG', default='file')
+LEARNING_EVENT_LOG_DIR = config('LEARNING_EVENT_LOG_DIR', default=str(BASE_DIR / 'journal' / 'learning_events'))
+LEARNING_EVENT_REDIS_URL = config('LEARNING_EVENT_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0'))
+LEARNING_EVENT_STREAM = config('LEARNING_EVENT_STREAM', default='learning-events')
+LEARNING_EVENT_STREAM_MAXLEN = config('LEARNING_EVENT_STREAM_MAXLEN', default=1000000, cast=int)
+LEARNING_EVENT_MAX_BATCH = config('LEARNING_EVENT_MAX_BATCH', default=500, cast=int)
+LEARNING_EVENT_FOLD_INTERVAL = config('LEARNING_EVENT_FOLD_INTERVAL', default=5.0, cast=float)
+
+# Instructor analytics rollups (profiles per batch, seconds re-read behind the high-water mark)
+INSTRUCTOR_ROLLUP_BATCH_SIZE = config('INSTRUCTOR_ROLLUP_BATCH_SIZE', default=500, cast=int)
+INSTRUCTOR_ROLLUP_OVERLAP = config('INSTRUCTOR_ROLLUP_OVERLAP', default=60, cast=int)
+
+# StudentModule write-behind buffer
+STUDENT_MODULE_BUFFER_JOURNAL_DIR = config('STUDENT_MODULE_BUFFER_JOURNAL_DIR', default=str(BASE_DIR / 'journal' / 'student_module'))
+STUDENT_MODULE_BUFFER_MAX_PENDING = config('STUDENT_MODULE_BUFFER_MAX_PENDING', default=500, cast=int)
+STUDENT_MODULE_BUFFER_FLUSH_INTERVAL = config('STUDENT_MODULE_BUFFER_FLUSH_INTERVAL', default=2.0, cast=float)
+STUDENT_MODULE_BUFFER_BATCH_SIZE = config('STUDENT_MODULE_BUFFER_BATCH_SIZE', default=500, cast=int)
+STUDENT_MODULE_BUFFER_FSYNC = config('STUDENT_MODULE_BUFFER_FSYNC', default=True, cast=bool)
+
+# Session storage - Redis (SESSION_CACHE_ALIAS) behind a short-lived per-process
+# LRU, written through to the database when SESSION_DB_FALLBACK is on
+SESSION_ENGINE = config('SESSION_ENGINE', default='apps.students.sessions')
+SESSION_DB_FALLBACK = config('SESSION_DB_FALLBACK', default=True, cast=bool)
+SESSION_LOCAL_CACHE_SIZE = config('SESSION_LOCAL_CACHE_SIZE', default=10000, cast=int)
+SESSION_LOCAL_CACHE_TIMEOUT = config('SESSION_LOCAL_CACHE_TIMEOUT', default=5, cast=int)
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
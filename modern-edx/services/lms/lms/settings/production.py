@@ -46,6 +46,9 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # Disable CORS for all origins in production
 CORS_ALLOW_ALL_ORIGINS = False
 
+# Learning events are folded centrally from the Redis stream; file segments are host-local
+LEARNING_EVENT_LOG = config('LEARNING_EVENT_LOG', default='redis')
+
 # Database connection pooling
 DATABASES['default']['CONN_MAX_AGE'] = 60
 
@@ -1,6 +1,8 @@
 """
 Test settings for Modern edX LMS.
 """
+import tempfile
+
 from .base import *
 
 # Use in-memory database for tests
@@ -18,6 +20,19 @@ CACHES = {
     }
 }
 
+# Keep the StudentModule buffer in memory and flush explicitly in tests
+STUDENT_MODULE_BUFFER_JOURNAL_DIR = None
+STUDENT_MODULE_BUFFER_FLUSH_INTERVAL = 0
+
+# Write authentication log events immediately
+AUTH_LOG_BUFFER = 'sync'
+
+# Per-process login throttle
+LOGIN_THROTTLE_BACKEND = 'memory'
+
+# Learning events go to a throwaway directory
+LEARNING_EVENT_LOG_DIR = tempfile.mkdtemp(prefix='learning-events-')
+
 # Use dummy email backend in tests
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
@@ -0,0 +1,530 @@
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch, path
+from django.utils import timezone
+
+from shared.authentication.throttling import LoginThrottle, MemoryThrottleBackend, reset_login_throttle
+from shared.authlog import audit
+from shared.authlog.audit import AuthLogPipeline, write_rows
+from shared.authlog.models import AuthenticationLog
+from shared.monitoring.health import FAILED, OK, TIMEOUT, Check, HealthMonitor
+from shared.monitoring.metrics import ARCHIVE_FILE, MetricsRegistry, aggregate, render_text
+from shared.monitoring.middleware import REQUESTS, MetricsMiddleware
+from shared.utils.helpers import get_client_ip
+
+from . import profiling
+from .profiling import QueryProfilingMiddleware, fingerprint, query_budget
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+ASYNC_PROBE_CALLS = []
+
+
+async def async_probe(request):
+    ASYNC_PROBE_CALLS.append((threading.get_ident(), asyncio.current_task()))
+    await User.objects.acount()
+    return HttpResponse()
+
+
+urlpatterns = [path('async-probe/', async_probe, name='async_probe')]
+
+
+class FingerprintTest(TestCase):
+    def test_whitespace_and_in_lists_fold(self):
+        self.assertEqual(
+            fingerprint('SELECT *\n  FROM "auth_user"\tWHERE "id" IN (%s, %s, %s)'),
+            'SELECT * FROM "auth_user" WHERE "id" IN (...)',
+        )
+        self.assertEqual(fingerprint('SELECT 1 WHERE a IN (?)'), fingerprint('SELECT 1 WHERE a IN (?, ?)'))
+
+    def test_distinct_statements_stay_distinct(self):
+        self.assertNotEqual(fingerprint('SELECT a FROM t WHERE id = %s'), fingerprint('SELECT b FROM t WHERE id = %s'))
+        self.assertEqual(fingerprint('SELECT 1 WHERE a IN (1, 2)'), 'SELECT 1 WHERE a IN (1, 2)')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, QUERY_PROFILING=True, QUERY_PROFILE_HEADERS=True)
+class QueryProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        profiling.registry.reset()
+        self.addCleanup(profiling.registry.reset)
+        self.user = User.objects.create_user(username='learner', password='test')
+
+    def run_view(self, view, budget=None):
+        if budget is not None:
+            view = query_budget(budget)(view)
+        request = RequestFactory().get('/probe/')
+
+        def get_response(request):
+            request.resolver_match = ResolverMatch(view, (), {}, url_name='probe')
+            return view(request)
+        return QueryProfilingMiddleware(get_response)(request)
+
+    def test_counts_queries_duplicates_and_cache(self):
+        def view(request):
+            for _ in range(3):
+                list(User.objects.filter(pk__in=[self.user.pk, 0]))
+            User.objects.count()
+            cache = caches['default']
+            cache.get('probe-key')
+            cache.set('probe-key', 1)
+            cache.get('probe-key')
+            cache.get_many(['probe-key', 'other-key'])
+            return HttpResponse()
+
+        response = self.run_view(view)
+
+        profile = response.query_profile
+        self.assertEqual((profile.queries, profile.duplicate_queries), (4, 2))
+        self.assertEqual(list(profile.duplicates.values()), [3])
+        self.assertEqual((profile.cache_hits, profile.cache_misses), (2, 2))
+        self.assertEqual(response['X-DB-Queries'], '4')
+        self.assertEqual((response['X-Cache-Hits'], response['X-Cache-Misses']), ('2', '2'))
+
+    def test_aggregates_per_view_and_counts_budget_overruns(self):
+        def view(request):
+            User.objects.count()
+            User.objects.count()
+            return HttpResponse()
+
+        self.run_view(view, budget=1)
+        response = self.run_view(view, budget=1)
+
+        self.assertEqual(response.query_budget, 1)
+        stats = profiling.profiling_metrics()['views']['probe']
+        self.assertEqual((stats['requests'], stats['over_budget'], stats['max_queries']), (2, 2, 2))
+        self.assertEqual(stats['queries']['buckets']['le_2'], 2)
+        self.assertEqual(stats['top_duplicates'][0]['repeats'], 2)
+
+    @override_settings(ROOT_URLCONF='lms.tests', MIDDLEWARE=['lms.profiling.QueryProfilingMiddleware'])
+    async def test_async_view_stays_async(self):
+        ASYNC_PROBE_CALLS.clear()
+
+        response = await self.async_client.get('/async-probe/')
+
+        # Behind a sync-only middleware the view would run in a task of its own,
+        # started from a sync_to_async thread.
+        (thread, task), = ASYNC_PROBE_CALLS
+        self.assertEqual((thread, task), (threading.get_ident(), asyncio.current_task()))
+        self.assertTrue(iscoroutinefunction(QueryProfilingMiddleware(async_probe)))
+        self.assertEqual(response['X-DB-Queries'], '1')
+        self.assertEqual(profiling.profiling_metrics()['views']['async_probe']['requests'], 1)
+
+    @override_settings(QUERY_PROFILING=False)
+    def test_disabled(self):
+        response = self.run_view(lambda request: HttpResponse())
+        self.assertFalse(hasattr(response, 'query_profile'))
+
+
+class HealthMetricsTest(TestCase):
+    def test_staff_only(self):
+        self.assertEqual(self.client.get('/health/metrics/').status_code, 403)
+
+        self.client.force_login(User.objects.create_user(username='learner', password='test'))
+        self.assertEqual(self.client.get('/health/metrics/').status_code, 403)
+
+        self.client.force_login(User.objects.create_user(username='ops', password='test', is_staff=True))
+        response = self.client.get('/health/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('views', response.json())
+
+
+
+@override_settings(METRICS_ALLOWED_NETWORKS=['10.0.0.0/8'], METRICS_BEARER_TOKEN='scrape-token')
+@mock.patch('shared.monitoring.middleware.render_text', return_value='')
+class MetricsEndpointTest(TestCase):
+    def test_rejects_other_clients(self, render):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+        self.client.force_login(User.objects.create_user(username='ops', password='test', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        render.assert_not_called()
+
+    def test_allowed_network(self, render):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_forwarded_for_is_not_trusted_without_proxies(self, render):
+        self.assertEqual(self.client.get('/metrics', HTTP_X_FORWARDED_FOR='10.1.2.3').status_code, 403)
+
+    def test_bearer_token(self, render):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+
+    @override_settings(METRICS_BEARER_TOKEN='')
+    def test_empty_token_never_matches(self, render):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    @override_settings(
+        ROOT_URLCONF='lms.tests',
+        MIDDLEWARE=['shared.monitoring.middleware.MetricsMiddleware', 'lms.profiling.QueryProfilingMiddleware'],
+    )
+    async def test_middleware_keeps_async_views_async(self, render):
+        ASYNC_PROBE_CALLS.clear()
+        key = ('async_probe', 'GET', '2xx')
+        before = REQUESTS.samples().get(key, 0)
+
+        await self.async_client.get('/async-probe/')
+
+        (thread, task), = ASYNC_PROBE_CALLS
+        self.assertEqual(task, asyncio.current_task())
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(async_probe)))
+        self.assertEqual(REQUESTS.samples()[key], before + 1)
+
+@override_settings(HEALTH_CHECK_TIMEOUT=0.05, HEALTH_STALE_AFTER=30.0, HEALTH_DEEP_CHECKS=False)
+class HealthMonitorTest(TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = []
+
+    def check(self, name, outcome=None, deep=False):
+        def run():
+            self.calls.append(name)
+            if outcome == 'hang':
+                self.release.wait(5)
+            elif isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return Check(name, run, deep=deep)
+
+    def test_results_and_readiness(self):
+        monitor = HealthMonitor([self.check('database'), self.check('broker', deep=True)])
+        self.assertEqual(monitor.snapshot()['checks'], {'database': {'status': 'pending'}})
+        self.assertFalse(monitor.snapshot()['ready'])
+
+        monitor.run_checks()
+
+        snapshot = monitor.snapshot()
+        self.assertTrue(snapshot['ready'])
+        self.assertEqual(snapshot['checks']['database']['status'], OK)
+        self.assertEqual(self.calls, ['database'])
+
+    def test_failure(self):
+        monitor = HealthMonitor([self.check('cache', ConnectionError('refused'))])
+        monitor.run_checks()
+
+        result = monitor.snapshot()['checks']['cache']
+        self.assertEqual((result['status'], result['detail']), (FAILED, 'ConnectionError: refused'))
+
+    def test_hung_check_times_out_and_is_not_restarted(self):
+        monitor = HealthMonitor([self.check('database', 'hang'), self.check('cache')])
+
+        monitor.run_checks()
+        snapshot = monitor.snapshot()
+        self.assertEqual(snapshot['checks']['database']['status'], TIMEOUT)
+        self.assertEqual(snapshot['checks']['cache']['status'], OK)
+        self.assertFalse(snapshot['ready'])
+
+        monitor.run_checks()
+        self.assertIn('still running', monitor.snapshot()['checks']['database']['detail'])
+        self.assertEqual(self.calls.count('database'), 1)
+
+        self.release.set()
+        monitor._running['database'].result(timeout=5)
+        monitor.run_checks()
+        self.assertTrue(monitor.snapshot()['ready'])
+        self.assertEqual(self.calls.count('database'), 2)
+
+    def test_results_go_stale(self):
+        monitor = HealthMonitor([self.check('database')])
+        monitor.run_checks()
+        # The monitor thread stopped refreshing 31 seconds ago.
+        monitor._results['database'].checked_at -= 31
+
+        snapshot = monitor.snapshot()
+        self.assertEqual(snapshot['checks']['database']['status'], 'stale')
+        self.assertFalse(snapshot['ready'])
+
+
+class MetricsRegistryTest(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter('requests_total', 'Requests.', ('status',))
+        self.latency = self.registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def dead_pid(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        return process.pid
+
+    def test_thread_shards_are_summed(self):
+        def work():
+            for _ in range(100):
+                self.requests.inc(status='2xx')
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.requests.samples(), {('2xx',): 400})
+        with self.assertRaises(ValueError):
+            self.requests.inc(view='x')
+        with self.assertRaises(ValueError):
+            self.registry.histogram('requests_total', 'Requests.')
+
+    def test_render_text(self):
+        self.requests.inc(2, status='5xx')
+        for value in (0.05, 0.5, 3):
+            self.latency.observe(value)
+        gauge = self.registry.gauge('queue_length', 'Queue length.', ('queue',))
+        self.registry.register_collector(lambda registry: gauge.set(7, queue='celery'))
+        self.registry.register_collector(lambda registry: 1 / 0)
+
+        text = render_text(self.registry, const_labels=(('service', 'lms'),))
+
+        self.assertIn('# TYPE requests_total counter\nrequests_total{status="5xx",service="lms"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{service="lms",le="0.1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{service="lms",le="1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{service="lms",le="+Inf"} 3\n', text)
+        self.assertIn('latency_seconds_sum{service="lms"} 3.55\n', text)
+        self.assertIn('latency_seconds_count{service="lms"} 3\n', text)
+        self.assertIn('queue_length{queue="celery",service="lms"} 7\n', text)
+
+    def test_aggregate_sums_workers_and_archives_exited_ones(self):
+        self.requests.inc(status='2xx')
+        self.latency.observe(0.5)
+        self.registry.dump(self.directory)
+
+        exited = MetricsRegistry()
+        exited.counter('requests_total', 'Requests.', ('status',)).inc(3, status='2xx')
+        exited.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0)).observe(0.05)
+        dead_path = os.path.join(self.directory, f'metrics-{self.dead_pid()}.json')
+        with open(dead_path, 'w') as handle:
+            json.dump(exited.snapshot(), handle)
+
+        merged = aggregate(self.directory)
+
+        self.assertEqual(merged['requests_total']['samples'], {('2xx',): 4})
+        self.assertEqual(merged['latency_seconds']['samples'], {(): [1, 1, 0, 0.55]})
+        self.assertFalse(os.path.exists(dead_path))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, ARCHIVE_FILE)))
+
+        # Archived totals survive later scrapes, and the live worker keeps counting.
+        self.requests.inc(status='2xx')
+        text = render_text(self.registry, self.directory)
+        self.assertIn('requests_total{status="2xx"} 5\n', text)
+        self.assertEqual(aggregate(self.directory)['requests_total']['samples'], {('2xx',): 5})
+
+    def test_unreadable_worker_files_are_skipped(self):
+        self.requests.inc(status='2xx')
+        with open(os.path.join(self.directory, f'metrics-{os.getppid()}.json'), 'w') as handle:
+            handle.write('{truncated')
+
+        self.assertIn('requests_total{status="2xx"} 1\n', render_text(self.registry, self.directory))
+
+
+class AuthenticationLogTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', password='secret')
+
+    def row(self, event='login', **overrides):
+        return dict({
+            'user_id': self.user.pk, 'event': event, 'ip_address': '10.0.0.1', 'user_agent': 'test',
+            'success': True, 'details': {}, 'timestamp': timezone.now().isoformat(),
+        }, **overrides)
+
+    def test_auth_signals_are_logged(self):
+        self.assertFalse(self.client.login(username='learner', password='wrong'))
+        self.client.login(username='learner', password='secret')
+        self.client.logout()
+
+        self.assertEqual(
+            list(AuthenticationLog.objects.order_by('id').values_list('event', 'user_id', 'success')),
+            [('login_failed', None, False), ('login', self.user.pk, True), ('logout', self.user.pk, True)],
+        )
+        self.assertEqual(AuthenticationLog.objects.get(event='login_failed').details, {'username': 'learner'})
+
+    def test_admin_login_records_client_ip(self):
+        self.client.post('/admin/login/', {'username': 'learner', 'password': 'wrong'}, REMOTE_ADDR='10.1.2.3')
+        self.assertEqual(AuthenticationLog.objects.get().ip_address, '10.1.2.3')
+
+    def test_rejected_batch_falls_back_to_row_by_row(self):
+        rows = [self.row(), self.row(event=None), self.row(event='logout')]
+
+        self.assertEqual(write_rows(rows), 2)
+        self.assertEqual(sorted(AuthenticationLog.objects.values_list('event', flat=True)), ['login', 'logout'])
+
+    @override_settings(AUTH_LOG_BUFFER='memory')
+    def test_batch_is_requeued_when_the_database_is_down(self):
+        pipeline = AuthLogPipeline()
+        for event in ('login', 'logout'):
+            pipeline._memory.push(json.dumps(self.row(event)))
+
+        with mock.patch.object(audit, 'write_rows', side_effect=OperationalError('server closed the connection')):
+            self.assertEqual(pipeline.flush(), 0)
+        self.assertEqual(pipeline.pending(), 2)
+
+        self.assertEqual(pipeline.flush(), 2)
+        self.assertEqual(pipeline.pending(), 0)
+        self.assertEqual(list(AuthenticationLog.objects.order_by('id').values_list('event', flat=True)),
+                         ['login', 'logout'])
+
+    @override_settings(AUTH_LOG_BUFFER='redis', AUTH_LOG_REDIS_URL='amqp://guest@localhost//')
+    def test_redis_buffer_needs_a_redis_url(self):
+        with self.assertRaises(ImproperlyConfigured):
+            AuthLogPipeline()
+
+    def test_retention_archives_and_deletes_expired_rows(self):
+        now = timezone.now()
+        write_rows([
+            self.row(timestamp=(now - datetime.timedelta(days=40)).isoformat()),
+            self.row(event='logout', timestamp=(now - datetime.timedelta(days=31)).isoformat()),
+            self.row(timestamp=(now - datetime.timedelta(days=2)).isoformat()),
+        ])
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+
+        out = StringIO()
+        call_command('archive_auth_logs', '--retain-days=30', '--dry-run', stdout=out)
+        self.assertIn('Would remove 2 authentication log rows', out.getvalue())
+        self.assertEqual(AuthenticationLog.objects.count(), 3)
+
+        call_command('archive_auth_logs', '--retain-days=30', f'--archive-dir={archive_dir.name}',
+                     '--batch-size=1', stdout=StringIO())
+
+        self.assertEqual(AuthenticationLog.objects.count(), 1)
+        archive, = os.listdir(archive_dir.name)
+        with gzip.open(os.path.join(archive_dir.name, archive), 'rt') as handle:
+            archived = [json.loads(line) for line in handle]
+        self.assertEqual(sorted(row['event'] for row in archived), ['login', 'logout'])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class UnreachableBackend:
+    def __getattr__(self, name):
+        def fail(*args):
+            raise ConnectionError('redis is down')
+        return fail
+
+
+class LoginThrottleTest(TestCase):
+    RULES = {'ip': (5, 60), 'account': (3, 120), 'ip_account': (2, 60)}
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.throttle = LoginThrottle(MemoryThrottleBackend(clock=self.clock), self.RULES)
+
+    def test_limit_and_window(self):
+        for _ in range(2):
+            self.assertTrue(self.throttle.attempt('10.0.0.1', 'Ann@Example.com').allowed)
+
+        decision = self.throttle.attempt('10.0.0.1', 'ann@example.com ')
+        self.assertEqual((decision.allowed, decision.scope, decision.retry_after), (False, 'ip_account', 60.0))
+
+        self.clock.now += 20
+        self.assertTrue(self.throttle.attempt('10.0.0.2', 'ann@example.com').allowed)
+        decision = self.throttle.attempt('10.0.0.3', 'ann@example.com')
+        self.assertEqual((decision.scope, decision.retry_after), ('account', 100.0))
+
+        self.clock.now += 100
+        self.assertTrue(self.throttle.attempt('10.0.0.3', 'ann@example.com').allowed)
+
+    def test_success_resets_account_windows_but_not_ip(self):
+        for _ in range(2):
+            self.throttle.attempt('10.0.0.1', 'ann')
+        self.throttle.reset('10.0.0.1', 'ann')
+
+        state = self.throttle.lockout_state('10.0.0.1', 'ann')
+        self.assertEqual({scope: item['attempts'] for scope, item in state.items()},
+                         {'ip': 2, 'account': 0, 'ip_account': 0})
+        self.assertTrue(self.throttle.attempt('10.0.0.1', 'ann').allowed)
+
+    def test_memory_backend_evicts_least_recently_hit_keys(self):
+        backend = MemoryThrottleBackend(clock=self.clock, max_keys=4)
+        throttle = LoginThrottle(backend, self.RULES)
+        throttle.attempt('10.0.0.1', 'ann')
+        throttle.attempt('10.0.0.2', 'bob')
+
+        self.assertEqual(len(backend._hits), 4)
+        self.assertEqual(throttle.lockout_state('10.0.0.2', 'bob')['account']['attempts'], 1)
+        self.assertEqual(throttle.lockout_state(account='ann')['account']['attempts'], 0)
+
+    def test_falls_back_to_memory_when_the_store_is_down(self):
+        throttle = LoginThrottle(UnreachableBackend(), self.RULES, fallback=MemoryThrottleBackend(clock=self.clock))
+        for _ in range(2):
+            self.assertTrue(throttle.attempt('10.0.0.1', 'ann').allowed)
+        self.assertFalse(throttle.attempt('10.0.0.1', 'ann').allowed)
+
+        with self.assertRaises(ConnectionError):
+            LoginThrottle(UnreachableBackend(), self.RULES).attempt('10.0.0.1', 'ann')
+
+    def test_client_ip_ignores_forged_forwarded_for(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.9', REMOTE_ADDR='10.0.0.7')
+        self.assertEqual(get_client_ip(request), '10.0.0.7')
+        with self.settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(get_client_ip(request), '203.0.113.9')
+        with self.settings(TRUSTED_PROXY_COUNT=3):
+            self.assertEqual(get_client_ip(request), '10.0.0.7')
+
+
+@override_settings(LOGIN_THROTTLE_RULES={'ip': (10, 60), 'account': (3, 300), 'ip_account': (2, 60)})
+class ThrottledLoginTest(TestCase):
+    def setUp(self):
+        reset_login_throttle()
+        self.addCleanup(reset_login_throttle)
+        self.user = User.objects.create_user(username='learner', password='secret', is_staff=True)
+
+    def login(self, password, path='/api-auth/login/', **extra):
+        return self.client.post(path, {'username': 'learner', 'password': password}, **extra)
+
+    def test_api_auth_login_is_throttled_before_the_password_check(self):
+        for _ in range(2):
+            self.assertEqual(self.login('wrong').status_code, 200)
+
+        with mock.patch.object(ModelBackend, 'authenticate') as check_password:
+            response = self.login('secret')
+        check_password.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+        throttled = AuthenticationLog.objects.filter(event='login_failed').order_by('id').last()
+        self.assertEqual(throttled.details, {'username': 'learner', 'reason': 'throttled', 'scope': 'ip_account'})
+
+        # Another address still gets in, and a success clears the account windows.
+        self.assertEqual(self.login('secret', REMOTE_ADDR='10.9.9.9').status_code, 302)
+        self.client.logout()
+        self.assertEqual(self.login('wrong', REMOTE_ADDR='10.9.9.9').status_code, 200)
+        self.assertEqual(self.login('secret', REMOTE_ADDR='10.9.9.9').status_code, 302)
+
+    def test_admin_login_is_throttled_per_account(self):
+        for address in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            self.login('wrong', path='/admin/login/', REMOTE_ADDR=address)
+
+        response = self.login('secret', path='/admin/login/', REMOTE_ADDR='10.0.0.4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AuthenticationLog.objects.filter(details__reason='throttled').get().details['scope'], 'account')
+
+    @override_settings(LOGIN_THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(3):
+            self.login('wrong')
+        self.assertEqual(self.login('secret').status_code, 302)
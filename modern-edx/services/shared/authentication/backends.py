@@ -0,0 +1,45 @@
+"""
+Authentication backends for Modern edX platform.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from shared.utils.helpers import get_client_ip
+
+from .throttling import get_login_throttle
+
+
+class ThrottledModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` behind the sliding-window login throttle.
+
+    Every password login (admin, ``api-auth``, ``LoginSerializer``) goes
+    through ``authenticate()``, so the throttle is checked here, before the
+    password is hashed. A throttled attempt raises ``PermissionDenied``,
+    which makes ``authenticate()`` return ``None`` without trying other
+    backends and send ``user_login_failed``. The decision is left on
+    ``request.login_throttled`` for views that answer with a 429.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return super().authenticate(request, username, password, **kwargs)
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        throttle = get_login_throttle()
+        ip = get_client_ip(request) if request is not None else None
+        decision = throttle.attempt(ip, username)
+        if not decision.allowed:
+            if request is not None:
+                request.login_throttled = decision
+            raise PermissionDenied
+
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is not None:
+            throttle.reset(ip, username)
+        return user
@@ -126,33 +126,3 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"Profile for {self.user.get_display_name()}"
-
-class AuthenticationLog(models.Model):
-    """
-    Log authentication events for security tracking.
-    """
-    EVENT_CHOICES = [
-        ('login', _('Login')),
-        ('logout', _('Logout')),
-        ('login_failed', _('Login Failed')),
-        ('password_change', _('Password Change')),
-        ('password_reset', _('Password Reset')),
-        ('email_verification', _('Email Verification')),
-    ]
-    
-    user = models.ForeignKey(EdxUser, on_delete=models.CASCADE, null=True, blank=True)
-    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
-    ip_address = models.GenericIPAddressField()
-    user_agent = models.TextField()
-    success = models.BooleanField(default=True)
-    details = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        verbose_name = _('Authentication Log')
-        verbose_name_plural = _('Authentication Logs')
-        ordering = ['-timestamp']
-    
-    def __str__(self):
-        user_info = self.user.email if self.user else 'Anonymous'
-        return f"{self.event} - {user_info} at {self.timestamp}"
@@ -1,9 +1,12 @@
 """
 Serializers for authentication models.
 """
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from django.contrib.auth import authenticate
-from .models import EdxUser, UserProfile, AuthenticationLog
+
+from shared.authlog.models import AuthenticationLog
+
+from .models import EdxUser, UserProfile
 
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile."""
@@ -95,9 +98,15 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if email and password:
-            user = authenticate(request=self.context.get('request'),
+            request = self.context.get('request')
+            user = authenticate(request=request,
                               username=email, password=password)
             
+            # Set by ThrottledModelBackend when the attempt was refused unchecked.
+            throttled = getattr(request, 'login_throttled', None)
+            if throttled is not None:
+                raise exceptions.Throttled(wait=throttled.retry_after)
+            
             if not user:
                 raise serializers.ValidationError('Invalid credentials.')
             
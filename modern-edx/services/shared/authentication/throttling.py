@@ -0,0 +1,316 @@
+"""
+Sliding-window login throttle.
+
+Every login attempt is counted against three keys: the client IP, the
+account (the username or email the client submitted) and the (IP,
+account) pair. Each key has its own limit and window
+(``LOGIN_THROTTLE_RULES``). ``ThrottledModelBackend`` consults the
+throttle before checking the password, so a credential-stuffing burst is
+rejected without computing a single password hash.
+
+``RedisThrottleBackend`` keeps one sorted set of attempt times per key and
+checks and records an attempt for all keys in a single Lua script, so
+concurrent requests on different workers can't overshoot a limit. If Redis
+is unreachable, the throttle falls back to a per-process
+``MemoryThrottleBackend``, which is also what tests use
+(``LOGIN_THROTTLE_BACKEND = 'memory'``). The memory backend keeps at
+most ``LOGIN_THROTTLE_MEMORY_MAX_KEYS`` keys and forgets the least
+recently used ones first.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from shared.utils.helpers import hash_string
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'login-throttle'
+REDIS_RETRY_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class ThrottleRule:
+    scope: str
+    limit: int
+    window: float
+
+
+@dataclass
+class ThrottleDecision:
+    allowed: bool
+    scope: Optional[str] = None
+    retry_after: float = 0.0
+
+
+@dataclass
+class KeyState:
+    attempts: int
+    limit: int
+    window: float
+    retry_after: float
+
+    @property
+    def locked(self):
+        return self.attempts >= self.limit
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'limit': self.limit,
+            'window': self.window,
+            'locked': self.locked,
+            'retry_after': round(self.retry_after, 1),
+        }
+
+
+# KEYS: one sorted set per rule. ARGV: limit and window (ms) per key, then a unique member id.
+# Returns {1, 0, 0} when the attempt was recorded on every key, otherwise
+# {0, index of the key with the longest wait, wait in ms} and nothing is recorded.
+HIT_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local blocked, wait = 0, -1
+for i = 1, #KEYS do
+    local limit, window = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[i]) >= limit then
+        local oldest = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+        local key_wait = oldest[2] and (tonumber(oldest[2]) + window - now) or window
+        if key_wait > wait then
+            blocked, wait = i, key_wait
+        end
+    end
+end
+if blocked > 0 then
+    return {0, blocked, wait}
+end
+local member = now .. ':' .. ARGV[2 * #KEYS + 1]
+for i = 1, #KEYS do
+    redis.call('ZADD', KEYS[i], now, member)
+    redis.call('PEXPIRE', KEYS[i], ARGV[2 * i])
+end
+return {1, 0, 0}
+"""
+
+# Same KEYS/ARGV layout; returns {attempts, wait in ms} per key without recording anything.
+STATE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local result = {}
+for i = 1, #KEYS do
+    local limit, window = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local count = redis.call('ZCOUNT', KEYS[i], now - window + 1, '+inf')
+    local wait = 0
+    if count >= limit then
+        local oldest = redis.call('ZRANGEBYSCORE', KEYS[i], now - window + 1, '+inf', 'WITHSCORES', 'LIMIT', 0, 1)
+        wait = tonumber(oldest[2]) + window - now
+    end
+    result[2 * i - 1] = count
+    result[2 * i] = wait
+end
+return result
+"""
+
+
+class MemoryThrottleBackend:
+    """
+    Per-process sliding windows; for tests and as the Redis fallback.
+    Holds at most ``max_keys`` keys, evicting the least recently hit.
+    """
+
+    def __init__(self, clock=time.time, max_keys=100000):
+        self._clock = clock
+        self._max_keys = max_keys
+        self._hits: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, window, now):
+        hits = [stamp for stamp in self._hits.get(key, ()) if stamp > now - window]
+        if hits:
+            self._hits[key] = hits
+        else:
+            self._hits.pop(key, None)
+        return hits
+
+    def hit(self, keyed_rules: List[Tuple[str, ThrottleRule]]) -> Tuple[int, float]:
+        with self._lock:
+            now = self._clock()
+            blocked, wait = -1, -1.0
+            for index, (key, rule) in enumerate(keyed_rules):
+                hits = self._live(key, rule.window, now)
+                if len(hits) >= rule.limit:
+                    key_wait = hits[0] + rule.window - now if hits else rule.window
+                    if key_wait > wait:
+                        blocked, wait = index, key_wait
+            if blocked >= 0:
+                return blocked, wait
+            for key, _ in keyed_rules:
+                self._hits.setdefault(key, []).append(now)
+                self._hits.move_to_end(key)
+            while len(self._hits) > self._max_keys:
+                self._hits.popitem(last=False)
+            return -1, 0.0
+
+    def state(self, keyed_rules) -> List[Tuple[int, float]]:
+        with self._lock:
+            now = self._clock()
+            result = []
+            for key, rule in keyed_rules:
+                hits = self._live(key, rule.window, now)
+                wait = hits[0] + rule.window - now if len(hits) >= rule.limit else 0.0
+                result.append((len(hits), wait))
+            return result
+
+    def reset(self, keys):
+        with self._lock:
+            for key in keys:
+                self._hits.pop(key, None)
+
+
+class RedisThrottleBackend:
+    """Sliding windows in Redis sorted sets, shared by every worker."""
+
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._hit = self._client.register_script(HIT_SCRIPT)
+        self._state = self._client.register_script(STATE_SCRIPT)
+
+    @staticmethod
+    def _args(keyed_rules):
+        args = []
+        for _, rule in keyed_rules:
+            args += [rule.limit, int(rule.window * 1000)]
+        return args
+
+    def hit(self, keyed_rules):
+        allowed, index, wait = self._hit(
+            keys=[key for key, _ in keyed_rules],
+            args=self._args(keyed_rules) + [uuid.uuid4().hex],
+        )
+        if allowed:
+            return -1, 0.0
+        return int(index) - 1, int(wait) / 1000.0
+
+    def state(self, keyed_rules):
+        values = self._state(keys=[key for key, _ in keyed_rules], args=self._args(keyed_rules))
+        return [(int(values[i]), int(values[i + 1]) / 1000.0) for i in range(0, len(values), 2)]
+
+    def reset(self, keys):
+        if keys:
+            self._client.delete(*keys)
+
+
+class LoginThrottle:
+    """
+    Applies ``rules`` (scope -> (attempts, window in seconds)) to the IP,
+    account and (IP, account) keys of a login attempt.
+    """
+
+    def __init__(self, backend, rules, fallback=None):
+        self.backend = backend
+        self.fallback = fallback
+        self._backend_retry_at = 0.0
+        self.rules = [ThrottleRule(scope, limit, window) for scope, (limit, window) in rules.items()]
+
+    @staticmethod
+    def _identity(scope, ip, account):
+        account = (account or '').strip().lower()
+        if scope == 'ip':
+            return ip or None
+        # Accounts are hashed so the throttle store holds no usernames or addresses.
+        if scope == 'account':
+            return hash_string(account)[:32] if account else None
+        if scope == 'ip_account':
+            return f'{ip}:{hash_string(account)[:32]}' if ip and account else None
+        raise ValueError(f'Unknown throttle scope {scope!r}')
+
+    def _keyed_rules(self, ip, account, scopes=None):
+        keyed = []
+        for rule in self.rules:
+            if scopes is not None and rule.scope not in scopes:
+                continue
+            identity = self._identity(rule.scope, ip, account)
+            if identity is not None:
+                keyed.append((f'{KEY_PREFIX}:{rule.scope}:{identity}', rule))
+        return keyed
+
+    def _call(self, method, *args):
+        if self.fallback is not None and time.monotonic() < self._backend_retry_at:
+            return getattr(self.fallback, method)(*args)
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception:
+            if self.fallback is None:
+                raise
+            self._backend_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+            logger.warning("Login throttle store unreachable; using the per-process fallback", exc_info=True)
+            return getattr(self.fallback, method)(*args)
+
+    def attempt(self, ip, account) -> ThrottleDecision:
+        """Record a login attempt unless one of its keys is over its limit."""
+        keyed = self._keyed_rules(ip, account)
+        if not keyed:
+            return ThrottleDecision(True)
+        index, wait = self._call('hit', keyed)
+        if index < 0:
+            return ThrottleDecision(True)
+        return ThrottleDecision(False, keyed[index][1].scope, max(wait, 0.0))
+
+    def reset(self, ip, account):
+        """Clear the account and (IP, account) windows after a successful login; the IP window is kept."""
+        self._call('reset', [key for key, _ in self._keyed_rules(ip, account, scopes=('account', 'ip_account'))])
+
+    def lockout_state(self, ip=None, account=None) -> Dict[str, dict]:
+        """Per-scope attempts, limit and remaining lockout for ``ip`` and/or ``account``."""
+        keyed = self._keyed_rules(ip, account)
+        if not keyed:
+            return {}
+        states = self._call('state', keyed)
+        return {
+            rule.scope: KeyState(attempts, rule.limit, rule.window, wait).to_dict()
+            for (_, rule), (attempts, wait) in zip(keyed, states)
+        }
+
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+def get_login_throttle() -> LoginThrottle:
+    global _throttle
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = _build_throttle()
+    return _throttle
+
+
+def _build_throttle():
+    rules = settings.LOGIN_THROTTLE_RULES
+    memory = MemoryThrottleBackend(max_keys=settings.LOGIN_THROTTLE_MEMORY_MAX_KEYS)
+    backend = settings.LOGIN_THROTTLE_BACKEND
+    if backend == 'memory':
+        return LoginThrottle(memory, rules)
+    if backend != 'redis':
+        raise ImproperlyConfigured(f"Unknown LOGIN_THROTTLE_BACKEND {backend!r}")
+    url = settings.LOGIN_THROTTLE_REDIS_URL
+    if not url.startswith(('redis://', 'rediss://', 'unix://')):
+        raise ImproperlyConfigured(f"LOGIN_THROTTLE_BACKEND 'redis' needs a Redis LOGIN_THROTTLE_REDIS_URL, got {url!r}")
+    return LoginThrottle(RedisThrottleBackend(url), rules, fallback=memory)
+
+
+def reset_login_throttle():
+    """Drop the process-wide throttle so the next login rebuilds it from settings (tests)."""
+    global _throttle
+    with _throttle_lock:
+        _throttle = None
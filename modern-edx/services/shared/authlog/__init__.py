@@ -0,0 +1,7 @@
+"""
+Authentication audit log shared by the Modern edX services.
+
+Logins, logouts and failed logins are recorded from Django's auth
+signals through the buffered pipeline in ``audit.py``; the
+``archive_auth_logs`` command applies retention.
+"""
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class AuthLogConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'shared.authlog'
+    label = 'authlog'
+    verbose_name = 'Authentication Log'
+
+    def ready(self):
+        from . import signals  # noqa: F401
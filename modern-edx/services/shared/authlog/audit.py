@@ -0,0 +1,259 @@
+"""
+Buffered write pipeline for ``AuthenticationLog``.
+
+``record_auth_event`` only serializes the event and pushes it onto a
+buffer, so logins never wait on an insert into the log table. A daemon
+thread in each process drains the buffer every ``AUTH_LOG_FLUSH_INTERVAL``
+seconds and writes up to ``AUTH_LOG_BATCH_SIZE`` rows per ``bulk_create``.
+
+``AUTH_LOG_BUFFER`` selects the buffer:
+
+- ``'redis'`` (default): a Redis list at ``AUTH_LOG_REDIS_URL``, shared
+  by every worker, so events survive a worker restart. Events are kept
+  in memory while Redis is unreachable.
+- ``'memory'``: a per-process queue, flushed on exit.
+- ``'sync'``: insert immediately (tests, management commands).
+"""
+import atexit
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from shared.utils.helpers import get_client_ip, get_user_agent
+
+from .models import AuthenticationLog
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'auth-log:pending'
+REDIS_RETRY_INTERVAL = 5.0
+
+
+def _row_to_log(row):
+    return AuthenticationLog(
+        user_id=row['user_id'],
+        event=row['event'],
+        ip_address=row['ip_address'],
+        user_agent=row['user_agent'],
+        success=row['success'],
+        details=row['details'],
+        timestamp=parse_datetime(row['timestamp']),
+    )
+
+
+def write_rows(rows):
+    """
+    Insert ``rows`` with one ``bulk_create``. If the batch is rejected, the
+    rows are retried one by one and those that still fail (e.g. a user
+    deleted meanwhile) are dropped, so one bad event can't wedge the queue.
+    Connection errors propagate so the caller can requeue the batch.
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    try:
+        with transaction.atomic():
+            AuthenticationLog.objects.bulk_create([_row_to_log(row) for row in rows])
+        return len(rows)
+    except (IntegrityError, DataError):
+        logger.warning("Authentication log batch of %d rejected; retrying row by row", len(rows))
+    written = 0
+    for row in rows:
+        try:
+            with transaction.atomic():
+                _row_to_log(row).save(force_insert=True)
+            written += 1
+        except (IntegrityError, DataError):
+            logger.exception("Dropping authentication log event %s", row)
+    return written
+
+
+class _MemoryBuffer:
+    def __init__(self):
+        self._queue = collections.deque()
+
+    def push(self, payload):
+        self._queue.append(payload)
+
+    def pop_batch(self, size):
+        batch = []
+        while len(batch) < size:
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def requeue(self, batch):
+        self._queue.extendleft(reversed(batch))
+
+    def __len__(self):
+        return len(self._queue)
+
+
+class _RedisBuffer:
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def push(self, payload):
+        self._client.rpush(REDIS_KEY, payload)
+
+    def pop_batch(self, size):
+        # LRANGE + LTRIM in one MULTI so concurrent drainers never share a batch.
+        pipe = self._client.pipeline(transaction=True)
+        pipe.lrange(REDIS_KEY, 0, size - 1)
+        pipe.ltrim(REDIS_KEY, size, -1)
+        batch, _ = pipe.execute()
+        return batch
+
+    def requeue(self, batch):
+        if batch:
+            self._client.lpush(REDIS_KEY, *reversed(batch))
+
+    def __len__(self):
+        return self._client.llen(REDIS_KEY)
+
+
+class AuthLogPipeline:
+    """Buffers authentication events and writes them in batches."""
+
+    def __init__(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._memory = _MemoryBuffer()
+        self._redis = None
+        self._redis_retry_at = 0.0
+        self.mode = settings.AUTH_LOG_BUFFER
+        if self.mode == 'redis':
+            url = settings.AUTH_LOG_REDIS_URL
+            if not url.startswith(('redis://', 'rediss://', 'unix://')):
+                raise ImproperlyConfigured(
+                    f"AUTH_LOG_BUFFER 'redis' needs a Redis AUTH_LOG_REDIS_URL, got {url!r}"
+                )
+            self._redis = _RedisBuffer(url)
+        elif self.mode not in ('memory', 'sync'):
+            raise ImproperlyConfigured(f"Unknown AUTH_LOG_BUFFER {self.mode!r}")
+        atexit.register(self.flush, shared=False)
+
+    def _check_fork(self):
+        # A forked worker inherits neither the parent's thread nor its queue.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._flusher = None
+            self._memory = _MemoryBuffer()
+
+    def push(self, row):
+        if self.mode == 'sync':
+            write_rows([row])
+            return
+        self._check_fork()
+        payload = json.dumps(row)
+        if self._redis is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                self._redis.push(payload)
+            except Exception:
+                # Don't make every login wait for the connect timeout while Redis is down.
+                self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+                logger.warning("Authentication log buffer unreachable; keeping events in memory", exc_info=True)
+                self._memory.push(payload)
+        else:
+            self._memory.push(payload)
+        self._ensure_flusher()
+
+    def _drain(self, buffer, batch_size):
+        batch = buffer.pop_batch(batch_size)
+        if not batch:
+            return 0
+        try:
+            write_rows([json.loads(payload) for payload in batch])
+        except Exception:
+            # Database unavailable: put the events back for the next round.
+            buffer.requeue(batch)
+            raise
+        return len(batch)
+
+    def flush(self, max_batches=None, shared=True):
+        """
+        Write what is currently buffered, up to ``max_batches`` batches per
+        buffer; ``shared=False`` leaves the Redis list to other workers.
+        Returns the number of events taken off the buffers.
+        """
+        batch_size = settings.AUTH_LOG_BATCH_SIZE
+        flushed = 0
+        buffers = [self._memory]
+        if shared and self._redis is not None and time.monotonic() >= self._redis_retry_at:
+            buffers.append(self._redis)
+        for buffer in buffers:
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                try:
+                    count = self._drain(buffer, batch_size)
+                except Exception:
+                    logger.exception("Authentication log flush failed")
+                    if buffer is self._redis:
+                        self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+                    break
+                if not count:
+                    break
+                flushed += count
+                batches += 1
+        return flushed
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+
+            def flush_forever():
+                while True:
+                    time.sleep(settings.AUTH_LOG_FLUSH_INTERVAL)
+                    close_old_connections()
+                    self.flush(max_batches=settings.AUTH_LOG_MAX_BATCHES_PER_FLUSH)
+
+            self._flusher = threading.Thread(target=flush_forever, name='auth-log-flusher', daemon=True)
+            self._flusher.start()
+
+    def pending(self):
+        return len(self._memory) + (len(self._redis) if self._redis is not None else 0)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> AuthLogPipeline:
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = AuthLogPipeline()
+    return _pipeline
+
+
+def record_auth_event(event, request=None, user=None, success=True, details=None):
+    """Queue an ``AuthenticationLog`` row; the timestamp is taken now, not at insert time."""
+    user_id = getattr(user, 'pk', None)
+    get_pipeline().push({
+        'user_id': user_id,
+        'event': event,
+        'ip_address': (get_client_ip(request) if request is not None else None) or '0.0.0.0',
+        'user_agent': get_user_agent(request) if request is not None else '',
+        'success': success,
+        'details': details or {},
+        'timestamp': timezone.now().isoformat(),
+    })
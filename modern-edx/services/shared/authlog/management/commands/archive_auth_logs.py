@@ -0,0 +1,116 @@
+"""
+Retention for the authentication log.
+
+Run daily. On PostgreSQL it keeps monthly partitions created ahead of
+time, archives every partition older than the retention window to a
+gzipped JSON-lines file and drops it; expired rows left in the default
+partition or in the oldest kept month are then archived and deleted in
+batches, which is all that happens on other databases (or before
+``--convert``).
+"""
+import datetime
+import gzip
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from shared.authlog import partitions
+from shared.authlog.models import AuthenticationLog
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'event', 'ip_address', 'user_agent', 'success', 'details', 'timestamp')
+
+
+class Command(BaseCommand):
+    help = 'Archive and drop authentication log rows older than the retention window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retain-days', type=int,
+                            default=settings.AUTH_LOG_RETENTION_DAYS)
+        parser.add_argument('--archive-dir', default=settings.AUTH_LOG_ARCHIVE_DIR,
+                            help='Write expired rows here before dropping them (skip archiving if empty).')
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help='Monthly partitions to keep created ahead of time.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--convert', action='store_true',
+                            help='Rebuild a plain PostgreSQL table as a partitioned one first.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        cutoff = timezone.now() - datetime.timedelta(days=options['retain_days'])
+        archive_dir = options['archive_dir']
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+
+        if options['convert']:
+            if not partitions.is_supported():
+                raise CommandError('Partitioning needs PostgreSQL.')
+            if not partitions.is_partitioned():
+                if options['dry_run']:
+                    self.stdout.write('Would convert the authentication log to a partitioned table.')
+                else:
+                    partitions.convert_to_partitioned(options['months_ahead'])
+                    self.stdout.write('Converted the authentication log to monthly partitions.')
+
+        if partitions.is_partitioned():
+            removed = self._expire_partitions(cutoff, archive_dir, options)
+        else:
+            removed = self._expire_rows(cutoff, archive_dir, options)
+
+        elapsed = time.monotonic() - started
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} authentication log rows older than {cutoff:%Y-%m-%d} in {elapsed:.2f}s'
+        ))
+
+    def _expire_partitions(self, cutoff, archive_dir, options):
+        if not options['dry_run']:
+            for name in partitions.ensure_partitions(timezone.now(), options['months_ahead']):
+                self.stdout.write(f'Created partition {name}')
+        removed = 0
+        for name, month in partitions.list_partitions():
+            # Only whole months that ended before the cutoff are dropped.
+            if partitions.next_month(month) > cutoff.date():
+                continue
+            queryset = AuthenticationLog.objects.filter(
+                timestamp__gte=month, timestamp__lt=partitions.next_month(month)
+            )
+            count = queryset.count()
+            if not options['dry_run']:
+                if archive_dir:
+                    self._archive(queryset, os.path.join(archive_dir, f'{name}.jsonl.gz'))
+                partitions.drop_partition(name)
+            self.stdout.write(f'Expired partition {name} ({count} rows)')
+            removed += count
+        if options['dry_run']:
+            return AuthenticationLog.objects.filter(timestamp__lt=cutoff).count()
+        return removed + self._expire_rows(cutoff, archive_dir, options)
+
+    def _expire_rows(self, cutoff, archive_dir, options):
+        expired = AuthenticationLog.objects.filter(timestamp__lt=cutoff)
+        if options['dry_run']:
+            return expired.count()
+        if archive_dir:
+            self._archive(expired, os.path.join(
+                archive_dir, f'{AuthenticationLog._meta.db_table}-{cutoff:%Y%m%d%H%M%S}.jsonl.gz'
+            ))
+        removed = 0
+        while True:
+            ids = list(expired.order_by('timestamp').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                return removed
+            with transaction.atomic():
+                removed += AuthenticationLog.objects.filter(id__in=ids).delete()[0]
+
+    def _archive(self, queryset, path):
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as handle:
+            for row in queryset.order_by().values(*ARCHIVE_FIELDS).iterator(chunk_size=2000):
+                handle.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        os.replace(tmp_path, path)
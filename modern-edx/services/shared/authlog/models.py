@@ -0,0 +1,45 @@
+"""
+Authentication log model shared by the Modern edX services.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class AuthenticationLog(models.Model):
+    """
+    Log authentication events for security tracking.
+    """
+    EVENT_CHOICES = [
+        ('login', _('Login')),
+        ('logout', _('Logout')),
+        ('login_failed', _('Login Failed')),
+        ('password_change', _('Password Change')),
+        ('password_reset', _('Password Reset')),
+        ('email_verification', _('Email Verification')),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    ip_address = models.GenericIPAddressField()
+    user_agent = models.TextField()
+    success = models.BooleanField(default=True)
+    details = models.JSONField(default=dict, blank=True)
+    # Set when the event happens, not when the buffered row is inserted (see audit.py).
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = _('Authentication Log')
+        verbose_name_plural = _('Authentication Logs')
+        ordering = ['-timestamp']
+        # On PostgreSQL the table can be range-partitioned by month on
+        # timestamp (see partitions.py); these indexes exist on every partition.
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='authlog_user_time_idx'),
+            models.Index(fields=['ip_address', '-timestamp'], name='authlog_ip_time_idx'),
+        ]
+
+    def __str__(self):
+        user_info = self.user.email if self.user else 'Anonymous'
+        return f"{self.event} - {user_info} at {self.timestamp}"
@@ -0,0 +1,190 @@
+"""
+Monthly range partitions for the ``AuthenticationLog`` table (PostgreSQL).
+
+The parent table is partitioned on ``timestamp``, one partition per
+calendar month named ``<table>_pYYYYMM``. Time-range queries only scan
+the partitions they overlap, the (user, timestamp) and (ip_address,
+timestamp) indexes are declared on the parent so every partition gets
+them, and retention drops whole partitions instead of deleting rows.
+
+A ``<table>_default`` partition catches rows outside every monthly
+range (clock skew, or the command not running for months), so an insert
+never fails for want of a partition. When a month's partition is
+created later, its rows are moved out of the default partition first.
+"""
+import datetime
+import re
+
+from django.db import connection, transaction
+
+from .models import AuthenticationLog
+
+
+def _table():
+    return AuthenticationLog._meta.db_table
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def next_month(value):
+    return datetime.date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{_table()}_p{month:%Y%m}'
+
+
+def default_partition_name():
+    return f'{_table()}_default'
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """``[(name, first day of month)]`` of the attached monthly partitions, oldest first."""
+    pattern = re.compile(rf'^{re.escape(_table())}_p(\d{{4}})(\d{{2}})$')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s",
+            [_table()],
+        )
+        partitions = []
+        for (name,) in cursor.fetchall():
+            match = pattern.match(name)
+            if match:
+                partitions.append((name, datetime.date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def ensure_default_partition():
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {qn(default_partition_name())} PARTITION OF {qn(_table())} DEFAULT"
+        )
+
+
+def _create_partition(cursor, month):
+    """
+    Create the partition of ``month``. PostgreSQL refuses while the default
+    partition holds rows of that month, so they are moved out and back.
+    """
+    qn = connection.ops.quote_name
+    table, default = _table(), default_partition_name()
+    bounds = [month.isoformat(), next_month(month).isoformat()]
+    held = f'{table}_moving'
+    with transaction.atomic():
+        cursor.execute(f"CREATE TEMPORARY TABLE {qn(held)} (LIKE {qn(table)})")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+            f"INSERT INTO {qn(held)} SELECT * FROM moved",
+            bounds,
+        )
+        cursor.execute(
+            f"CREATE TABLE {qn(partition_name(month))} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(held)}")
+        cursor.execute(f"DROP TABLE {qn(held)}")
+
+
+def ensure_partitions(start, months_ahead=3):
+    """
+    Create the default partition and the monthly partitions from ``start``
+    through ``months_ahead`` months from now.
+    """
+    ensure_default_partition()
+    month = month_start(start)
+    last = month_start(datetime.date.today())
+    for _ in range(months_ahead):
+        last = next_month(last)
+    created = []
+    existing = {name for name, _ in list_partitions()}
+    with connection.cursor() as cursor:
+        while month <= last:
+            name = partition_name(month)
+            if name not in existing:
+                _create_partition(cursor, month)
+                created.append(name)
+            month = next_month(month)
+    return created
+
+
+def convert_to_partitioned(months_ahead=3):
+    """
+    Rebuild a plain ``AuthenticationLog`` table as a partitioned one,
+    copying its rows. Runs in one transaction and locks the table while
+    copying, so do it in a maintenance window on large tables.
+    """
+    qn = connection.ops.quote_name
+    table = _table()
+    old = f'{table}_unpartitioned'
+    user_table = AuthenticationLog._meta.get_field('user').related_model._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(timestamp) FROM {qn(table)}")
+        oldest = cursor.fetchone()[0] or datetime.date.today()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY RANGE (timestamp)"
+        )
+        # The partition key has to be part of the primary key.
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_id_time_pk')} PRIMARY KEY (id, timestamp)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD FOREIGN KEY (user_id) REFERENCES {qn(user_table)} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+        for index in AuthenticationLog._meta.indexes:
+            cursor.execute(f"ALTER INDEX IF EXISTS {qn(index.name)} RENAME TO {qn(index.name + '_old')}")
+            columns = ', '.join(
+                f"{qn(AuthenticationLog._meta.get_field(field.lstrip('-')).column)}"
+                f"{' DESC' if field.startswith('-') else ''}"
+                for field in index.fields
+            )
+            cursor.execute(f"CREATE INDEX {qn(index.name)} ON {qn(table)} ({columns})")
+        ensure_partitions(oldest, months_ahead)
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old)}")
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        new_sequence = cursor.fetchone()[0]
+        if new_sequence:
+            # Identity column: the copy got a fresh sequence, move it past the copied ids.
+            cursor.execute(
+                f"SELECT setval(%s, coalesce((SELECT max(id) FROM {qn(table)}), 0) + 1, false)",
+                [new_sequence],
+            )
+        elif sequence:
+            # serial column: keep using the old sequence, which would go with the old table.
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id")
+        cursor.execute(f"DROP TABLE {qn(old)}")
+
+
+def drop_partition(name):
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(_table())} DETACH PARTITION {qn(name)}")
+        cursor.execute(f"DROP TABLE {qn(name)}")
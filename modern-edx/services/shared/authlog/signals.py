@@ -0,0 +1,29 @@
+"""
+Record Django's authentication signals in the authentication log.
+"""
+from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.dispatch import receiver
+
+from .audit import record_auth_event
+
+
+@receiver(user_logged_in)
+def logged_in(sender, request, user, **kwargs):
+    record_auth_event('login', request, user=user)
+
+
+@receiver(user_logged_out)
+def logged_out(sender, request, user, **kwargs):
+    # ``user`` is None when the session was not authenticated.
+    if user is not None:
+        record_auth_event('logout', request, user=user)
+
+
+@receiver(user_login_failed)
+def login_failed(sender, credentials, request=None, **kwargs):
+    # Django has already masked the password in ``credentials``.
+    details = {'username': credentials.get('username') or credentials.get('email') or ''}
+    decision = getattr(request, 'login_throttled', None)
+    if decision is not None:
+        details.update(reason='throttled', scope=decision.scope)
+    record_auth_event('login_failed', request, success=False, details=details)
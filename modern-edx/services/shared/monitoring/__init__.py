@@ -0,0 +1,14 @@
+"""
+Prometheus-style metrics shared by the Modern edX services.
+
+Enable with ``shared.monitoring.middleware.MetricsMiddleware`` and route
+``shared.monitoring.middleware.metrics_view`` at ``/metrics``. Set
+``METRICS_MULTIPROC_DIR`` to a directory writable by every gunicorn
+worker to aggregate across workers.
+
+``shared.monitoring.health`` runs the dependency checks behind each
+service's ``/health/ready/`` probe.
+"""
+from .metrics import REGISTRY, Counter, Gauge, Histogram, MetricsRegistry, render_text
+
+__all__ = ['REGISTRY', 'Counter', 'Gauge', 'Histogram', 'MetricsRegistry', 'render_text']
@@ -0,0 +1,82 @@
+"""
+Scrape-time collectors for infrastructure gauges.
+
+Each collector is called with the registry just before the metrics are
+rendered and refreshes its gauges from the source of truth: the
+database server's connection table, Redis ``INFO stats`` for the cache,
+and the broker's queue lengths for Celery.
+"""
+from django.conf import settings
+from django.db import connections
+
+
+def database_connections(registry):
+    """Server-side connections to each PostgreSQL database, by state."""
+    gauge = registry.gauge(
+        'db_server_connections', 'Connections open on the database server, by state.',
+        ('database', 'state'),
+    )
+    gauge.clear()
+    for alias in connections:
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() GROUP BY 1"
+            )
+            for state, count in cursor.fetchall():
+                gauge.set(count, database=alias, state=state)
+    max_age = registry.gauge(
+        'db_connection_max_age_seconds', 'CONN_MAX_AGE of each database alias (0 closes per request).',
+        ('database',),
+    )
+    for alias, config in settings.DATABASES.items():
+        max_age.set(config.get('CONN_MAX_AGE') or 0, database=alias)
+
+
+def _redis_client(cache):
+    client = getattr(cache, 'client', None)
+    if client is not None and hasattr(client, 'get_client'):  # django-redis
+        return client.get_client(write=False)
+    if hasattr(cache, '_cache') and hasattr(cache._cache, 'get_client'):  # django.core.cache RedisCache
+        return cache._cache.get_client()
+    return None
+
+
+def redis_cache(registry):
+    """Keyspace hits/misses and hit ratio of each Redis-backed cache."""
+    from django.core.cache import caches
+
+    hits = registry.gauge('redis_keyspace_hits', 'Redis keyspace hits since server start.', ('cache',))
+    misses = registry.gauge('redis_keyspace_misses', 'Redis keyspace misses since server start.', ('cache',))
+    ratio = registry.gauge('redis_cache_hit_ratio', 'Redis keyspace hits / (hits + misses).', ('cache',))
+    for alias in settings.CACHES:
+        client = _redis_client(caches[alias])
+        if client is None:
+            continue
+        stats = client.info('stats')
+        hit, miss = stats.get('keyspace_hits', 0), stats.get('keyspace_misses', 0)
+        hits.set(hit, cache=alias)
+        misses.set(miss, cache=alias)
+        ratio.set(hit / (hit + miss) if hit + miss else 0.0, cache=alias)
+
+
+def celery_queues(registry):
+    """Pending messages per Celery queue on a Redis broker."""
+    broker_url = getattr(settings, 'CELERY_BROKER_URL', '')
+    if not broker_url.startswith(('redis://', 'rediss://')):
+        return
+    import redis
+
+    gauge = registry.gauge('celery_queue_length', 'Messages waiting in each Celery queue.', ('queue',))
+    client = redis.Redis.from_url(broker_url, socket_timeout=1)
+    try:
+        for queue in getattr(settings, 'METRICS_CELERY_QUEUES', ['celery']):
+            gauge.set(client.llen(queue), queue=queue)
+    finally:
+        client.close()
+
+
+DEFAULT_COLLECTORS = (database_connections, redis_cache, celery_queues)
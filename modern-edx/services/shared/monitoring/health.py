@@ -0,0 +1,229 @@
+"""
+Background dependency checks for the health probes.
+
+Orchestrators probe every pod every few seconds, so the probe views never
+touch Postgres or Redis themselves. A per-process ``HealthMonitor`` runs
+the checks on a daemon thread every ``HEALTH_CHECK_INTERVAL`` seconds and
+the views serve its last result with its age.
+
+Every check runs on its own single-thread executor and is given
+``HEALTH_CHECK_TIMEOUT`` seconds. A check that overruns is reported as a
+timeout and is not started again until the hung call returns, so a slow
+dependency can neither hang a probe nor pile up threads. Deep checks
+(Celery broker reachability, unapplied migrations) run every
+``HEALTH_DEEP_CHECK_INTERVAL`` seconds when ``HEALTH_DEEP_CHECKS`` is on.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+OK = 'ok'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+
+def check_database():
+    connection = connections[DEFAULT_DB_ALIAS]
+    connection.close_if_unusable_or_obsolete()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def check_cache():
+    # A read is enough to prove the connection; nothing is written.
+    cache.get('health:probe')
+
+
+def check_celery_broker():
+    broker_url = getattr(settings, 'CELERY_BROKER_URL', '')
+    if not broker_url.startswith(('redis://', 'rediss://')):
+        return 'skipped (non-Redis broker)'
+    import redis
+
+    timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+    client = redis.Redis.from_url(broker_url, socket_timeout=timeout, socket_connect_timeout=timeout)
+    try:
+        client.ping()
+    finally:
+        client.close()
+
+
+def check_migrations():
+    from django.db.migrations.executor import MigrationExecutor
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    connection.close_if_unusable_or_obsolete()
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f'{len(plan)} unapplied migrations')
+
+
+@dataclass
+class Check:
+    name: str
+    func: Callable[[], Optional[str]]
+    deep: bool = False
+
+
+@dataclass
+class CheckResult:
+    status: str
+    detail: str
+    duration_ms: float
+    checked_at: float
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def to_dict(self, now):
+        return {
+            'status': self.status,
+            'detail': self.detail,
+            'duration_ms': round(self.duration_ms, 1),
+            'age_seconds': round(now - self.checked_at, 1),
+        }
+
+
+DEFAULT_CHECKS = (
+    Check('database', check_database),
+    Check('cache', check_cache),
+    Check('celery_broker', check_celery_broker, deep=True),
+    Check('migrations', check_migrations, deep=True),
+)
+
+
+class HealthMonitor:
+    """Runs ``checks`` in the background and keeps their latest results."""
+
+    def __init__(self, checks=DEFAULT_CHECKS):
+        self.checks = list(checks)
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self._results: Dict[str, CheckResult] = {}
+        self._executors = {
+            check.name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'health-{check.name}')
+            for check in self.checks
+        }
+        self._running = {}
+        self._last_deep_run = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def deep_enabled():
+        return getattr(settings, 'HEALTH_DEEP_CHECKS', False)
+
+    def run_checks(self):
+        """Run every due check once, concurrently, and record the results."""
+        timeout = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2.0)
+        deep_due = self.deep_enabled() and (
+            time.monotonic() - self._last_deep_run >= getattr(settings, 'HEALTH_DEEP_CHECK_INTERVAL', 60.0)
+        )
+        if deep_due:
+            self._last_deep_run = time.monotonic()
+
+        results = {}
+        started = time.monotonic()
+        submitted = []
+        for check in self.checks:
+            if check.deep and not deep_due:
+                continue
+            future = self._running.get(check.name)
+            if future is not None and not future.done():
+                # The previous call is still hung; don't queue another behind it.
+                results[check.name] = CheckResult(TIMEOUT, f'still running after {timeout:g}s', 0.0, time.time())
+                continue
+            self._running[check.name] = self._executors[check.name].submit(check.func)
+            submitted.append(check.name)
+
+        deadline = started + timeout
+        for name in submitted:
+            try:
+                detail = self._running[name].result(timeout=max(deadline - time.monotonic(), 0)) or ''
+                status = OK
+            except TimeoutError:
+                status, detail = TIMEOUT, f'no answer within {timeout:g}s'
+            except Exception as exc:
+                status, detail = FAILED, f'{type(exc).__name__}: {exc}'[:300]
+            duration_ms = (time.monotonic() - started) * 1000.0
+            results[name] = CheckResult(status, detail, duration_ms, time.time())
+
+        for name, result in results.items():
+            if not result.ok:
+                logger.warning("Health check %s %s: %s", name, result.status, result.detail)
+        self._results.update(results)
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_checks()
+            except Exception:
+                logger.exception("Health monitor round failed")
+            time.sleep(getattr(settings, 'HEALTH_CHECK_INTERVAL', 10.0))
+
+    def ensure_started(self):
+        """Start the background thread; the first call also runs the checks inline once."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if not self._results:
+                self.run_checks()
+            self._thread = threading.Thread(target=self._loop, name='health-monitor', daemon=True)
+            self._thread.start()
+
+    def snapshot(self):
+        """Latest results; ``ready`` is false when any required check failed or went stale."""
+        now = time.time()
+        stale_after = getattr(settings, 'HEALTH_STALE_AFTER', 30.0)
+        deep_interval = getattr(settings, 'HEALTH_DEEP_CHECK_INTERVAL', 60.0)
+        checks, ready = {}, True
+        for check in self.checks:
+            if check.deep and not self.deep_enabled():
+                continue
+            result = self._results.get(check.name)
+            if result is None:
+                ready = False
+                checks[check.name] = {'status': 'pending'}
+                continue
+            checks[check.name] = result.to_dict(now)
+            if not result.ok:
+                ready = False
+            elif now - result.checked_at > stale_after + (deep_interval if check.deep else 0):
+                # The monitor thread has stopped refreshing this result.
+                checks[check.name]['status'] = 'stale'
+                ready = False
+        return {
+            'ready': ready,
+            'checks': checks,
+            'uptime_seconds': round(now - self.started_at, 1),
+        }
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """The monitor of this process, started on first use (and again after a fork)."""
+    global _monitor
+    if _monitor is None or _monitor.pid != os.getpid():
+        with _monitor_lock:
+            if _monitor is None or _monitor.pid != os.getpid():
+                _monitor = HealthMonitor()
+    _monitor.ensure_started()
+    return _monitor
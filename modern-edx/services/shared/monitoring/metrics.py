@@ -0,0 +1,385 @@
+"""
+Process-local metric primitives with multiprocess aggregation.
+
+Counters and histograms are updated without locks: every thread writes
+to its own shard (a plain dict only that thread mutates) and readers sum
+the shards. Under gunicorn each worker periodically dumps its totals to
+``<multiproc_dir>/metrics-<pid>.json``; the worker answering a scrape
+sums every file. Files of workers that have exited are folded into
+``metrics-archive.json`` so counters never go backwards when workers are
+recycled.
+
+Gauges hold point-in-time values set by scrape-time collectors in the
+serving process and are not shared between workers.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE_FILE = 'metrics-archive.json'
+LOCK_FILE = 'metrics.lock'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class _Sharded(_Metric):
+    """Values kept in per-thread shards, merged on read."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()  # only taken when a thread writes for the first time
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _reset_after_fork(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+
+class Counter(_Sharded):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def samples(self) -> Dict[tuple, float]:
+        totals = {}
+        for shard in list(self._shards):
+            for key, value in shard.copy().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+class Histogram(_Sharded):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        shard = self._shard()
+        # [per-bucket counts..., +Inf count, sum]
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[index] += 1
+                break
+        else:
+            values[len(self.buckets)] += 1
+        values[-1] += value
+
+    def samples(self) -> Dict[tuple, list]:
+        totals = {}
+        for shard in list(self._shards):
+            for key, values in shard.copy().items():
+                current = totals.setdefault(key, [0] * len(values))
+                for index, value in enumerate(list(values)):
+                    current[index] += value
+        return totals
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def clear(self):
+        self._values = {}
+
+    def samples(self):
+        return dict(self._values)
+
+
+class MetricsRegistry:
+    """Named metrics of one process, plus the scrape-time collectors."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flusher = None
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f'{name} is already registered as a {metric.kind}')
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def register_collector(self, collector):
+        """``collector(registry)`` runs before every scrape to refresh gauges."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def metrics(self) -> Iterable[_Metric]:
+        return list(self._metrics.values())
+
+    # Multiprocess support
+
+    def check_fork(self):
+        """Drop values inherited from a parent process (gunicorn --preload)."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._flusher = None
+            for metric in self.metrics():
+                if isinstance(metric, _Sharded):
+                    metric._reset_after_fork()
+
+    def snapshot(self) -> dict:
+        """Counter and histogram totals of this process, JSON-serializable."""
+        return {
+            metric.name: {
+                'kind': metric.kind,
+                'help': metric.documentation,
+                'labels': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': [[list(key), value] for key, value in metric.samples().items()],
+            }
+            for metric in self.metrics()
+            if isinstance(metric, _Sharded)
+        }
+
+    def dump(self, directory):
+        """Write this process's snapshot to ``directory`` atomically."""
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self, directory, interval):
+        """Dump this process's snapshot every ``interval`` seconds (once per process)."""
+        self.check_fork()
+        if self._flusher is not None or not directory:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+
+            def flush_forever():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.dump(directory)
+                    except OSError:
+                        pass
+
+            self._flusher = threading.Thread(target=flush_forever, name='metrics-flusher', daemon=True)
+            self._flusher.start()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(into, snapshot):
+    for name, data in snapshot.items():
+        target = into.setdefault(name, dict(data, samples={}))
+        for key, value in data['samples']:
+            key = tuple(key)
+            if data['kind'] == 'histogram':
+                current = target['samples'].get(key)
+                if current is None:
+                    target['samples'][key] = list(value)
+                else:
+                    for index, item in enumerate(value):
+                        current[index] += item
+            else:
+                target['samples'][key] = target['samples'].get(key, 0) + value
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def aggregate(directory) -> Dict[str, dict]:
+    """
+    Sum the snapshots of every worker in ``directory``; snapshots of dead
+    workers are folded into the archive file first.
+    """
+    merged = {}
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            archive_path = os.path.join(directory, ARCHIVE_FILE)
+            archive = {}
+            _merge(archive, _read(archive_path))
+            archived = False
+            live = []
+            for filename in os.listdir(directory):
+                if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                    continue
+                if filename == ARCHIVE_FILE:
+                    continue
+                try:
+                    pid = int(filename[len('metrics-'):-len('.json')])
+                except ValueError:
+                    continue
+                path = os.path.join(directory, filename)
+                if _pid_alive(pid):
+                    live.append(path)
+                else:
+                    _merge(archive, _read(path))
+                    os.unlink(path)
+                    archived = True
+            if archived:
+                tmp_path = f'{archive_path}.tmp'
+                with open(tmp_path, 'w') as handle:
+                    json.dump({
+                        name: dict(data, samples=[[list(key), value] for key, value in data['samples'].items()])
+                        for name, data in archive.items()
+                    }, handle)
+                os.replace(tmp_path, archive_path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    for name, data in archive.items():
+        merged[name] = dict(data, samples=dict(data['samples']))
+    for path in live:
+        _merge(merged, _read(path))
+    return merged
+
+
+def _local_families(registry):
+    families = {}
+    for name, data in registry.snapshot().items():
+        families[name] = dict(data, samples={tuple(key): value for key, value in data['samples']})
+    return families
+
+
+def render_text(registry, multiproc_dir: Optional[str] = None, const_labels: Tuple = ()) -> str:
+    """
+    Prometheus text exposition (version 0.0.4) of ``registry``: counters
+    and histograms summed across workers when ``multiproc_dir`` is set,
+    then the gauges refreshed by the registered collectors.
+    """
+    registry.check_fork()
+    for collector in registry._collectors:
+        try:
+            collector(registry)
+        except Exception:
+            # One unreachable dependency must not take the whole scrape down.
+            pass
+
+    if multiproc_dir:
+        registry.dump(multiproc_dir)
+        families = aggregate(multiproc_dir)
+        for metric in registry.metrics():
+            if metric.name in families:  # files may carry an older description
+                families[metric.name]['help'] = metric.documentation
+    else:
+        families = _local_families(registry)
+
+    lines = []
+    for name in sorted(families):
+        data = families[name]
+        labelnames = data['labels']
+        lines.append(f'# HELP {name} {data["help"]}')
+        lines.append(f'# TYPE {name} {data["kind"]}')
+        for key, value in sorted(data['samples'].items()):
+            if data['kind'] == 'histogram':
+                cumulative = 0
+                for bound, count in zip(list(data['buckets']) + [float('inf')], value[:-1]):
+                    cumulative += count
+                    labels = _format_labels(labelnames, key, const_labels + (('le', _format_value(bound)),))
+                    lines.append(f'{name}_bucket{labels} {_format_value(cumulative)}')
+                labels = _format_labels(labelnames, key, const_labels)
+                lines.append(f'{name}_sum{labels} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{labels} {_format_value(cumulative)}')
+            else:
+                lines.append(f'{name}{_format_labels(labelnames, key, const_labels)} {_format_value(value)}')
+
+    for metric in registry.metrics():
+        if not isinstance(metric, Gauge):
+            continue
+        samples = metric.samples()
+        if not samples:
+            continue
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} gauge')
+        for key, value in sorted(samples.items()):
+            lines.append(f'{metric.name}{_format_labels(metric.labelnames, key, const_labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,120 @@
+"""
+Request metrics middleware and the ``/metrics`` view.
+
+``/metrics`` is served only to scrapers in ``METRICS_ALLOWED_NETWORKS``
+or presenting ``Authorization: Bearer <METRICS_BEARER_TOKEN>``; everyone
+else gets a 403.
+"""
+import hmac
+import ipaddress
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from shared.utils.helpers import get_client_ip
+
+from .collectors import DEFAULT_COLLECTORS
+from .metrics import REGISTRY, render_text
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency by resolved view.', ('view', 'method'),
+)
+REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'Requests by resolved view and status class.', ('view', 'method', 'status'),
+)
+DB_QUERIES = REGISTRY.counter(
+    'db_queries_total', 'Database queries issued by requests, by resolved view.', ('view',),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'cache_requests_total', 'Cache lookups made by requests, by result.', ('result',),
+)
+
+
+def _multiproc_dir():
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', '') or None
+
+
+def _const_labels():
+    service = getattr(settings, 'METRICS_SERVICE', '')
+    return (('service', service),) if service else ()
+
+
+class MetricsMiddleware:
+    """
+    Record latency and status per resolved view. When the service's
+    profiling middleware attached a ``query_profile`` to the response, its
+    query and cache counts are recorded too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        for collector in DEFAULT_COLLECTORS:
+            REGISTRY.register_collector(collector)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = self._start()
+        response = self.get_response(request)
+        return self._finish(request, response, started)
+
+    async def __acall__(self, request):
+        started = self._start()
+        response = await self.get_response(request)
+        return self._finish(request, response, started)
+
+    def _start(self):
+        REGISTRY.start_flusher(_multiproc_dir(), getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0))
+        return time.perf_counter()
+
+    def _finish(self, request, response, started):
+        elapsed = time.perf_counter() - started
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match else '<unresolved>'
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=f'{response.status_code // 100}xx')
+
+        profile = getattr(response, 'query_profile', None)
+        if profile is not None:
+            DB_QUERIES.inc(profile.queries, view=view)
+            if profile.cache_hits:
+                CACHE_REQUESTS.inc(profile.cache_hits, result='hit')
+            if profile.cache_misses:
+                CACHE_REQUESTS.inc(profile.cache_misses, result='miss')
+        return response
+
+
+def _scrape_allowed(request):
+    token = getattr(settings, 'METRICS_BEARER_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+            return True
+    try:
+        address = ipaddress.ip_address(get_client_ip(request) or '')
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, 'METRICS_ALLOWED_NETWORKS', ())
+    )
+
+
+def metrics_view(request):
+    """Prometheus text exposition, aggregated across workers (allowed scrapers only)."""
+    if not _scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_text(REGISTRY, _multiproc_dir(), _const_labels()), content_type=CONTENT_TYPE
+    )
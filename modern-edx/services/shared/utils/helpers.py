@@ -26,13 +26,19 @@ def hash_string(text: str, salt: Optional[str] = None) -> str:
     return hashlib.sha256(text.encode()).hexdigest()
 
 def get_client_ip(request) -> str:
-    """Get the client IP address from request."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    """
+    Get the client IP address from request.
+
+    X-Forwarded-For is only trusted for the ``TRUSTED_PROXY_COUNT`` entries
+    appended by our own proxies; anything left of them was sent by the
+    client and can be forged.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR')
 
 def get_user_agent(request) -> str:
     """Get the user agent from request."""